@@ -1,9 +1,10 @@
 import argparse
 import asyncio
+import signal
 import sys
 
-from src.application import Application
 from src.utils.logging_config import get_logger, setup_logging
+from src.utils.startup_profiler import get_startup_profiler
 
 logger = get_logger(__name__)
 
@@ -15,9 +16,10 @@ def parse_args():
     parser = argparse.ArgumentParser(description="Client IA Xiaozhi")
     parser.add_argument(
         "--mode",
-        choices=["gui", "cli"],
+        choices=["gui", "cli", "daemon"],
         default="gui",
-        help="Mode d'exécution : gui (interface graphique) ou cli (ligne de commande)",
+        help="Mode d'exécution : gui (interface graphique), cli (ligne de commande) "
+        "ou daemon (service sans interface ni saisie clavier, sans import de Qt)",
     )
     parser.add_argument(
         "--protocol",
@@ -30,6 +32,27 @@ def parse_args():
         action="store_true",
         help="Ignorer l'activation et démarrer directement l'application (débogage uniquement)",
     )
+    parser.add_argument(
+        "--calibrate",
+        action="store_true",
+        help="Mesurer le matériel (Opus, rééchantillonnage, mot d'éveil, périphériques audio), "
+        "enregistrer les réglages choisis puis quitter",
+    )
+    parser.add_argument(
+        "--skip-calibration",
+        action="store_true",
+        help="Ne pas lancer automatiquement la calibration matérielle au premier démarrage",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="CHEMIN",
+        help="Profiler le démarrage (durée par phase et coût d'import par module) et "
+        "écrire un rapport JSON et un fichier .folded (flamegraph), "
+        "par défaut logs/startup_profile.json",
+    )
     return parser.parse_args()
 
 
@@ -37,7 +60,7 @@ async def handle_activation(mode: str) -> bool:
     """Gère le processus d'activation de l'appareil en utilisant la boucle d'événements existante.
 
     Args:
-        mode: mode d'exécution, "gui" ou "cli"
+        mode: mode d'exécution, "gui", "cli" ou "daemon"
 
     Returns:
         bool: succès de l'activation
@@ -58,15 +81,51 @@ async def handle_activation(mode: str) -> bool:
         return False
 
 
-async def start_app(mode: str, protocol: str, skip_activation: bool) -> int:
+async def run_calibration(print_report: bool = False) -> bool:
+    """Lance la calibration matérielle et enregistre les réglages choisis.
+
+    Args:
+        print_report: afficher le détail des mesures sur la sortie standard
+
+    Returns:
+        bool: succès de la calibration
+    """
+    try:
+        from src.core.hardware_calibrator import HardwareCalibrator, format_report
+
+        calibrator = HardwareCalibrator()
+        results = await calibrator.run()
+        if print_report:
+            for line in format_report(results):
+                print(line)
+        return calibrator.save(results)
+    except Exception as e:
+        logger.error(f"Échec de la calibration matérielle : {e}", exc_info=True)
+        return False
+
+
+async def start_app(
+    mode: str, protocol: str, skip_activation: bool, skip_calibration: bool = False
+) -> int:
     """
     Point d'entrée unifié pour démarrer l'application (dans une boucle d'événements existante).
     """
     logger.info("Démarrage du client IA Xiaozhi")
+    profiler = get_startup_profiler()
+
+    # Calibration matérielle au premier démarrage (ou après changement de processeur)
+    if not skip_calibration:
+        from src.core.hardware_calibrator import HardwareCalibrator
+
+        if HardwareCalibrator.needs_calibration():
+            logger.info("Matériel non calibré, lancement de la calibration...")
+            with profiler.phase("calibration"):
+                await run_calibration()
 
     # Gestion du processus d'activation
     if not skip_activation:
-        activation_success = await handle_activation(mode)
+        with profiler.phase("activation"):
+            activation_success = await handle_activation(mode)
         if not activation_success:
             logger.error("Échec de l'activation de l'appareil, arrêt du programme")
             return 1
@@ -74,7 +133,20 @@ async def start_app(mode: str, protocol: str, skip_activation: bool) -> int:
         logger.warning("Processus d'activation ignoré (mode débogage)")
 
     # Crée et démarre l'application
+    with profiler.phase("import_application"):
+        from src.application import Application
+
     app = Application.get_instance()
+    if mode == "daemon":
+        # Arrêt propre sur SIGTERM (systemd) comme sur SIGINT
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(
+                    sig, lambda: asyncio.ensure_future(app.shutdown())
+                )
+            except (NotImplementedError, RuntimeError):
+                pass
     return await app.run(mode=mode, protocol=protocol)
 
 
@@ -82,18 +154,27 @@ if __name__ == "__main__":
     exit_code = 1
     try:
         args = parse_args()
+        if args.profile_startup is not None:
+            # À activer avant tout import lourd pour mesurer les imports
+            get_startup_profiler().enable(args.profile_startup or None)
         setup_logging()
 
-        if args.mode == "gui":
+        if args.calibrate:
+            # Calibration seule : aucune interface n'est créée
+            exit_code = 0 if asyncio.run(run_calibration(print_report=True)) else 1
+        elif args.mode == "gui":
             # En mode GUI, main crée l'application QApplication et la boucle qasync
-            try:
-                import qasync
-                from PyQt5.QtWidgets import QApplication
-            except ImportError as e:
-                logger.error(f"Le mode GUI nécessite les bibliothèques qasync et PyQt5 : {e}")
-                sys.exit(1)
-
-            qt_app = QApplication.instance() or QApplication(sys.argv)
+            with get_startup_profiler().phase("qt_setup"):
+                try:
+                    import qasync
+                    from PyQt5.QtWidgets import QApplication
+                except ImportError as e:
+                    logger.error(
+                        f"Le mode GUI nécessite les bibliothèques qasync et PyQt5 : {e}"
+                    )
+                    sys.exit(1)
+
+                qt_app = QApplication.instance() or QApplication(sys.argv)
 
             loop = qasync.QEventLoop(qt_app)
             asyncio.set_event_loop(loop)
@@ -101,12 +182,22 @@ if __name__ == "__main__":
 
             with loop:
                 exit_code = loop.run_until_complete(
-                    start_app(args.mode, args.protocol, args.skip_activation)
+                    start_app(
+                        args.mode,
+                        args.protocol,
+                        args.skip_activation,
+                        args.skip_calibration,
+                    )
                 )
         else:
-            # Le mode CLI utilise la boucle asyncio standard
+            # Les modes CLI et daemon utilisent la boucle asyncio standard
             exit_code = asyncio.run(
-                start_app(args.mode, args.protocol, args.skip_activation)
+                start_app(
+                    args.mode,
+                    args.protocol,
+                    args.skip_activation,
+                    args.skip_calibration,
+                )
             )
 
     except KeyboardInterrupt:
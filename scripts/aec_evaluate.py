@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""AEC离线评估脚本 用于在不进行实机测试的情况下比较回声消除配置的效果和开销.
+
+流程:
+1. 读取远端(扬声器播放)WAV，以及近端(用户语音)WAV或实录麦克风WAV
+2. 未提供麦克风录音时，按指定延迟/房间冲激响应合成回声并与近端语音混合
+3. 以不同的 Config 预设(基于 create_default_config)逐10ms送入 WebRTC APM
+4. 输出 ERLE、近端语音失真以及每秒音频的CPU耗时
+
+用法:
+    python scripts/aec_evaluate.py --far far.wav --near near.wav
+    python scripts/aec_evaluate.py --far far.wav --mic mic.wav --preset app aec
+    python scripts/aec_evaluate.py --far far.wav --near near.wav \\
+        --delay-ms 60 --rt60 0.3 --stream-delay-ms 0 40 80 --json result.json
+"""
+
+import argparse
+import ctypes
+import json
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from libs.webrtc_apm import (  # noqa: E402
+    NoiseSuppressionLevel,
+    WebRTCAudioProcessing,
+    create_default_config,
+)
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 160  # 10ms @ 16kHz，WebRTC标准帧
+ACTIVITY_THRESHOLD_DB = -50.0  # 帧能量活动门限(dBFS)
+
+
+def _preset_off(config):
+    """
+    不做任何处理（基线）
+    """
+    return config
+
+
+def _preset_aec(config):
+    """
+    仅回声消除.
+    """
+    config.echo.enabled = True
+    config.echo.mobile_mode = False
+    config.echo.enforce_high_pass_filtering = True
+    return config
+
+
+def _preset_app(config):
+    """
+    与 AECProcessor 运行时一致的配置.
+    """
+    from src.audio_codecs.aec_processor import AECProcessor
+
+    return AECProcessor.create_apm_config()
+
+
+def _preset_aec_ns_agc(config):
+    """
+    回声消除 + 噪声抑制 + AGC2 自适应数字增益.
+    """
+    _preset_aec(config)
+    config.high_pass.enabled = True
+    config.noise_suppress.enabled = True
+    config.noise_suppress.noise_level = NoiseSuppressionLevel.MODERATE
+    config.gain_control2.enabled = True
+    config.gain_control2.adaptive_controller.enabled = True
+    return config
+
+
+def _preset_mobile(config):
+    """
+    移动端低开销回声控制（AECM）
+    """
+    _preset_aec(config)
+    config.echo.mobile_mode = True
+    return config
+
+
+PRESETS: Dict[str, Callable] = {
+    "off": _preset_off,
+    "aec": _preset_aec,
+    "app": _preset_app,
+    "aec_ns_agc": _preset_aec_ns_agc,
+    "mobile": _preset_mobile,
+}
+
+
+def load_wav(path: str) -> np.ndarray:
+    """
+    读取WAV为16kHz单声道float32(-1~1)
+    """
+    with wave.open(path, "rb") as wf:
+        channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        sample_rate = wf.getframerate()
+        raw = wf.readframes(wf.getnframes())
+
+    if sample_width != 2:
+        raise ValueError(f"仅支持16位PCM WAV: {path}")
+
+    audio = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+
+    if sample_rate != SAMPLE_RATE:
+        import soxr
+
+        audio = soxr.resample(audio, sample_rate, SAMPLE_RATE, quality="HQ")
+
+    return audio.astype(np.float32)
+
+
+def load_rir(args) -> np.ndarray:
+    """
+    获取房间冲激响应：WAV文件或按RT60合成的指数衰减噪声.
+    """
+    if args.rir:
+        rir = load_wav(args.rir)
+    else:
+        length = max(1, int(args.rt60 * SAMPLE_RATE))
+        rng = np.random.default_rng(args.seed)
+        t = np.arange(length) / SAMPLE_RATE
+        # RT60：能量衰减60dB所需时间 -> 幅度衰减系数 6.9/RT60
+        rir = rng.standard_normal(length) * np.exp(-6.9 * t / max(args.rt60, 1e-3))
+        rir[0] = 1.0
+
+    peak = np.max(np.abs(rir))
+    return (rir / peak).astype(np.float32) if peak > 0 else rir
+
+
+def synthesize_echo(far: np.ndarray, args) -> np.ndarray:
+    """
+    按延迟、RIR和回声增益合成麦克风处的回声.
+    """
+    rir = load_rir(args)
+    echo = np.convolve(far, rir)[: len(far)]
+    delay = int(args.delay_ms * SAMPLE_RATE / 1000)
+    echo = np.concatenate((np.zeros(delay, dtype=np.float32), echo))[: len(far)]
+
+    # 以远端信号功率为基准设置回声电平
+    far_power = np.mean(far**2) + 1e-12
+    echo_power = np.mean(echo**2) + 1e-12
+    gain = np.sqrt(far_power / echo_power) * 10 ** (args.echo_gain_db / 20)
+    return (echo * gain).astype(np.float32)
+
+
+def to_int16(audio: np.ndarray) -> np.ndarray:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def frame_power_db(audio: np.ndarray) -> np.ndarray:
+    """
+    向量化计算每个10ms帧的能量(dBFS)
+    """
+    num_frames = len(audio) // FRAME_SIZE
+    frames = audio[: num_frames * FRAME_SIZE].reshape(num_frames, FRAME_SIZE)
+    return 10 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + 1e-12)
+
+
+def run_apm(
+    config, far: np.ndarray, mic: np.ndarray, stream_delay_ms: int
+) -> Dict[str, object]:
+    """
+    逐10ms帧运行APM，返回处理结果和CPU耗时.
+    """
+    apm = WebRTCAudioProcessing()
+    result = apm.apply_config(config)
+    if result != 0:
+        raise RuntimeError(f"WebRTC APM配置失败，错误码: {result}")
+
+    capture_config = apm.create_stream_config(SAMPLE_RATE, 1)
+    render_config = apm.create_stream_config(SAMPLE_RATE, 1)
+    apm.set_stream_delay_ms(stream_delay_ms)
+
+    far_pcm = to_int16(far)
+    mic_pcm = to_int16(mic)
+    num_frames = min(len(far_pcm), len(mic_pcm)) // FRAME_SIZE
+    output = np.zeros(num_frames * FRAME_SIZE, dtype=np.int16)
+
+    buffer_type = ctypes.c_short * FRAME_SIZE
+    processed_render = buffer_type()
+    processed_capture = buffer_type()
+
+    try:
+        cpu_start = time.process_time()
+        for i in range(num_frames):
+            start = i * FRAME_SIZE
+            end = start + FRAME_SIZE
+            render_buffer = buffer_type.from_buffer_copy(far_pcm[start:end].tobytes())
+            capture_buffer = buffer_type.from_buffer_copy(mic_pcm[start:end].tobytes())
+            apm.process_reverse_stream(
+                render_buffer, render_config, render_config, processed_render
+            )
+            apm.process_stream(
+                capture_buffer, capture_config, capture_config, processed_capture
+            )
+            output[start:end] = np.frombuffer(processed_capture, dtype=np.int16)
+        cpu_seconds = time.process_time() - cpu_start
+    finally:
+        apm.destroy_stream_config(capture_config)
+        apm.destroy_stream_config(render_config)
+
+    return {
+        "output": output.astype(np.float32) / 32768.0,
+        "cpu_seconds": cpu_seconds,
+        "audio_seconds": num_frames * FRAME_SIZE / SAMPLE_RATE,
+    }
+
+
+def compute_metrics(
+    far: np.ndarray,
+    mic: np.ndarray,
+    out: np.ndarray,
+    near: Optional[np.ndarray],
+) -> Dict[str, Optional[float]]:
+    """计算评估指标.
+
+    - ERLE：仅远端活跃（近端静音）帧上 麦克风能量/输出能量，单位dB
+    - 近端失真：近端活跃帧上 输出相对干净近端语音的信号失真比(SDR)，以及电平变化
+    """
+    n = min(len(far), len(mic), len(out)) // FRAME_SIZE * FRAME_SIZE
+    far, mic, out = far[:n], mic[:n], out[:n]
+    far_active = frame_power_db(far) > ACTIVITY_THRESHOLD_DB
+
+    if near is not None:
+        near = near[:n]
+        near_active = frame_power_db(near) > ACTIVITY_THRESHOLD_DB
+    else:
+        near_active = np.zeros_like(far_active)
+
+    mic_frames = mic.reshape(-1, FRAME_SIZE)
+    out_frames = out.reshape(-1, FRAME_SIZE)
+
+    metrics: Dict[str, Optional[float]] = {
+        "erle_db": None,
+        "near_sdr_db": None,
+        "near_level_change_db": None,
+        "far_only_frames": int(np.sum(far_active & ~near_active)),
+        "double_talk_frames": int(np.sum(far_active & near_active)),
+    }
+
+    echo_only = far_active & ~near_active
+    if np.any(echo_only):
+        mic_power = np.mean(mic_frames[echo_only] ** 2)
+        out_power = np.mean(out_frames[echo_only] ** 2) + 1e-12
+        metrics["erle_db"] = float(10 * np.log10(mic_power / out_power + 1e-12))
+
+    if near is not None and np.any(near_active):
+        near_frames = near.reshape(-1, FRAME_SIZE)[near_active].ravel()
+        out_near = out_frames[near_active].ravel()
+        # 最小二乘增益，消除APM整体增益对失真度量的影响
+        gain = np.dot(out_near, near_frames) / (np.dot(near_frames, near_frames) + 1e-12)
+        error = out_near - gain * near_frames
+        metrics["near_sdr_db"] = float(
+            10
+            * np.log10(
+                np.sum((gain * near_frames) ** 2) / (np.sum(error**2) + 1e-12) + 1e-12
+            )
+        )
+        metrics["near_level_change_db"] = float(
+            10
+            * np.log10(
+                (np.mean(out_near**2) + 1e-12) / (np.mean(near_frames**2) + 1e-12)
+            )
+        )
+
+    return metrics
+
+
+def build_config(preset: str, args):
+    """
+    根据预设和命令行覆盖项构造APM配置.
+    """
+    config = PRESETS[preset](create_default_config())
+
+    if args.ns_level is not None:
+        config.noise_suppress.enabled = args.ns_level >= 0
+        if args.ns_level >= 0:
+            config.noise_suppress.noise_level = args.ns_level
+
+    if args.agc == "off":
+        config.gain_control1.enabled = False
+        config.gain_control2.enabled = False
+    elif args.agc == "agc1":
+        config.gain_control1.enabled = True
+        config.gain_control2.enabled = False
+    elif args.agc == "agc2":
+        config.gain_control1.enabled = False
+        config.gain_control2.enabled = True
+        config.gain_control2.adaptive_controller.enabled = True
+
+    return config
+
+
+def format_value(value, suffix: str = "") -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.1f}{suffix}"
+    return f"{value}{suffix}"
+
+
+def print_report(results: List[Dict[str, object]]):
+    """
+    打印结果表格.
+    """
+    header = (
+        f"{'预设':<12}{'流延迟ms':>10}{'ERLE dB':>10}{'近端SDR dB':>12}"
+        f"{'电平变化 dB':>12}{'CPU ms/s':>10}{'RTF':>8}"
+    )
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['preset']:<12}{r['stream_delay_ms']:>10}"
+            f"{format_value(r['erle_db']):>10}"
+            f"{format_value(r['near_sdr_db']):>12}"
+            f"{format_value(r['near_level_change_db']):>12}"
+            f"{r['cpu_ms_per_audio_second']:>10.2f}"
+            f"{r['real_time_factor']:>8.4f}"
+        )
+
+
+def main():
+    """
+    主函数.
+    """
+    parser = argparse.ArgumentParser(description="AEC离线质量与开销评估")
+    parser.add_argument("--far", required=True, help="远端(扬声器播放)WAV")
+    parser.add_argument("--near", help="干净的近端语音WAV，用于合成和失真评估")
+    parser.add_argument("--mic", help="实录麦克风WAV（提供时不再合成回声）")
+    parser.add_argument(
+        "--preset",
+        nargs="+",
+        choices=sorted(PRESETS),
+        default=["off", "aec", "app"],
+        help="要评估的配置预设",
+    )
+    parser.add_argument(
+        "--stream-delay-ms",
+        type=int,
+        nargs="+",
+        default=[40],
+        help="set_stream_delay_ms 的取值（可多个，逐一扫描）",
+    )
+    parser.add_argument(
+        "--ns-level",
+        type=int,
+        choices=[-1, 0, 1, 2, 3],
+        help="覆盖噪声抑制级别（-1关闭，0~3对应LOW~VERY_HIGH）",
+    )
+    parser.add_argument(
+        "--agc", choices=["preset", "off", "agc1", "agc2"], default="preset"
+    )
+    parser.add_argument("--delay-ms", type=float, default=50.0, help="合成回声延迟")
+    parser.add_argument("--rir", help="房间冲激响应WAV（缺省按RT60合成）")
+    parser.add_argument("--rt60", type=float, default=0.25, help="合成RIR的RT60(秒)")
+    parser.add_argument(
+        "--echo-gain-db", type=float, default=0.0, help="回声相对远端信号的电平"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="合成RIR的随机种子")
+    parser.add_argument("--save-dir", help="保存合成麦克风信号和各预设输出的目录")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    far = load_wav(args.far)
+    near = load_wav(args.near) if args.near else None
+
+    if args.mic:
+        mic = load_wav(args.mic)
+    else:
+        mic = synthesize_echo(far, args)
+        if near is not None:
+            length = max(len(mic), len(near))
+            mic = np.pad(mic, (0, length - len(mic)))
+            mic = mic + np.pad(near, (0, length - len(near)))
+
+    length = min(len(far), len(mic))
+    if near is not None:
+        near = np.pad(near, (0, max(0, length - len(near))))[:length]
+    far, mic = far[:length], mic[:length]
+    print(f"音频时长: {length / SAMPLE_RATE:.2f}s，近端参考: {'有' if near is not None else '无'}")
+
+    save_dir = Path(args.save_dir) if args.save_dir else None
+    if save_dir:
+        save_dir.mkdir(parents=True, exist_ok=True)
+        save_wav(save_dir / "mic.wav", mic)
+
+    results = []
+    for preset in args.preset:
+        for delay_ms in args.stream_delay_ms:
+            config = build_config(preset, args)
+            run = run_apm(config, far, mic, delay_ms)
+            metrics = compute_metrics(far, mic, run["output"], near)
+            audio_seconds = max(run["audio_seconds"], 1e-9)
+            results.append(
+                {
+                    "preset": preset,
+                    "stream_delay_ms": delay_ms,
+                    **metrics,
+                    "cpu_ms_per_audio_second": run["cpu_seconds"]
+                    * 1000
+                    / audio_seconds,
+                    "real_time_factor": run["cpu_seconds"] / audio_seconds,
+                }
+            )
+            if save_dir:
+                save_wav(save_dir / f"out_{preset}_{delay_ms}ms.wav", run["output"])
+
+    print_report(results)
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        print(f"\n结果已写入: {args.json}")
+
+
+def save_wav(path: Path, audio: np.ndarray):
+    """
+    保存16kHz单声道16位WAV.
+    """
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(to_int16(audio).tobytes())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""守护进程模式导入检查 确认 --mode daemon 不加载界面库和重量级可选依赖.
+
+在独立子进程中按 main.py 的方式以 daemon 模式启动应用（跳过激活与校准），
+运行若干秒后关闭，检查期间是否导入了禁止的模块；如有，给出首次导入它的项目代码位置。
+同时报告待机时的常驻内存与已加载模块数。
+
+发现禁止模块时退出码为 1，可直接用于 CI。
+
+用法:
+    python scripts/check_daemon_imports.py
+    python scripts/check_daemon_imports.py --seconds 15 --protocol mqtt --json daemon_imports.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 守护进程路径上不允许出现的模块（界面库与按需加载的 MCP 工具依赖）
+FORBIDDEN = (
+    "PyQt5",
+    "qasync",
+    "cv2",
+    "pygame",
+    "bs4",
+    "psutil",
+    "pynput",
+)
+
+PROBE = r"""
+import asyncio, importlib.abc, json, sys, traceback
+sys.path.insert(0, {root!r})
+FORBIDDEN = {forbidden!r}
+origins = {{}}
+
+
+class Tracer(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        top = fullname.partition(".")[0]
+        if top in FORBIDDEN and top not in origins:
+            frames = [
+                f"{{f.filename}}:{{f.lineno}}"
+                for f in traceback.extract_stack()
+                if f.filename.startswith({root!r}) and "check_daemon_imports" not in f.filename
+            ]
+            origins[top] = frames[-3:]
+        return None
+
+
+sys.meta_path.insert(0, Tracer())
+
+import main
+from src.utils.memory_usage import get_rss_mb
+
+
+async def probe():
+    task = asyncio.create_task(main.start_app("daemon", {protocol!r}, True, True))
+    await asyncio.sleep({seconds!r})
+    from src.application import Application
+
+    report = {{
+        "rss_mb": get_rss_mb(),
+        "modules": len(sys.modules),
+        "forbidden": {{name: origins.get(name, []) for name in FORBIDDEN if name in sys.modules}},
+    }}
+    await Application.get_instance().shutdown()
+    await asyncio.wait([task], timeout=5)
+    return report
+
+
+print("__REPORT__" + json.dumps(asyncio.run(probe())))
+"""
+
+
+def run_probe(protocol: str, seconds: float) -> dict:
+    code = PROBE.format(
+        root=str(project_root),
+        forbidden=FORBIDDEN,
+        protocol=protocol,
+        seconds=seconds,
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=str(project_root),
+        stdin=subprocess.DEVNULL,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("__REPORT__"):
+            return json.loads(line[len("__REPORT__") :])
+    raise RuntimeError(f"daemon 子进程失败:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="守护进程模式导入检查")
+    parser.add_argument(
+        "--protocol", choices=["websocket", "mqtt"], default="websocket", help="通信协议"
+    )
+    parser.add_argument("--seconds", type=float, default=12.0, help="启动后运行秒数")
+    parser.add_argument("--json", help="结果输出JSON路径")
+    args = parser.parse_args()
+
+    report = run_probe(args.protocol, args.seconds)
+
+    print("\n" + "=" * 60)
+    print(f"待机常驻内存: {report['rss_mb']}MB，已加载模块: {report['modules']} 个")
+    if report["forbidden"]:
+        print("发现禁止的导入:")
+        for name, origin in report["forbidden"].items():
+            print(f"  {name}")
+            for frame in origin:
+                print(f"    <- {frame}")
+    else:
+        print(f"未导入禁止模块: {', '.join(FORBIDDEN)}")
+    print("=" * 60)
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"结果已保存到: {args.json}")
+
+    sys.exit(1 if report["forbidden"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""低功耗待机基准测试 对比空闲时的CPU占用与唤醒后首帧播放延迟.
+
+依次测量两种空闲状态（均带唤醒词消费者与实时编码回调，与 Application 一致）：
+- normal:    播放流持续输出静音，采集走完整处理链（重采样/AEC/编码/唤醒词队列）
+- low_power: 播放流停止，采集只喂唤醒词检测
+
+唤醒延迟：写入一帧TTS音频起，到播放回调取走该帧的耗时（low_power 包含重启播放流）。
+
+用法:
+    python scripts/idle_power_benchmark.py
+    python scripts/idle_power_benchmark.py --virtual --seconds 10 --json idle.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import opuslib
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.latency_benchmark import stats, wait_for  # noqa: E402
+from src.constants.constants import AudioConfig  # noqa: E402
+from src.utils.logging_config import setup_logging  # noqa: E402
+
+
+def make_tts_packet() -> bytes:
+    """
+    一帧440Hz正弦的Opus包（模拟TTS下行）
+    """
+    encoder = opuslib.Encoder(
+        AudioConfig.OUTPUT_SAMPLE_RATE, AudioConfig.CHANNELS, opuslib.APPLICATION_AUDIO
+    )
+    t = np.arange(AudioConfig.OUTPUT_FRAME_SIZE) / AudioConfig.OUTPUT_SAMPLE_RATE
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    return encoder.encode(pcm.tobytes(), AudioConfig.OUTPUT_FRAME_SIZE)
+
+
+async def measure_cpu(seconds: float) -> float:
+    """
+    采样期间本进程CPU占用（单核百分比）
+    """
+    wall, cpu = time.monotonic(), time.process_time()
+    await asyncio.sleep(seconds)
+    return round((time.process_time() - cpu) / (time.monotonic() - wall) * 100, 2)
+
+
+async def measure_wake(codec, packet: bytes, low_power: bool) -> float:
+    """
+    写入一帧音频到播放回调取走的耗时（毫秒）
+    """
+    if low_power:
+        await codec.enter_low_power()
+    # 错开帧边界，避免每次都恰好落在回调前后
+    await asyncio.sleep(0.05 + np.random.random() * AudioConfig.FRAME_DURATION / 1000)
+    start = time.perf_counter()
+    await codec.write_audio(packet)
+    await wait_for(codec.is_output_idle, 2.0, interval=0.001)
+    return (time.perf_counter() - start) * 1000
+
+
+async def benchmark(args) -> dict:
+    if args.virtual:
+        from src.audio_codecs.virtual_audio_codec import VirtualAudioCodec
+
+        codec = VirtualAudioCodec()
+    else:
+        from src.audio_codecs.audio_codec import AudioCodec
+
+        codec = AudioCodec()
+    await codec.initialize()
+    # 与 Application 一致：实时编码回调常驻，空闲时由应用丢弃
+    codec.set_encoded_audio_callback(lambda data: None)
+
+    async def wakeword_consumer():
+        while True:
+            await codec.get_raw_audio_for_detection()
+            await asyncio.sleep(0.005)
+
+    consumer = asyncio.create_task(wakeword_consumer())
+    packet = make_tts_packet()
+    report = {"mode": "virtual" if args.virtual else "device"}
+
+    try:
+        await asyncio.sleep(args.warmup)
+        for phase, low_power in (("normal", False), ("low_power", True)):
+            if low_power:
+                await codec.enter_low_power()
+            cpu = [await measure_cpu(args.seconds) for _ in range(args.repeat)]
+            if low_power:
+                await codec.exit_low_power()
+
+            wake = []
+            for _ in range(args.wakes):
+                wake.append(await measure_wake(codec, packet, low_power))
+                if low_power:
+                    await codec.exit_low_power()
+            report[phase] = {
+                "cpu_percent": stats(cpu),
+                "wake_to_audio_ms": stats(wake),
+            }
+            print(
+                f"{phase}: CPU {np.mean(cpu):.2f}%，"
+                f"唤醒到播放 p50 {report[phase]['wake_to_audio_ms']['p50']}ms"
+            )
+        report["stream_restart_ms"] = codec.get_stream_stats()["wake_latency_ms"]
+    finally:
+        consumer.cancel()
+        await codec.close()
+    return report
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 60)
+    print(f"{'状态':<12}{'CPU% p50':>12}{'CPU% max':>12}{'唤醒p50(ms)':>14}{'唤醒max(ms)':>14}")
+    for phase in ("normal", "low_power"):
+        cpu = report[phase]["cpu_percent"]
+        wake = report[phase]["wake_to_audio_ms"]
+        print(
+            f"{phase:<12}{cpu['p50']:>12}{cpu['max']:>12}{wake['p50']:>14}{wake['max']:>14}"
+        )
+    print(f"播放流重启耗时: {report['stream_restart_ms']}ms")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="低功耗待机基准测试")
+    parser.add_argument("--virtual", action="store_true", help="使用虚拟音频设备（无声卡）")
+    parser.add_argument("--seconds", type=float, default=5.0, help="每次CPU采样秒数")
+    parser.add_argument("--repeat", type=int, default=3, help="每种状态CPU采样次数")
+    parser.add_argument("--wakes", type=int, default=10, help="每种状态唤醒测量次数")
+    parser.add_argument("--warmup", type=float, default=1.0, help="启动后预热秒")
+    parser.add_argument("--json", help="结果输出JSON路径")
+    args = parser.parse_args()
+
+    setup_logging()
+    report = asyncio.run(benchmark(args))
+    print_report(report)
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""MCP 大结果 JSON 编解码微基准.
+
+对比一次 tools/call 应答从工具返回到交给传输层 send_text 的序列化开销：
+- legacy: 旧实现（标准库；应答 result 先解析再编码，测长度再编码一次，
+  send_mcp_message 又把整段应答解析回 dict 后重新编码）
+- json:   当前实现，json_codec 使用标准库后端
+- orjson: 当前实现，json_codec 使用 orjson 后端（需已安装）
+
+另外对比接收方向解析同样大小消息的耗时。
+
+用法:
+    python scripts/json_benchmark.py
+    python scripts/json_benchmark.py --sizes 4 64 512 --iterations 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.mcp.mcp_server import McpServer, McpTool, PropertyList  # noqa: E402
+from src.protocols.protocol import Protocol  # noqa: E402
+from src.utils import json_codec  # noqa: E402
+
+
+class CaptureProtocol(Protocol):
+    """
+    只记录最后一条发送文本的协议.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.session_id = "benchmark-session"
+        self.last_text = ""
+
+    async def send_text(self, message):
+        self.last_text = message
+
+
+def make_result_text(size_kb: int) -> str:
+    """
+    构造近似真实的大工具结果（如搜索结果、文件列表的JSON文本）
+    """
+    items = []
+    total = 0
+    index = 0
+    while total < size_kb * 1024:
+        item = {
+            "id": index,
+            "title": f"结果条目 {index} - Résultat de recherche",
+            "path": f"/home/user/音乐/专辑{index % 17}/曲目{index}.mp3",
+            "score": round(1 / (index + 1), 6),
+            "tags": ["本地", "music", "mp3"],
+            "playable": index % 3 != 0,
+        }
+        items.append(item)
+        total += len(json.dumps(item, ensure_ascii=False))
+        index += 1
+    return json.dumps({"results": items, "total": len(items)}, ensure_ascii=False)
+
+
+def legacy_pipeline(tool_result_text: str, session_id: str) -> str:
+    # McpTool.call
+    tool_json = json.dumps(
+        {"content": [{"type": "text", "text": tool_result_text}], "isError": False}
+    )
+    # _handle_tool_call: json.loads(result) -> _reply_result
+    result = json.loads(tool_json)
+    payload = {"jsonrpc": "2.0", "id": 1, "result": result}
+    len(json.dumps(result))
+    reply = json.dumps(payload)
+    # send_mcp_message: 解析后重新编码
+    message = {"session_id": session_id, "type": "mcp", "payload": json.loads(reply)}
+    return json.dumps(message)
+
+
+async def current_pipeline(server: McpServer, tool: McpTool) -> None:
+    result = await tool.call({})
+    await server._reply_raw_result(1, result)
+
+
+def measure(func, iterations: int) -> float:
+    """
+    返回单次耗时中位数（微秒）
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+async def run_benchmark(args) -> list:
+    backends = ["json"] + (["orjson"] if json_codec.orjson is not None else [])
+    rows = []
+
+    for size_kb in args.sizes:
+        text = make_result_text(size_kb)
+        protocol = CaptureProtocol()
+        server = McpServer()
+        server.set_send_callback(protocol.send_mcp_message)
+        tool = McpTool("benchmark.result", "基准测试", PropertyList(), lambda _: text)
+        server.add_tool(tool)
+
+        row = {"size_kb": size_kb}
+        row["legacy_us"] = measure(
+            lambda: legacy_pipeline(text, protocol.session_id), args.iterations
+        )
+        legacy_message = legacy_pipeline(text, protocol.session_id)
+
+        for name in backends:
+            json_codec.use_backend(name)
+            # 在同一事件循环内同步驱动协程，避免把调度开销计入
+            samples = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                await current_pipeline(server, tool)
+                samples.append((time.perf_counter() - start) * 1e6)
+            samples.sort()
+            row[f"{name}_us"] = samples[len(samples) // 2]
+
+            # 校验输出与旧实现语义一致
+            if json.loads(protocol.last_text) != json.loads(legacy_message):
+                raise RuntimeError(f"{name} 后端输出与旧实现不一致")
+
+            row[f"{name}_loads_us"] = measure(
+                lambda: json_codec.loads(legacy_message), args.iterations
+            )
+        row["stdlib_loads_us"] = measure(
+            lambda: json.loads(legacy_message), args.iterations
+        )
+        row["message_bytes"] = len(protocol.last_text.encode("utf-8"))
+        rows.append(row)
+
+    return rows
+
+
+def print_rows(rows: list):
+    print("\n发送方向（工具结果 -> send_text），单次耗时中位数，单位微秒")
+    header = f"{'大小KB':>8}{'消息字节':>12}{'legacy':>12}{'json':>12}{'orjson':>12}{'加速比':>10}"
+    print(header)
+    for row in rows:
+        best = row.get("orjson_us", row["json_us"])
+        print(
+            f"{row['size_kb']:>8}{row['message_bytes']:>12}{row['legacy_us']:>12.1f}"
+            f"{row['json_us']:>12.1f}{row.get('orjson_us', float('nan')):>12.1f}"
+            f"{row['legacy_us'] / best:>9.1f}x"
+        )
+
+    print("\n接收方向（解析整条消息），单次耗时中位数，单位微秒")
+    print(f"{'大小KB':>8}{'stdlib':>12}{'orjson':>12}")
+    for row in rows:
+        print(
+            f"{row['size_kb']:>8}{row['stdlib_loads_us']:>12.1f}"
+            f"{row.get('orjson_loads_us', float('nan')):>12.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 大结果 JSON 编解码微基准")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1, 16, 128, 512], help="结果大小(KB)"
+    )
+    parser.add_argument("--iterations", type=int, default=100, help="每项重复次数")
+    parser.add_argument("--json", help="结果输出JSON路径")
+    args = parser.parse_args()
+
+    # 基准只关心编解码，屏蔽MCP日志
+    logging.disable(logging.INFO)
+
+    print(f"当前默认后端: {json_codec.backend()}")
+    rows = asyncio.run(run_benchmark(args))
+    print_rows(rows)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
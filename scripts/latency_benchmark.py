@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""端到端对话延迟基准测试 测量用户真正感受到的“唤醒 -> 听到第一声回复”各阶段耗时.
+
+无界面、无声卡地运行完整的 Application：
+1. 用虚拟音频设备把包含“唤醒词 + 提问”的WAV按实时速率送入录音回调
+2. 唤醒词检测、建连、上行、服务端回复、解码、播放全部走正式代码路径
+3. 由 latency_tracer 在状态切换、TTS开始、编解码器首帧等位置打点
+4. 重复 N 次，输出各阶段的分位数（JSON）
+
+阶段（均相对唤醒词检测时刻）:
+    channel_opened -> state:listening -> first_uplink_packet -> stt -> tts_start
+    -> first_tts_packet -> first_tts_decoded -> first_tts_played
+
+用法:
+    python scripts/local_server.py &
+    python scripts/latency_benchmark.py --wav wake_and_question.wav --runs 20
+    python scripts/latency_benchmark.py --wav question.wav --no-kws --json latency.json
+    python scripts/latency_benchmark.py --wav wake_and_question.wav --protocol mqtt \\
+        --wake-end-ms 900 --runs 10
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.application import Application  # noqa: E402
+from src.constants.constants import DeviceState  # noqa: E402
+from src.display.base_display import BaseDisplay  # noqa: E402
+from src.utils.latency_tracer import get_latency_tracer  # noqa: E402
+from src.utils.logging_config import get_logger, setup_logging  # noqa: E402
+
+logger = get_logger(__name__)
+
+STAGES = [
+    "wake_word_detected",
+    "channel_opened",
+    "state:listening",
+    "first_uplink_packet",
+    "stt",
+    "tts_start",
+    "first_tts_packet",
+    "first_tts_decoded",
+    "first_tts_played",
+]
+
+
+class NullDisplay(BaseDisplay):
+    """
+    不做任何输出的显示实现.
+    """
+
+    async def set_callbacks(self, *args, **kwargs):
+        pass
+
+    async def update_button_status(self, text: str):
+        pass
+
+    async def update_status(self, status: str, connected: bool):
+        pass
+
+    async def update_text(self, text: str):
+        pass
+
+    async def update_emotion(self, emotion_name: str):
+        pass
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class BenchmarkApplication(Application):
+    """
+    使用虚拟音频设备和空显示的 Application.
+    """
+
+    def __init__(self, speed: float = 1.0):
+        super().__init__()
+        self._codec_speed = speed
+
+    def _set_display_type(self, mode: str):
+        self.display = NullDisplay()
+
+    async def _start_cli_display(self):
+        pass
+
+    async def _initialize_shortcuts(self):
+        pass
+
+    async def _initialize_audio(self):
+        from src.audio_codecs.virtual_audio_codec import VirtualAudioCodec
+
+        self.audio_codec = VirtualAudioCodec(speed=self._codec_speed)
+        await self.audio_codec.initialize()
+        self.audio_codec.set_encoded_audio_callback(self._on_encoded_audio)
+
+
+def load_wav_16k(path: str) -> np.ndarray:
+    """
+    读取WAV并转换为16kHz单声道int16.
+    """
+    from scripts.local_server import load_wav_mono
+
+    return load_wav_mono(path, 16000)
+
+
+def stats(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"n": 0}
+    arr = np.array(values)
+    return {
+        "n": len(arr),
+        "mean": round(float(arr.mean()), 1),
+        "min": round(float(arr.min()), 1),
+        "p50": round(float(np.percentile(arr, 50)), 1),
+        "p90": round(float(np.percentile(arr, 90)), 1),
+        "p99": round(float(np.percentile(arr, 99)), 1),
+        "max": round(float(arr.max()), 1),
+    }
+
+
+async def wait_for(predicate, timeout: float, interval: float = 0.01) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(interval)
+    return predicate()
+
+
+async def run_once(app: BenchmarkApplication, audio: np.ndarray, args) -> Optional[dict]:
+    tracer = get_latency_tracer()
+    codec = app.audio_codec
+
+    if not await wait_for(lambda: app.device_state == DeviceState.IDLE, 10):
+        logger.warning("等待空闲状态超时，跳过本轮")
+        return None
+
+    tracer.new_round()
+    run_start = time.monotonic()
+    tracer.mark("feed_start")
+    codec.feed(audio)
+
+    if args.no_kws:
+        # 无唤醒词模型时直接触发，音频继续作为提问内容送入
+        app.schedule_command_nowait(
+            lambda: app._on_wake_word_detected("benchmark", "")
+        )
+
+    played = await wait_for(
+        lambda: tracer.first_after("first_tts_played", run_start) is not None,
+        args.timeout,
+    )
+    if played:
+        # 等本轮回复结束，避免影响下一轮
+        await wait_for(
+            lambda: tracer.first_after("tts_stop", run_start) is not None,
+            args.timeout,
+        )
+        await wait_for(lambda: codec._output_buffer.empty(), args.timeout)
+
+    if app.protocol and app.protocol.is_audio_channel_opened():
+        await app.protocol.close_audio_channel()
+
+    timeline = tracer.timeline(run_start)
+    if not played:
+        logger.warning(f"本轮未在 {args.timeout}s 内播放到TTS: {timeline}")
+        return {"ok": False, "timeline": timeline}
+    return {"ok": True, "timeline": timeline}
+
+
+def build_report(runs: List[dict], args) -> dict:
+    ok_runs = [r for r in runs if r and r["ok"]]
+
+    # 各阶段相对唤醒时刻的耗时
+    from_wake: Dict[str, List[float]] = {stage: [] for stage in STAGES[1:]}
+    # 相邻阶段之间的耗时
+    segments: Dict[str, List[float]] = {}
+    detection: List[float] = []
+
+    for run in ok_runs:
+        timeline = run["timeline"]
+        wake = timeline.get("wake_word_detected")
+        if wake is None:
+            continue
+        if args.wake_end_ms is not None:
+            detection.append(wake - args.wake_end_ms)
+        for stage in STAGES[1:]:
+            if stage in timeline:
+                from_wake[stage].append(timeline[stage] - wake)
+        previous = "wake_word_detected"
+        for stage in STAGES[1:]:
+            if stage not in timeline:
+                continue
+            key = f"{previous} -> {stage}"
+            segments.setdefault(key, []).append(timeline[stage] - timeline[previous])
+            previous = stage
+
+    report = {
+        "config": {
+            "wav": args.wav,
+            "protocol": args.protocol,
+            "runs": args.runs,
+            "kws": not args.no_kws,
+            "wake_end_ms": args.wake_end_ms,
+        },
+        "completed_runs": len(ok_runs),
+        "failed_runs": len(runs) - len(ok_runs),
+        "from_wake_ms": {stage: stats(values) for stage, values in from_wake.items()},
+        "segments_ms": {key: stats(values) for key, values in segments.items()},
+        "runs": runs,
+    }
+    if detection:
+        report["wake_detection_latency_ms"] = stats(detection)
+    return report
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 72)
+    print(
+        f"完成 {report['completed_runs']} 轮，失败 {report['failed_runs']} 轮"
+        f"（相对唤醒词检测时刻，单位ms）"
+    )
+    print(f"{'阶段':<24}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for stage, s in report["from_wake_ms"].items():
+        if not s.get("n"):
+            print(f"{stage:<24}{'-':>10}")
+            continue
+        print(
+            f"{stage:<24}{s['p50']:>10}{s['p90']:>10}{s['p99']:>10}{s['max']:>10}"
+        )
+    if "wake_detection_latency_ms" in report:
+        s = report["wake_detection_latency_ms"]
+        print(f"唤醒词结束 -> 检测到: p50={s['p50']}ms p90={s['p90']}ms")
+    print("=" * 72)
+
+
+async def benchmark(args) -> dict:
+    tracer = get_latency_tracer()
+    tracer.enable()
+
+    audio = load_wav_16k(args.wav)
+    logger.info(f"测试音频: {args.wav}，时长 {len(audio) / 16000:.2f}s")
+
+    app = BenchmarkApplication(speed=1.0)
+    # 监听模式由 aec_enabled 决定：True 为 realtime，False 为 auto
+    app.aec_enabled = args.realtime
+    app_task = asyncio.create_task(app.run(mode="cli", protocol=args.protocol))
+
+    ready = await wait_for(
+        lambda: app.audio_codec is not None and app._shutdown_event is not None, 30
+    )
+    if not ready:
+        raise RuntimeError("应用初始化超时")
+    if not args.no_kws and app.wake_word_detector is None:
+        raise RuntimeError("唤醒词检测器不可用，可使用 --no-kws 直接触发")
+
+    # 预热：让唤醒词模型和连接池完成首次初始化
+    await asyncio.sleep(args.warmup)
+
+    runs = []
+    for index in range(args.runs):
+        result = await run_once(app, audio, args)
+        if result is not None:
+            result["index"] = index
+            runs.append(result)
+            status = "成功" if result["ok"] else "失败"
+            played = result["timeline"].get("first_tts_played")
+            wake = result["timeline"].get("wake_word_detected")
+            if played is not None and wake is not None:
+                print(
+                    f"第 {index + 1}/{args.runs} 轮{status}: "
+                    f"唤醒->首帧播放 {played - wake:.0f}ms"
+                )
+            else:
+                print(f"第 {index + 1}/{args.runs} 轮{status}")
+        await asyncio.sleep(args.gap)
+
+    await app.shutdown()
+    try:
+        await asyncio.wait_for(app_task, 10)
+    except Exception:
+        pass
+
+    return build_report(runs, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端对话延迟基准测试")
+    parser.add_argument("--wav", required=True, help="包含唤醒词和提问的WAV")
+    parser.add_argument("--protocol", choices=["websocket", "mqtt"], default="websocket")
+    parser.add_argument("--runs", type=int, default=10, help="测试轮数")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单轮超时秒")
+    parser.add_argument("--gap", type=float, default=1.0, help="轮次间隔秒")
+    parser.add_argument("--warmup", type=float, default=2.0, help="启动后预热秒")
+    parser.add_argument("--no-kws", action="store_true", help="不依赖唤醒词模型，送音频时直接触发唤醒")
+    parser.add_argument("--realtime", action="store_true", help="使用realtime监听模式（默认auto）")
+    parser.add_argument(
+        "--wake-end-ms", type=float, help="WAV中唤醒词结束的位置，用于计算唤醒检测延迟"
+    )
+    parser.add_argument("--json", help="结果输出JSON路径")
+    args = parser.parse_args()
+
+    setup_logging()
+    report = asyncio.run(benchmark(args))
+    print_report(report)
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""多客户端压测脚本 在单进程（或少量进程）内模拟大量设备，用于评估服务端容量.
+
+每个模拟设备:
+1. 基于 WebsocketProtocol / MqttProtocol 建立会话（不创建音频设备、不加载GUI）
+2. 按虚拟时钟匀速发送预先编码好的 Opus 上行帧
+3. 接收并统计 TTS 下行帧（只计数，不播放）
+4. 记录连接耗时、首个TTS帧延迟、收发包速率和错误
+
+用法:
+    python scripts/load_generator.py --wav utterance.wav --sessions 100
+    python scripts/load_generator.py --frames utterance.opusframes --sessions 400 --processes 4
+    python scripts/load_generator.py --wav utterance.wav --save-frames utterance.opusframes
+    python scripts/load_generator.py --protocol mqtt --mqtt-endpoint 127.0.0.1:1883 --sessions 50
+
+配合 scripts/local_server.py 可完全离线运行。
+"""
+
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from statistics import mean
+from typing import Dict, List, Optional
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.constants.constants import ListeningMode  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# 预编码帧文件：每帧 2 字节大端长度 + Opus 数据
+# ---------------------------------------------------------------------------
+
+
+def save_opus_frames(path: str, frames: List[bytes]):
+    with open(path, "wb") as f:
+        for frame in frames:
+            f.write(struct.pack("!H", len(frame)))
+            f.write(frame)
+
+
+def load_opus_frames(path: str) -> List[bytes]:
+    data = Path(path).read_bytes()
+    frames, pos = [], 0
+    while pos + 2 <= len(data):
+        length = struct.unpack("!H", data[pos : pos + 2])[0]
+        frames.append(data[pos + 2 : pos + 2 + length])
+        pos += 2 + length
+    return frames
+
+
+def encode_wav(path: str, sample_rate: int, frame_ms: int) -> List[bytes]:
+    """
+    读取WAV并编码为上行Opus帧（复用本地替身服务器的编码工具）
+    """
+    from scripts.local_server import encode_opus_frames, load_wav_mono
+
+    return encode_opus_frames(load_wav_mono(path, sample_rate), sample_rate, frame_ms)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 1)
+
+
+# ---------------------------------------------------------------------------
+# 虚拟时钟与模拟设备
+# ---------------------------------------------------------------------------
+
+
+class VirtualClock:
+    """虚拟时钟：音频时间按 speed 倍速映射到真实时间.
+
+    speed=1 为实时发送；speed>1 可在更短时间内压出相同数量的帧。
+    """
+
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+
+    async def sleep_until(self, origin: float, audio_seconds: float):
+        delay = origin + audio_seconds / self.speed - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class SimulatedDevice:
+    """
+    单个模拟设备会话.
+    """
+
+    def __init__(self, index: int, args, frames: List[bytes], clock: VirtualClock):
+        self.index = index
+        self.args = args
+        self.frames = frames
+        self.clock = clock
+        self.protocol = None
+
+        self.device_id = "02:00:00:%02x:%02x:%02x" % (
+            (index >> 16) & 0xFF,
+            (index >> 8) & 0xFF,
+            index & 0xFF,
+        )
+        self.client_id = str(uuid.uuid4())
+
+        # 统计
+        self.connect_ms: Optional[float] = None
+        self.first_tts_ms: List[float] = []
+        self.tts_start_ms: List[float] = []
+        self.sent_packets = 0
+        self.received_packets = 0
+        self.received_bytes = 0
+        self.errors: List[str] = []
+        self.turns_completed = 0
+        self.active_seconds = 0.0
+        self.network_quality: Optional[dict] = None
+
+        self._utterance_end = None
+        self._first_audio_seen = False
+        self._tts_stopped = None
+
+    def _create_protocol(self, loop):
+        if self.args.protocol == "mqtt":
+            from src.protocols.mqtt_protocol import MqttProtocol
+
+            protocol = MqttProtocol(
+                loop,
+                mqtt_info={
+                    "endpoint": self.args.mqtt_endpoint,
+                    "client_id": f"load_{self.index}_{self.client_id[:8]}",
+                    "username": self.args.mqtt_username,
+                    "password": self.args.mqtt_password,
+                    "publish_topic": self.args.mqtt_publish_topic,
+                    "subscribe_topic": f"devices/p2p/load_{self.index}",
+                },
+            )
+
+            async def on_error(message):
+                self._on_error(message)
+
+            protocol.on_network_error(on_error)
+        else:
+            from src.protocols.websocket_protocol import WebsocketProtocol
+
+            protocol = WebsocketProtocol()
+            if self.args.url:
+                protocol.WEBSOCKET_URL = self.args.url
+            protocol.HEADERS["Device-Id"] = self.device_id
+            protocol.HEADERS["Client-Id"] = self.client_id
+            protocol.on_network_error(self._on_error)
+
+        async def on_channel_opened():
+            pass
+
+        async def on_channel_closed():
+            pass
+
+        protocol.on_incoming_json(self._on_json)
+        protocol.on_incoming_audio(self._on_audio)
+        protocol.on_audio_channel_opened(on_channel_opened)
+        protocol.on_audio_channel_closed(on_channel_closed)
+        return protocol
+
+    def _on_error(self, message: str):
+        self.errors.append(str(message))
+
+    def _on_json(self, data):
+        msg_type = data.get("type")
+        if msg_type == "tts":
+            state = data.get("state")
+            if state == "start" and self._utterance_end is not None:
+                self.tts_start_ms.append((time.monotonic() - self._utterance_end) * 1000)
+            elif state == "stop" and self._tts_stopped:
+                self._tts_stopped.set()
+        elif msg_type == "goodbye" and self._tts_stopped:
+            self._tts_stopped.set()
+
+    def _on_audio(self, data: bytes):
+        self.received_packets += 1
+        self.received_bytes += len(data)
+        if not self._first_audio_seen and self._utterance_end is not None:
+            self._first_audio_seen = True
+            self.first_tts_ms.append((time.monotonic() - self._utterance_end) * 1000)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.protocol = self._create_protocol(loop)
+        started = time.monotonic()
+
+        try:
+            if not await self.protocol.open_audio_channel():
+                self._on_error("连接失败")
+                return
+            self.connect_ms = (time.monotonic() - started) * 1000
+
+            for _ in range(self.args.turns):
+                if not await self._run_turn():
+                    break
+                self.turns_completed += 1
+                if self.args.turn_gap:
+                    await asyncio.sleep(self.args.turn_gap)
+        except Exception as e:
+            self._on_error(f"会话异常: {e}")
+        finally:
+            self.active_seconds = time.monotonic() - started
+            self.network_quality = self.protocol.get_network_quality()
+            try:
+                await self.protocol.close_audio_channel()
+            except Exception as e:
+                self._on_error(f"关闭异常: {e}")
+
+    async def _run_turn(self) -> bool:
+        mode = ListeningMode.MANUAL if self.args.manual else ListeningMode.AUTO_STOP
+        self._tts_stopped = asyncio.Event()
+        self._first_audio_seen = False
+        self._utterance_end = None
+
+        await self.protocol.send_start_listening(mode)
+
+        frame_seconds = self.args.frame_duration / 1000
+        origin = time.monotonic()
+        for i, frame in enumerate(self.frames):
+            await self.clock.sleep_until(origin, i * frame_seconds)
+            if not self.protocol.is_audio_channel_opened():
+                self._on_error("上行过程中通道关闭")
+                return False
+            await self.protocol.send_audio(frame)
+            self.sent_packets += 1
+
+        self._utterance_end = time.monotonic()
+        if self.args.manual:
+            await self.protocol.send_stop_listening()
+
+        try:
+            await asyncio.wait_for(self._tts_stopped.wait(), self.args.turn_timeout)
+        except asyncio.TimeoutError:
+            self._on_error("等待TTS结束超时")
+            return False
+        return True
+
+    def result(self) -> dict:
+        duration = max(self.active_seconds, 1e-6)
+        return {
+            "index": self.index,
+            "device_id": self.device_id,
+            "connect_ms": round(self.connect_ms, 1) if self.connect_ms else None,
+            "first_tts_ms": [round(v, 1) for v in self.first_tts_ms],
+            "tts_start_ms": [round(v, 1) for v in self.tts_start_ms],
+            "turns_completed": self.turns_completed,
+            "sent_packets": self.sent_packets,
+            "received_packets": self.received_packets,
+            "received_bytes": self.received_bytes,
+            "uplink_pps": round(self.sent_packets / duration, 2),
+            "downlink_pps": round(self.received_packets / duration, 2),
+            "network_quality": self.network_quality,
+            "errors": self.errors,
+        }
+
+
+# ---------------------------------------------------------------------------
+# 运行与汇总
+# ---------------------------------------------------------------------------
+
+
+async def run_sessions(indices: List[int], args, frames: List[bytes]) -> List[dict]:
+    clock = VirtualClock(args.speed)
+    devices = [SimulatedDevice(i, args, frames, clock) for i in indices]
+
+    async def start(device: SimulatedDevice):
+        # 按序号错峰启动，避免所有连接同时握手
+        if args.ramp and args.sessions > 1:
+            await asyncio.sleep(args.ramp * device.index / args.sessions)
+        await device.run()
+
+    await asyncio.gather(*(start(d) for d in devices), return_exceptions=True)
+    return [d.result() for d in devices]
+
+
+def _worker(indices: List[int], args, frames: List[bytes]) -> List[dict]:
+    return asyncio.run(run_sessions(indices, args, frames))
+
+
+def summarize(results: List[dict], wall_seconds: float) -> dict:
+    connect = [r["connect_ms"] for r in results if r["connect_ms"] is not None]
+    first_tts = [v for r in results for v in r["first_tts_ms"]]
+    tts_start = [v for r in results for v in r["tts_start_ms"]]
+    turns = sum(r["turns_completed"] for r in results)
+    quality = [r["network_quality"] for r in results if r["network_quality"]]
+    jitter = [q["jitter_ms"] for q in quality if q["jitter_ms"] is not None]
+    lost = sum(q["lost"] for q in quality)
+    received = sum(q["received"] for q in quality)
+    sessions_with_errors = sum(1 for r in results if r["errors"])
+    total_errors = sum(len(r["errors"]) for r in results)
+
+    def stats(values):
+        return {
+            "n": len(values),
+            "mean": round(mean(values), 1) if values else None,
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": round(max(values), 1) if values else None,
+        }
+
+    return {
+        "sessions": len(results),
+        "wall_seconds": round(wall_seconds, 2),
+        "connected": len(connect),
+        "connect_ms": stats(connect),
+        "tts_start_ms": stats(tts_start),
+        "first_tts_ms": stats(first_tts),
+        "turns_completed": turns,
+        "uplink_pps_total": round(sum(r["sent_packets"] for r in results) / wall_seconds, 1),
+        "downlink_pps_total": round(
+            sum(r["received_packets"] for r in results) / wall_seconds, 1
+        ),
+        "downlink_jitter_ms": stats(jitter),
+        "downlink_loss_rate": round(lost / (lost + received), 4) if received else None,
+        "session_error_rate": round(sessions_with_errors / max(len(results), 1), 4),
+        "errors_total": total_errors,
+    }
+
+
+def print_summary(summary: dict):
+    print("\n" + "=" * 60)
+    print(
+        f"会话: {summary['sessions']}，已连接: {summary['connected']}，"
+        f"完成轮次: {summary['turns_completed']}，耗时: {summary['wall_seconds']}s"
+    )
+    for key, label in (
+        ("connect_ms", "连接耗时"),
+        ("tts_start_ms", "说完->tts start"),
+        ("first_tts_ms", "说完->首个TTS帧"),
+    ):
+        s = summary[key]
+        print(
+            f"{label:<16} n={s['n']:<5} p50={s['p50']}ms p90={s['p90']}ms "
+            f"p99={s['p99']}ms max={s['max']}ms"
+        )
+    print(
+        f"上行总包速率: {summary['uplink_pps_total']}/s，"
+        f"下行总包速率: {summary['downlink_pps_total']}/s"
+    )
+    s = summary["downlink_jitter_ms"]
+    print(
+        f"下行到达抖动: p50={s['p50']}ms p90={s['p90']}ms，"
+        f"下行丢包率: {summary['downlink_loss_rate']}"
+    )
+    print(
+        f"会话错误率: {summary['session_error_rate'] * 100:.1f}%，"
+        f"错误总数: {summary['errors_total']}"
+    )
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="小智多客户端压测")
+    parser.add_argument("--protocol", choices=["websocket", "mqtt"], default="websocket")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/xiaozhi/v1/", help="WebSocket地址")
+    parser.add_argument("--mqtt-endpoint", default="127.0.0.1:1883")
+    parser.add_argument("--mqtt-username", default="load")
+    parser.add_argument("--mqtt-password", default="load")
+    parser.add_argument("--mqtt-publish-topic", default="device-server")
+
+    parser.add_argument("--wav", help="上行语音WAV（启动时编码为Opus）")
+    parser.add_argument("--frames", help="预编码Opus帧文件")
+    parser.add_argument("--save-frames", help="将--wav编码结果保存为帧文件后退出")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="上行采样率")
+    parser.add_argument("--frame-duration", type=int, default=60, help="上行帧时长ms")
+
+    parser.add_argument("--sessions", type=int, default=10, help="模拟设备数")
+    parser.add_argument("--processes", type=int, default=1, help="进程数（会话均分）")
+    parser.add_argument("--turns", type=int, default=1, help="每个会话的对话轮数")
+    parser.add_argument("--turn-gap", type=float, default=0.5, help="轮次间隔秒")
+    parser.add_argument("--turn-timeout", type=float, default=30.0, help="等待TTS结束超时秒")
+    parser.add_argument("--ramp", type=float, default=5.0, help="所有会话在该秒数内错峰启动")
+    parser.add_argument("--speed", type=float, default=1.0, help="虚拟时钟倍速")
+    parser.add_argument("--manual", action="store_true", help="使用manual模式（发送listen stop）")
+    parser.add_argument("--json", help="结果输出JSON路径（含每个会话明细）")
+    args = parser.parse_args()
+
+    if args.frames:
+        frames = load_opus_frames(args.frames)
+    elif args.wav:
+        frames = encode_wav(args.wav, args.sample_rate, args.frame_duration)
+    else:
+        parser.error("需要提供 --wav 或 --frames")
+
+    if args.save_frames:
+        save_opus_frames(args.save_frames, frames)
+        print(f"已保存 {len(frames)} 帧到 {args.save_frames}")
+        return
+
+    print(
+        f"启动 {args.sessions} 个模拟设备（{args.protocol}，{args.processes} 进程），"
+        f"每轮上行 {len(frames)} 帧 ≈ {len(frames) * args.frame_duration / 1000:.1f}s"
+    )
+
+    indices = list(range(args.sessions))
+    started = time.monotonic()
+    if args.processes > 1:
+        chunks = [indices[i :: args.processes] for i in range(args.processes)]
+        results = []
+        with ProcessPoolExecutor(max_workers=args.processes) as pool:
+            futures = [pool.submit(_worker, chunk, args, frames) for chunk in chunks]
+            for future in futures:
+                results.extend(future.result())
+    else:
+        results = asyncio.run(run_sessions(indices, args, frames))
+    wall = time.monotonic() - started
+
+    results.sort(key=lambda r: r["index"])
+    summary = summarize(results, wall)
+    print_summary(summary)
+
+    if args.json:
+        report: Dict[str, object] = {"summary": summary, "sessions": results}
+        Path(args.json).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""本地小智替身服务器 用于在没有官方服务器的情况下进行协议联调和性能测试.
+
+支持两种传输方式，与客户端的 WebsocketProtocol / MqttProtocol 对齐:
+1. WebSocket: hello/listen/abort/mcp/goodbye JSON + Opus 二进制帧（支持协商v2帧头）
+2. MQTT + UDP: 内置精简版 MQTT 3.1.1 代理承载 JSON，音频走 AES-CTR 加密的 UDP
+
+功能:
+- 收到 listen 后按脚本回复 stt/llm/tts，TTS 音频来自 WAV 文件（预先编码为 Opus）
+- 下行注入可配置的延迟、抖动和丢包
+- hello 之后发起 MCP initialize、tools/list（自动翻页），可选定期 tools/call
+- 记录收发的每一条消息的时间（JSONL），退出时输出统计摘要
+- 可定期踢断所有连接并在一段时间内拒绝重连，模拟短暂断网；hello 携带
+  断线前的 session_id 时沿用原会话（--no-resume 可拒绝）
+
+用法:
+    python scripts/local_server.py
+    python scripts/local_server.py --tts-wav reply.wav --latency-ms 80 --jitter-ms 20 --loss 0.02
+    python scripts/local_server.py --mcp-call self.get_device_status --record timings.jsonl
+    python scripts/local_server.py --kick-every 15 --outage-ms 2000
+
+客户端配置（config/config.json）:
+    SYSTEM_OPTIONS.NETWORK.WEBSOCKET_URL = "ws://127.0.0.1:8000/xiaozhi/v1/"
+    SYSTEM_OPTIONS.NETWORK.MQTT_INFO.endpoint = "127.0.0.1:1883"（非8883端口即不启用TLS）
+"""
+
+import argparse
+import asyncio
+import http
+import json
+import os
+import random
+import struct
+import sys
+import time
+import uuid
+import wave
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.protocols.binary_protocol import (  # noqa: E402
+    BINARY_PROTOCOL_V1,
+    BINARY_PROTOCOL_V2,
+    pack_v2,
+    unpack_v2,
+)
+
+DEFAULT_REPLY_TEXT = "你好，我是本地测试服务器。"
+DEFAULT_STT_TEXT = "本地测试语音"
+
+
+# ---------------------------------------------------------------------------
+# 音频准备
+# ---------------------------------------------------------------------------
+
+
+def load_wav_mono(path: str, target_rate: int) -> np.ndarray:
+    """
+    读取WAV为int16单声道并重采样到目标采样率.
+    """
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: 仅支持16位PCM WAV")
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1).astype(np.int16)
+
+    if rate != target_rate:
+        import soxr
+
+        audio = soxr.resample(audio, rate, target_rate, quality="HQ").astype(np.int16)
+    return audio
+
+
+def synth_tone(sample_rate: int, seconds: float = 2.0) -> np.ndarray:
+    """
+    未提供WAV时生成带包络的测试音.
+    """
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    envelope = np.minimum(1.0, np.minimum(t, t[-1] - t) * 10)
+    tone = 0.3 * np.sin(2 * np.pi * 440 * t) * envelope
+    return (tone * 32767).astype(np.int16)
+
+
+def encode_opus_frames(
+    audio: np.ndarray, sample_rate: int, frame_ms: int
+) -> List[bytes]:
+    """
+    将PCM预先编码为Opus帧列表（末帧补零）
+    """
+    import opuslib
+
+    frame_size = sample_rate * frame_ms // 1000
+    encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_AUDIO)
+    pad = (-len(audio)) % frame_size
+    if pad:
+        audio = np.concatenate([audio, np.zeros(pad, dtype=np.int16)])
+
+    frames = []
+    for start in range(0, len(audio), frame_size):
+        frames.append(encoder.encode(audio[start : start + frame_size].tobytes(), frame_size))
+    return frames
+
+
+# ---------------------------------------------------------------------------
+# 计时记录与网络损伤
+# ---------------------------------------------------------------------------
+
+
+class MessageRecorder:
+    """记录每条收发消息的时间，并聚合统计.
+
+    记录格式（JSONL）: {"t", "session", "transport", "dir", "kind", "type", "bytes"}
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.start = time.monotonic()
+        self._file = open(path, "w", encoding="utf-8") if path else None
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.dropped = 0
+
+    def now(self) -> float:
+        return time.monotonic() - self.start
+
+    def record(
+        self,
+        session: str,
+        transport: str,
+        direction: str,
+        kind: str,
+        msg_type: str,
+        size: int,
+        **extra,
+    ):
+        key = f"{direction}:{kind}:{msg_type}"
+        self.counts[key] += 1
+        self.bytes[key] += size
+        if self._file:
+            entry = {
+                "t": round(self.now(), 6),
+                "session": session,
+                "transport": transport,
+                "dir": direction,
+                "kind": kind,
+                "type": msg_type,
+                "bytes": size,
+            }
+            entry.update(extra)
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def add_latency(self, name: str, seconds: float):
+        self.latencies[name].append(seconds * 1000)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def print_summary(self):
+        elapsed = max(self.now(), 1e-6)
+        print("\n" + "=" * 60)
+        print(f"运行时长: {elapsed:.1f}s")
+        print(f"{'方向:类别:类型':<36}{'数量':>8}{'字节':>12}{'速率/s':>10}")
+        for key in sorted(self.counts):
+            print(
+                f"{key:<36}{self.counts[key]:>8}{self.bytes[key]:>12}"
+                f"{self.counts[key] / elapsed:>10.1f}"
+            )
+        if self.dropped:
+            print(f"注入丢包: {self.dropped}")
+        for name, values in sorted(self.latencies.items()):
+            arr = np.array(values)
+            print(
+                f"{name}: n={len(arr)} p50={np.percentile(arr, 50):.1f}ms "
+                f"p95={np.percentile(arr, 95):.1f}ms max={arr.max():.1f}ms"
+            )
+        print("=" * 60)
+
+
+class NetworkImpairment:
+    """下行网络损伤：固定延迟 + 均匀抖动 + 音频随机丢包.
+
+    JSON 视为可靠有序传输（TCP），只加延迟；音频帧可以丢失，
+    UDP 音频允许因抖动乱序，WebSocket 音频保持顺序。
+    """
+
+    def __init__(self, latency_ms: float, jitter_ms: float, loss: float, seed: int):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.rng = random.Random(seed)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.latency or self.jitter or self.loss)
+
+    def should_drop(self) -> bool:
+        return self.loss > 0 and self.rng.random() < self.loss
+
+    def delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+
+# ---------------------------------------------------------------------------
+# 会话逻辑（与传输无关）
+# ---------------------------------------------------------------------------
+
+
+class Session:
+    """
+    单个客户端会话：处理 listen/abort/mcp/goodbye 并按脚本回复.
+    """
+
+    transport = "base"
+    audio_transport = "base"
+    audio_ordered = True
+
+    def __init__(self, server: "LocalServer"):
+        self.server = server
+        self.args = server.args
+        self.recorder = server.recorder
+        self.impairment = server.impairment
+        self.session_id = uuid.uuid4().hex[:16]
+
+        self.listening = False
+        self.listen_mode = None
+        self.listen_started_at = None
+        self.received_audio_ms = 0
+        self.turns = 0
+        self.mcp_enabled = False
+        self.client_features: dict = {}
+
+        self._tts_task: Optional[asyncio.Task] = None
+        self._mcp_next_id = 1
+        self._mcp_pending: Dict[int, tuple] = {}
+        self._last_out = 0.0  # 有序通道的最近一次投递时间
+        self.resumed = False
+        # 下行帧时长：未指定时跟随客户端hello
+        self.tts_frame_duration = self.args.tts_frame_duration or 60
+        server.active_sessions.add(self)
+
+    # ----- 发送（带损伤） -----
+
+    async def send_json(self, message: dict):
+        text = json.dumps(message, ensure_ascii=False)
+        self.recorder.record(
+            self.session_id,
+            self.transport,
+            "out",
+            "json",
+            message.get("type", ""),
+            len(text),
+        )
+        await self._deliver(self._write_text, text, ordered=True)
+
+    async def send_audio(self, frame: bytes):
+        # 先编号再决定是否丢弃，丢包才会在客户端表现为序号缺口
+        packet = self._packetize(frame)
+        if self.impairment.should_drop():
+            self.recorder.dropped += 1
+            return
+        self.recorder.record(
+            self.session_id, self.audio_transport, "out", "audio", "opus", len(frame)
+        )
+        await self._deliver(self._write_audio, packet, ordered=self.audio_ordered)
+
+    async def _deliver(self, writer, payload, ordered: bool):
+        if not self.impairment.enabled:
+            await writer(payload)
+            return
+
+        due = time.monotonic() + self.impairment.delay()
+        if ordered:
+            # 可靠通道不会乱序：投递时间不早于上一条
+            due = max(due, self._last_out)
+            self._last_out = due
+
+        async def _later():
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            try:
+                await writer(payload)
+            except Exception:
+                pass
+
+        asyncio.create_task(_later())
+
+    async def _write_text(self, text: str):
+        raise NotImplementedError
+
+    def _packetize(self, frame: bytes) -> bytes:
+        return frame
+
+    async def _write_audio(self, packet: bytes):
+        raise NotImplementedError
+
+    # ----- 接收 -----
+
+    async def handle_json(self, data: dict, size: int):
+        msg_type = data.get("type", "")
+        self.recorder.record(
+            self.session_id,
+            self.transport,
+            "in",
+            "json",
+            msg_type,
+            size,
+            state=data.get("state"),
+        )
+
+        if msg_type == "hello":
+            await self.handle_hello(data)
+        elif msg_type == "listen":
+            await self._handle_listen(data)
+        elif msg_type == "abort":
+            await self._cancel_tts(send_stop=True)
+        elif msg_type == "mcp":
+            self._handle_mcp_response(data.get("payload") or {})
+        elif msg_type == "goodbye":
+            await self.close()
+
+    def handle_audio(self, frame: bytes, transport: Optional[str] = None, **extra):
+        self.recorder.record(
+            self.session_id,
+            transport or self.transport,
+            "in",
+            "audio",
+            "opus",
+            len(frame),
+            **extra,
+        )
+        if not self.listening:
+            return
+
+        self.received_audio_ms += self.args.frame_duration
+        # auto/realtime 模式下由服务端判停：收满指定时长后开始回复
+        if (
+            self.listen_mode != "manual"
+            and self.received_audio_ms >= self.args.auto_stop_ms
+        ):
+            self._start_turn()
+
+    async def handle_hello(self, data: dict):
+        self.client_features = data.get("features") or {}
+        self.mcp_enabled = bool(self.client_features.get("mcp"))
+        if not self.args.tts_frame_duration:
+            client_params = data.get("audio_params") or {}
+            self.tts_frame_duration = int(client_params.get("frame_duration") or 60)
+
+        requested = data.get("session_id")
+        if requested:
+            if not self.args.no_resume and self.server.can_resume(requested):
+                self.session_id = requested
+                self.resumed = True
+                self.recorder.counts["session:resumed"] += 1
+                print(f"[{self.session_id}] 会话已恢复")
+            else:
+                self.recorder.counts["session:resume_refused"] += 1
+
+        await self.send_hello()
+        # 恢复的会话客户端已完成过MCP初始化
+        if self.mcp_enabled and not self.args.no_mcp and not self.resumed:
+            asyncio.create_task(self._mcp_bootstrap())
+
+    async def send_hello(self):
+        raise NotImplementedError
+
+    async def _handle_listen(self, data: dict):
+        state = data.get("state")
+        if state == "start":
+            await self._cancel_tts(send_stop=False)
+            self.listening = True
+            self.listen_mode = data.get("mode")
+            self.listen_started_at = time.monotonic()
+            self.received_audio_ms = 0
+        elif state == "stop":
+            if self.listening:
+                self._start_turn()
+        elif state == "detect":
+            # 唤醒词上报：直接进入回复，与官方服务的打招呼行为一致
+            if self.args.greet_on_wake:
+                self._start_turn(stt_text=data.get("text") or DEFAULT_STT_TEXT)
+
+    # ----- TTS 回复 -----
+
+    def _start_turn(self, stt_text: Optional[str] = None):
+        self.listening = False
+        if self._tts_task and not self._tts_task.done():
+            return
+        self._tts_task = asyncio.create_task(
+            self._run_turn(stt_text or self.args.stt_text, time.monotonic())
+        )
+
+    async def _run_turn(self, stt_text: str, turn_start: float):
+        self.turns += 1
+        try:
+            if self.args.think_ms:
+                await asyncio.sleep(self.args.think_ms / 1000)
+
+            await self.send_json(
+                {"session_id": self.session_id, "type": "stt", "text": stt_text}
+            )
+            await self.send_json(
+                {
+                    "session_id": self.session_id,
+                    "type": "llm",
+                    "text": "😊",
+                    "emotion": "happy",
+                }
+            )
+            await self.send_json(
+                {"session_id": self.session_id, "type": "tts", "state": "start"}
+            )
+            await self.send_json(
+                {
+                    "session_id": self.session_id,
+                    "type": "tts",
+                    "state": "sentence_start",
+                    "text": self.args.reply_text,
+                }
+            )
+
+            # 按帧时长匀速推送，开头允许突发若干帧（与官方服务的预缓冲行为相近）
+            interval = self.tts_frame_duration / 1000
+            next_time = time.monotonic()
+            for index, frame in enumerate(self.server.tts_frames(self.tts_frame_duration)):
+                if index == 0:
+                    self.recorder.add_latency(
+                        "turn_to_first_tts", time.monotonic() - turn_start
+                    )
+                await self.send_audio(frame)
+                if index >= self.args.tts_burst:
+                    next_time += interval
+                    delay = next_time - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                else:
+                    next_time = time.monotonic()
+
+            await self.send_json(
+                {"session_id": self.session_id, "type": "tts", "state": "stop"}
+            )
+
+            if self.args.mcp_call and self.args.mcp_call_every_turn:
+                await self._mcp_call(self.args.mcp_call, self.args.mcp_args)
+
+            if self.args.goodbye_after_turns and self.turns >= self.args.goodbye_after_turns:
+                await self.send_json({"session_id": self.session_id, "type": "goodbye"})
+        except asyncio.CancelledError:
+            pass
+
+    async def _cancel_tts(self, send_stop: bool):
+        if self._tts_task and not self._tts_task.done():
+            self._tts_task.cancel()
+            try:
+                await self._tts_task
+            except asyncio.CancelledError:
+                pass
+            if send_stop:
+                await self.send_json(
+                    {"session_id": self.session_id, "type": "tts", "state": "stop"}
+                )
+        self._tts_task = None
+
+    # ----- MCP -----
+
+    async def _mcp_request(self, method: str, params: dict) -> int:
+        request_id = self._mcp_next_id
+        self._mcp_next_id += 1
+        self._mcp_pending[request_id] = (method, time.monotonic(), params)
+        await self.send_json(
+            {
+                "session_id": self.session_id,
+                "type": "mcp",
+                "payload": {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": method,
+                    "params": params,
+                },
+            }
+        )
+        return request_id
+
+    async def _mcp_bootstrap(self):
+        await self._mcp_request(
+            "initialize",
+            {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "local-server", "version": "1.0"},
+            },
+        )
+        await self._mcp_request("tools/list", {"cursor": ""})
+        if self.args.mcp_call and not self.args.mcp_call_every_turn:
+            await self._mcp_call(self.args.mcp_call, self.args.mcp_args)
+
+    async def _mcp_call(self, name: str, arguments: dict):
+        await self._mcp_request("tools/call", {"name": name, "arguments": arguments})
+
+    def _handle_mcp_response(self, payload: dict):
+        request_id = payload.get("id")
+        pending = self._mcp_pending.pop(request_id, None)
+        if not pending:
+            return
+
+        method, sent_at, _ = pending
+        self.recorder.add_latency(f"mcp {method}", time.monotonic() - sent_at)
+        if "error" in payload:
+            self.recorder.counts[f"mcp_error:{method}"] += 1
+            return
+
+        result = payload.get("result") or {}
+        if method == "tools/list":
+            tools = result.get("tools", [])
+            self.server.tool_count[self.session_id] += len(tools)
+            next_cursor = result.get("nextCursor")
+            if next_cursor:
+                asyncio.create_task(
+                    self._mcp_request("tools/list", {"cursor": next_cursor})
+                )
+            else:
+                print(
+                    f"[{self.session_id}] MCP工具列表: "
+                    f"{self.server.tool_count[self.session_id]} 个"
+                )
+
+    def abort_connection(self):
+        """
+        不经关闭握手直接断开底层连接（模拟断网）
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        await self._cancel_tts(send_stop=False)
+        self.listening = False
+        if self in self.server.active_sessions:
+            self.server.active_sessions.discard(self)
+            self.server.closed_sessions[self.session_id] = time.monotonic()
+
+
+# ---------------------------------------------------------------------------
+# WebSocket 传输
+# ---------------------------------------------------------------------------
+
+
+class WebsocketSession(Session):
+    transport = "ws"
+    audio_transport = "ws"
+
+    def __init__(self, server, websocket):
+        super().__init__(server)
+        self.websocket = websocket
+        # 二进制协议版本（客户端在hello中请求v2且未禁用时升级）
+        self.binary_protocol = BINARY_PROTOCOL_V1
+        self.out_sequence = 0
+        self.media_timestamp = 0
+        self.remote_sequence = None
+
+    async def _write_text(self, text: str):
+        await self.websocket.send(text)
+
+    def _packetize(self, frame: bytes) -> bytes:
+        if self.binary_protocol != BINARY_PROTOCOL_V2:
+            return frame
+        packet = pack_v2(frame, self.out_sequence, self.media_timestamp)
+        self.out_sequence += 1
+        self.media_timestamp += self.tts_frame_duration
+        return packet
+
+    async def _write_audio(self, packet: bytes):
+        await self.websocket.send(packet)
+
+    async def send_hello(self):
+        hello = {
+            "type": "hello",
+            "transport": "websocket",
+            "session_id": self.session_id,
+            "audio_params": self.server.audio_params(self.tts_frame_duration),
+        }
+        if (
+            self.client_features.get("binary_protocol") == BINARY_PROTOCOL_V2
+            and not self.args.binary_v1
+        ):
+            self.binary_protocol = BINARY_PROTOCOL_V2
+            hello["features"] = {"binary_protocol": BINARY_PROTOCOL_V2}
+        await self.send_json(hello)
+
+    def abort_connection(self):
+        self.websocket.transport.abort()
+
+    def handle_binary(self, message: bytes):
+        if self.binary_protocol != BINARY_PROTOCOL_V2:
+            self.handle_audio(message)
+            return
+        try:
+            _, sequence, timestamp, payload = unpack_v2(message)
+        except ValueError:
+            self.recorder.counts["in:audio:invalid"] += 1
+            return
+        # 统计上行序号缺口与乱序
+        if self.remote_sequence is not None:
+            if sequence <= self.remote_sequence:
+                self.recorder.counts["in:ws:reordered"] += 1
+            elif sequence > self.remote_sequence + 1:
+                self.recorder.counts["in:ws:seq_gap"] += (
+                    sequence - self.remote_sequence - 1
+                )
+        self.remote_sequence = max(self.remote_sequence or 0, sequence)
+        self.handle_audio(payload, seq=sequence, capture_ts=timestamp)
+
+
+# ---------------------------------------------------------------------------
+# MQTT + UDP 传输
+# ---------------------------------------------------------------------------
+
+
+def _encode_remaining_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        out.append(byte)
+        if not length:
+            return bytes(out)
+
+
+def _mqtt_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return struct.pack("!H", len(data)) + data
+
+
+class MqttConnection(asyncio.Protocol):
+    """精简版 MQTT 3.1.1 代理连接：只实现客户端用到的报文.
+
+    CONNECT/CONNACK, SUBSCRIBE/SUBACK, PUBLISH(QoS0/1)/PUBACK, PINGREQ/PINGRESP, DISCONNECT
+    """
+
+    def __init__(self, server: "LocalServer"):
+        self.server = server
+        self.transport = None
+        self.buffer = bytearray()
+        self.client_id = ""
+        self.topics: List[str] = []
+        self.session: Optional["MqttSession"] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        if self.session:
+            self.server.drop_udp_session(self.session)
+            asyncio.ensure_future(self.session.close())
+
+    def data_received(self, data: bytes):
+        self.buffer.extend(data)
+        while True:
+            packet = self._next_packet()
+            if packet is None:
+                return
+            header, body = packet
+            try:
+                self._handle_packet(header, body)
+            except Exception as e:
+                print(f"MQTT报文处理出错: {e}")
+                self.transport.close()
+                return
+
+    def _next_packet(self):
+        if len(self.buffer) < 2:
+            return None
+        multiplier, length, pos = 1, 0, 1
+        while True:
+            if pos >= len(self.buffer):
+                return None
+            byte = self.buffer[pos]
+            length += (byte & 0x7F) * multiplier
+            multiplier *= 128
+            pos += 1
+            if not byte & 0x80:
+                break
+        if len(self.buffer) < pos + length:
+            return None
+        header = self.buffer[0]
+        body = bytes(self.buffer[pos : pos + length])
+        del self.buffer[: pos + length]
+        return header, body
+
+    def _handle_packet(self, header: int, body: bytes):
+        packet_type = header >> 4
+        if packet_type == 1:  # CONNECT
+            self._handle_connect(body)
+            if self.server.in_outage():
+                # 模拟断网期间：返回“服务不可用”并断开
+                self.server.recorder.counts["refused_during_outage"] += 1
+                self.transport.write(b"\x20\x02\x00\x03")
+                self.transport.close()
+                return
+            self.transport.write(b"\x20\x02\x00\x00")
+        elif packet_type == 3:  # PUBLISH
+            qos = (header >> 1) & 0x03
+            topic_len = struct.unpack("!H", body[:2])[0]
+            pos = 2 + topic_len
+            if qos:
+                packet_id = body[pos : pos + 2]
+                pos += 2
+                self.transport.write(b"\x40\x02" + packet_id)
+            self._handle_publish(body[pos:])
+        elif packet_type == 8:  # SUBSCRIBE
+            packet_id = body[:2]
+            pos, granted = 2, bytearray()
+            while pos < len(body):
+                topic_len = struct.unpack("!H", body[pos : pos + 2])[0]
+                self.topics.append(body[pos + 2 : pos + 2 + topic_len].decode())
+                granted.append(min(body[pos + 2 + topic_len], 1))
+                pos += 3 + topic_len
+            payload = packet_id + bytes(granted)
+            self.transport.write(
+                b"\x90" + _encode_remaining_length(len(payload)) + payload
+            )
+        elif packet_type == 12:  # PINGREQ
+            self.transport.write(b"\xd0\x00")
+        elif packet_type == 14:  # DISCONNECT
+            self.transport.close()
+
+    def _handle_connect(self, body: bytes):
+        name_len = struct.unpack("!H", body[:2])[0]
+        pos = 2 + name_len + 1  # 协议名 + 协议级别
+        flags = body[pos]
+        pos += 3  # 标志 + keepalive
+        client_len = struct.unpack("!H", body[pos : pos + 2])[0]
+        self.client_id = body[pos + 2 : pos + 2 + client_len].decode(errors="replace")
+        if flags & 0x04:  # Will
+            print(f"MQTT客户端 {self.client_id} 设置了遗嘱消息，已忽略")
+
+    def _handle_publish(self, payload: bytes):
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError:
+            print(f"无效的MQTT JSON消息: {payload[:80]!r}")
+            return
+
+        if data.get("type") == "hello" and not self.session:
+            self.session = MqttSession(self.server, self)
+            self.server.register_udp_session(self.session)
+        if self.session:
+            asyncio.ensure_future(self.session.handle_json(data, len(payload)))
+
+    def publish(self, text: str):
+        topic = self.topics[0] if self.topics else f"devices/p2p/{self.client_id}"
+        body = _mqtt_string(topic) + text.encode("utf-8")
+        self.transport.write(b"\x30" + _encode_remaining_length(len(body)) + body)
+
+
+class MqttSession(Session):
+    transport = "mqtt"
+    audio_transport = "udp"
+    audio_ordered = False
+
+    def __init__(self, server, connection: MqttConnection):
+        super().__init__(server)
+        self.connection = connection
+        self.aes_key = os.urandom(16)
+        # 与客户端相同的 nonce 布局：前缀(2B) + 长度(2B) + 会话标识(8B) + 序列号(4B)
+        self.nonce_prefix = b"\x01\x00"
+        self.nonce_tag = os.urandom(8)
+        self.udp_addr = None
+        self.local_sequence = 0
+        self.remote_sequence = 0
+
+    @property
+    def aes_nonce_hex(self) -> str:
+        return (self.nonce_prefix + b"\x00\x00" + self.nonce_tag + b"\x00" * 4).hex()
+
+    async def _write_text(self, text: str):
+        self.connection.publish(text)
+
+    def _packetize(self, frame: bytes) -> bytes:
+        self.local_sequence = (self.local_sequence + 1) & 0xFFFFFFFF
+        nonce = (
+            self.nonce_prefix
+            + struct.pack("!H", len(frame))
+            + self.nonce_tag
+            + struct.pack("!I", self.local_sequence)
+        )
+        return nonce + self.server.aes_ctr(self.aes_key, nonce, frame)
+
+    async def _write_audio(self, packet: bytes):
+        if not self.udp_addr:
+            # 客户端尚未发送过UDP包，无法得知其地址
+            self.recorder.counts["out:audio:no_udp_peer"] += 1
+            return
+        self.server.udp_transport.sendto(packet, self.udp_addr)
+
+    async def send_hello(self):
+        host = self.args.udp_advertise or self.args.host
+        await self.send_json(
+            {
+                "type": "hello",
+                "version": 3,
+                "transport": "udp",
+                "session_id": self.session_id,
+                "audio_params": self.server.audio_params(self.tts_frame_duration),
+                "udp": {
+                    "server": host,
+                    "port": self.args.udp_port,
+                    "key": self.aes_key.hex(),
+                    "nonce": self.aes_nonce_hex,
+                },
+            }
+        )
+
+    def handle_datagram(self, packet: bytes, addr):
+        self.udp_addr = addr
+        nonce, ciphertext = packet[:16], packet[16:]
+        sequence = struct.unpack("!I", nonce[12:16])[0]
+        # 统计序号缺口与乱序
+        if self.remote_sequence and sequence <= self.remote_sequence:
+            self.recorder.counts["in:udp:reordered"] += 1
+        elif self.remote_sequence and sequence > self.remote_sequence + 1:
+            self.recorder.counts["in:udp:seq_gap"] += sequence - self.remote_sequence - 1
+        self.remote_sequence = max(self.remote_sequence, sequence)
+
+        frame = self.server.aes_ctr(self.aes_key, nonce, ciphertext)
+        self.handle_audio(frame, transport="udp", seq=sequence)
+
+    def abort_connection(self):
+        self.connection.transport.abort()
+
+    async def close(self):
+        await super().close()
+        self.server.drop_udp_session(self)
+
+
+class UdpEndpoint(asyncio.DatagramProtocol):
+    """
+    UDP 音频端点：按 nonce 中的会话标识分发到对应会话.
+    """
+
+    def __init__(self, server: "LocalServer"):
+        self.server = server
+
+    def datagram_received(self, data: bytes, addr):
+        if len(data) < 16:
+            self.server.recorder.counts["in:audio:invalid"] += 1
+            return
+        session = self.server.udp_sessions.get(data[4:12])
+        if not session:
+            self.server.recorder.counts["in:audio:unknown_session"] += 1
+            return
+        session.handle_datagram(data, addr)
+
+
+# ---------------------------------------------------------------------------
+# 服务器
+# ---------------------------------------------------------------------------
+
+
+class LocalServer:
+    def __init__(self, args):
+        self.args = args
+        self.recorder = MessageRecorder(args.record)
+        self.impairment = NetworkImpairment(
+            args.latency_ms, args.jitter_ms, args.loss, args.seed
+        )
+        self._tts_audio = self._load_tts_audio()
+        self._tts_cache: Dict[int, List[bytes]] = {}
+        self.tts_frames(self.args.tts_frame_duration or 60)
+        self.udp_sessions: Dict[bytes, MqttSession] = {}
+        self.udp_transport = None
+        self.tool_count: Dict[str, int] = defaultdict(int)
+        self._cipher_backend = None
+        # 断网模拟与会话恢复
+        self.active_sessions: set = set()
+        self.closed_sessions: Dict[str, float] = {}
+        self.outage_until = 0.0
+
+    def _load_tts_audio(self) -> np.ndarray:
+        rate = self.args.tts_sample_rate
+        if self.args.tts_wav:
+            return load_wav_mono(self.args.tts_wav, rate)
+        return synth_tone(rate)
+
+    def tts_frames(self, frame_duration: int) -> List[bytes]:
+        """
+        按帧时长编码的TTS帧（首次使用时编码并缓存）
+        """
+        frames = self._tts_cache.get(frame_duration)
+        if frames is None:
+            rate = self.args.tts_sample_rate
+            frames = encode_opus_frames(self._tts_audio, rate, frame_duration)
+            self._tts_cache[frame_duration] = frames
+            print(
+                f"TTS音频已预编码: {len(frames)} 帧 x {frame_duration}ms, "
+                f"{len(frames) * frame_duration / 1000:.1f}s @ {rate}Hz"
+            )
+        return frames
+
+    def audio_params(self, frame_duration: int) -> dict:
+        return {
+            "format": "opus",
+            "sample_rate": self.args.tts_sample_rate,
+            "channels": 1,
+            "frame_duration": frame_duration,
+        }
+
+    @staticmethod
+    def aes_ctr(key: bytes, nonce: bytes, data: bytes) -> bytes:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        cipher = Cipher(algorithms.AES(key), modes.CTR(nonce))
+        ctx = cipher.encryptor()
+        return ctx.update(data) + ctx.finalize()
+
+    def in_outage(self) -> bool:
+        return time.monotonic() < self.outage_until
+
+    def can_resume(self, session_id: str) -> bool:
+        closed_at = self.closed_sessions.pop(session_id, None)
+        return (
+            closed_at is not None
+            and time.monotonic() - closed_at <= self.args.resume_window
+        )
+
+    async def _kick_loop(self):
+        """
+        定期断开所有连接，并在 outage 期间拒绝新连接.
+        """
+        while True:
+            await asyncio.sleep(self.args.kick_every)
+            sessions = list(self.active_sessions)
+            if not sessions:
+                continue
+            self.outage_until = time.monotonic() + self.args.outage_ms / 1000
+            self.recorder.counts["kick"] += 1
+            print(
+                f"模拟断网: 断开 {len(sessions)} 个连接，"
+                f"{self.args.outage_ms:.0f}ms 内拒绝重连"
+            )
+            for session in sessions:
+                try:
+                    session.abort_connection()
+                except Exception as e:
+                    print(f"[{session.session_id}] 断开连接失败: {e}")
+
+    def _process_request(self, *args):
+        """
+        WebSocket握手前检查：模拟断网期间返回503.
+        """
+        if not self.in_outage():
+            return None
+        self.recorder.counts["refused_during_outage"] += 1
+        if len(args) == 2 and isinstance(args[0], str):
+            # websockets 旧版接口 (path, request_headers)
+            return http.HTTPStatus.SERVICE_UNAVAILABLE, [], b"outage\n"
+        connection = args[0]
+        return connection.respond(http.HTTPStatus.SERVICE_UNAVAILABLE, "outage\n")
+
+    def register_udp_session(self, session: MqttSession):
+        self.udp_sessions[session.nonce_tag] = session
+
+    def drop_udp_session(self, session: MqttSession):
+        self.udp_sessions.pop(session.nonce_tag, None)
+
+    async def _ws_handler(self, websocket, path=None):
+        session = WebsocketSession(self, websocket)
+        headers = getattr(websocket, "request_headers", None)
+        if headers is None:
+            headers = websocket.request.headers
+        print(
+            f"[{session.session_id}] WebSocket连接: Device-Id={headers.get('Device-Id')} "
+            f"Protocol-Version={headers.get('Protocol-Version')}"
+        )
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    session.handle_binary(message)
+                else:
+                    try:
+                        data = json.loads(message)
+                    except json.JSONDecodeError:
+                        print(f"无效的JSON消息: {message[:80]}")
+                        continue
+                    await session.handle_json(data, len(message))
+        except Exception as e:
+            print(f"[{session.session_id}] 连接结束: {e}")
+        finally:
+            await session.close()
+            print(f"[{session.session_id}] WebSocket断开，完成 {session.turns} 轮对话")
+
+    async def serve(self):
+        import websockets
+
+        loop = asyncio.get_running_loop()
+        servers = []
+
+        if not self.args.no_websocket:
+            ws_server = await websockets.serve(
+                self._ws_handler,
+                self.args.host,
+                self.args.ws_port,
+                max_size=10 * 1024 * 1024,
+                compression=None,
+                process_request=self._process_request,
+            )
+            servers.append(ws_server)
+            print(f"WebSocket: ws://{self.args.host}:{self.args.ws_port}/xiaozhi/v1/")
+
+        if not self.args.no_mqtt:
+            mqtt_server = await loop.create_server(
+                lambda: MqttConnection(self), self.args.host, self.args.mqtt_port
+            )
+            servers.append(mqtt_server)
+            self.udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: UdpEndpoint(self), local_addr=(self.args.host, self.args.udp_port)
+            )
+            print(
+                f"MQTT: {self.args.host}:{self.args.mqtt_port} (无TLS), "
+                f"UDP: {self.args.host}:{self.args.udp_port}"
+            )
+
+        kick_task = None
+        if self.args.kick_every:
+            kick_task = asyncio.create_task(self._kick_loop())
+            print(
+                f"断网模拟: 每 {self.args.kick_every}s 断开所有连接，"
+                f"持续 {self.args.outage_ms:.0f}ms"
+            )
+
+        if self.impairment.enabled:
+            print(
+                f"网络损伤: 延迟 {self.args.latency_ms}ms, 抖动 ±{self.args.jitter_ms}ms, "
+                f"丢包 {self.args.loss * 100:.1f}%"
+            )
+
+        try:
+            if self.args.duration:
+                await asyncio.sleep(self.args.duration)
+            else:
+                await asyncio.Future()
+        finally:
+            if kick_task:
+                kick_task.cancel()
+            for server in servers:
+                server.close()
+            if self.udp_transport:
+                self.udp_transport.close()
+
+    def report(self):
+        self.recorder.print_summary()
+        self.recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地小智替身服务器（WebSocket / MQTT+UDP）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--ws-port", type=int, default=8000, help="WebSocket端口")
+    parser.add_argument("--mqtt-port", type=int, default=1883, help="MQTT端口（不要用8883）")
+    parser.add_argument("--udp-port", type=int, default=8884, help="UDP音频端口")
+    parser.add_argument("--udp-advertise", help="hello中下发的UDP地址（默认同--host）")
+    parser.add_argument("--no-websocket", action="store_true", help="不启动WebSocket")
+    parser.add_argument("--no-mqtt", action="store_true", help="不启动MQTT+UDP")
+    parser.add_argument(
+        "--binary-v1", action="store_true", help="忽略客户端的二进制协议v2请求（测试回退）"
+    )
+
+    parser.add_argument("--tts-wav", help="TTS回复音频WAV（默认生成测试音）")
+    parser.add_argument("--tts-sample-rate", type=int, default=24000, help="下行采样率")
+    parser.add_argument(
+        "--tts-frame-duration", type=int, help="下行帧时长ms（默认跟随客户端hello）"
+    )
+    parser.add_argument("--tts-burst", type=int, default=3, help="TTS开头突发发送的帧数")
+    parser.add_argument("--frame-duration", type=int, default=60, help="上行帧时长ms")
+    parser.add_argument("--reply-text", default=DEFAULT_REPLY_TEXT, help="sentence_start文本")
+    parser.add_argument("--stt-text", default=DEFAULT_STT_TEXT, help="stt识别结果文本")
+    parser.add_argument("--think-ms", type=float, default=0, help="判停到开始回复的模拟处理时间")
+    parser.add_argument(
+        "--auto-stop-ms", type=int, default=1500, help="auto/realtime模式下收满多少ms音频后回复"
+    )
+    parser.add_argument("--greet-on-wake", action="store_true", help="收到唤醒词上报即回复")
+    parser.add_argument(
+        "--goodbye-after-turns", type=int, default=0, help="完成N轮对话后下发goodbye"
+    )
+
+    parser.add_argument("--latency-ms", type=float, default=0, help="下行固定延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="下行抖动（均匀分布±）")
+    parser.add_argument("--loss", type=float, default=0, help="下行音频丢包率 0-1")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--kick-every", type=float, default=0, help="每隔N秒断开所有连接（0不启用）")
+    parser.add_argument("--outage-ms", type=float, default=0, help="断开后拒绝重连的时长ms")
+    parser.add_argument("--no-resume", action="store_true", help="拒绝客户端的会话恢复请求")
+    parser.add_argument(
+        "--resume-window", type=float, default=30.0, help="断开后允许恢复会话的时长秒"
+    )
+
+    parser.add_argument("--no-mcp", action="store_true", help="不发起MCP请求")
+    parser.add_argument("--mcp-call", help="hello后调用的MCP工具名")
+    parser.add_argument("--mcp-args", type=json.loads, default={}, help="工具参数JSON")
+    parser.add_argument(
+        "--mcp-call-every-turn", action="store_true", help="每轮对话结束后调用一次工具"
+    )
+
+    parser.add_argument("--record", help="消息计时记录输出路径（JSONL）")
+    parser.add_argument("--duration", type=float, default=0, help="运行时长秒（0为直到Ctrl+C）")
+    args = parser.parse_args()
+
+    server = LocalServer(args)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.report()
+
+
+if __name__ == "__main__":
+    main()
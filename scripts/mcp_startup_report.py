@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""MCP 工具注册启动开销报告 对比立即加载与延迟加载的耗时和内存.
+
+每种方式在独立子进程中运行（模块导入状态互不影响）：
+- eager:    导入全部工具模块并初始化管理器（旧行为，也是描述缓存缺失时的行为）
+- deferred: 按缓存的工具描述注册，不导入实现模块
+
+另外在延迟模式下逐个模块测量首次 tools/call 时的加载耗时。
+
+用法:
+    python scripts/mcp_startup_report.py
+    python scripts/mcp_startup_report.py --json mcp_startup.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+PROBE = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+import psutil
+process = psutil.Process()
+rss_before = process.memory_info().rss
+modules_before = len(sys.modules)
+start = time.perf_counter()
+
+from src.mcp.mcp_server import DeferredMcpTool, McpServer
+server = McpServer()
+if {mode!r} == "eager":
+    for provider in server._common_tool_providers():
+        server.tools.extend(provider.load().values())
+else:
+    server.add_common_tools()
+
+result = {{
+    "register_ms": round((time.perf_counter() - start) * 1000, 1),
+    "rss_mb": round((process.memory_info().rss - rss_before) / 1048576, 1),
+    "modules": len(sys.modules) - modules_before,
+    "tools": len(server.tools),
+    "deferred_tools": sum(isinstance(t, DeferredMcpTool) for t in server.tools),
+}}
+if {first_call!r}:
+    result["first_call_ms"] = {{}}
+    for name, provider in server._providers.items():
+        start = time.perf_counter()
+        provider.load()
+        result["first_call_ms"][name] = round((time.perf_counter() - start) * 1000, 1)
+print("__REPORT__" + json.dumps(result))
+"""
+
+
+def run_probe(mode: str, first_call: bool = False) -> dict:
+    code = PROBE.format(root=str(project_root), mode=mode, first_call=first_call)
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=str(project_root),
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("__REPORT__"):
+            return json.loads(line[len("__REPORT__") :])
+    raise RuntimeError(f"{mode} 子进程失败:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 工具注册启动开销报告")
+    parser.add_argument("--json", help="结果输出JSON路径")
+    args = parser.parse_args()
+
+    # 先运行一次延迟模式，确保工具描述缓存已生成
+    run_probe("deferred")
+
+    report = {
+        "eager": run_probe("eager"),
+        "deferred": run_probe("deferred", first_call=True),
+    }
+    eager, deferred = report["eager"], report["deferred"]
+    report["saved_ms"] = round(eager["register_ms"] - deferred["register_ms"], 1)
+    report["saved_rss_mb"] = round(eager["rss_mb"] - deferred["rss_mb"], 1)
+
+    print("\n" + "=" * 60)
+    print(f"{'方式':<10}{'注册耗时ms':>12}{'RSS增量MB':>12}{'新导入模块':>12}{'工具数':>8}")
+    for mode in ("eager", "deferred"):
+        row = report[mode]
+        print(
+            f"{mode:<10}{row['register_ms']:>12}{row['rss_mb']:>12}"
+            f"{row['modules']:>12}{row['tools']:>8}"
+        )
+    print(f"节省: {report['saved_ms']}ms，{report['saved_rss_mb']}MB")
+    print("延迟模式下各模块首次调用加载耗时(ms):")
+    for name, ms in deferred["first_call_ms"].items():
+        print(f"  {name:<10}{ms:>10}")
+    print("=" * 60)
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""断线恢复基准测试 测量会话中短暂断网后的恢复时间.
+
+无界面、无声卡地运行完整的 Application（虚拟音频设备持续送入录音帧），
+进入持续监听后由本地替身服务器定期踢断连接并拒绝重连一段时间，统计：
+- 断线 -> 会话恢复 的耗时分位数
+- 恢复后是否沿用原会话、设备状态是否保持（未回落到 idle）
+- 断线期间缓存并补发的麦克风帧数、因缓存已满丢弃的帧数
+
+用法:
+    python scripts/local_server.py --kick-every 10 --outage-ms 2000 &
+    python scripts/reconnect_benchmark.py --outages 10
+    python scripts/reconnect_benchmark.py --protocol mqtt --outages 5 --json resume.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.latency_benchmark import (  # noqa: E402
+    BenchmarkApplication,
+    stats,
+    wait_for,
+)
+from src.constants.constants import DeviceState  # noqa: E402
+from src.utils.latency_tracer import get_latency_tracer  # noqa: E402
+from src.utils.logging_config import get_logger, setup_logging  # noqa: E402
+
+logger = get_logger(__name__)
+
+
+async def wait_outage(app, since: float, timeout: float) -> Optional[dict]:
+    """
+    等待一次断线及其恢复结果.
+    """
+    tracer = get_latency_tracer()
+    if not await wait_for(
+        lambda: tracer.first_after("connection_lost", since) is not None, timeout
+    ):
+        return None
+    lost = tracer.first_after("connection_lost", since)
+    state_before = app.device_state
+    info_before = app.protocol.get_resume_info()
+
+    def finished():
+        return (
+            tracer.first_after("session_resumed", lost) is not None
+            or tracer.first_after("session_resume_failed", lost) is not None
+        )
+
+    await wait_for(finished, app.protocol._resume_timeout + 15)
+    resumed = tracer.first_after("session_resumed", lost)
+    # 等补发完成、状态恢复动作执行完
+    await wait_for(lambda: not app.protocol.is_resuming(), 5)
+    await asyncio.sleep(0.5)
+    info_after = app.protocol.get_resume_info()
+
+    return {
+        "ok": resumed is not None,
+        "recover_ms": round((resumed - lost) * 1000, 1) if resumed else None,
+        "same_session": info_after["same_session"] > info_before["same_session"],
+        "state_before": state_before,
+        "state_after": app.device_state,
+        "flushed_frames": info_after["buffered_frames"]
+        - info_before["buffered_frames"],
+        "dropped_frames": info_after["dropped_frames"] - info_before["dropped_frames"],
+        "lost_at": lost,
+    }
+
+
+async def benchmark(args) -> dict:
+    tracer = get_latency_tracer()
+    tracer.enable()
+
+    app = BenchmarkApplication(speed=1.0)
+    # realtime 模式下监听持续进行，断线时一定有上行音频
+    app.aec_enabled = not args.auto
+    app_task = asyncio.create_task(app.run(mode="cli", protocol=args.protocol))
+
+    ready = await wait_for(
+        lambda: app.audio_codec is not None and app._shutdown_event is not None, 30
+    )
+    if not ready:
+        raise RuntimeError("应用初始化超时")
+    await asyncio.sleep(args.warmup)
+
+    app.schedule_command_nowait(app._toggle_chat_state_impl)
+    if not await wait_for(lambda: app.device_state == DeviceState.LISTENING, 15):
+        raise RuntimeError("未能进入监听状态，请确认本地服务器已启动")
+    print(f"已进入监听，等待服务器注入断线（共 {args.outages} 次）")
+
+    outages = []
+    since = time.monotonic()
+    for index in range(args.outages):
+        result = await wait_outage(app, since, args.timeout)
+        if result is None:
+            print(f"{args.timeout}s 内未发生断线，请确认服务器使用了 --kick-every")
+            break
+        since = result.pop("lost_at") + 0.001
+        outages.append(result)
+        if result["ok"]:
+            print(
+                f"第 {index + 1}/{args.outages} 次断线: 恢复 {result['recover_ms']:.0f}ms，"
+                f"{'原会话' if result['same_session'] else '新会话'}，"
+                f"状态 {result['state_before']} -> {result['state_after']}，"
+                f"补发 {result['flushed_frames']} 帧"
+            )
+        else:
+            print(f"第 {index + 1}/{args.outages} 次断线: 恢复失败")
+            # 失败后重新进入监听，继续下一次测量
+            app.schedule_command_nowait(app._toggle_chat_state_impl)
+            await wait_for(lambda: app.device_state == DeviceState.LISTENING, 15)
+
+    await app.shutdown()
+    try:
+        await asyncio.wait_for(app_task, 10)
+    except Exception:
+        pass
+
+    ok = [o for o in outages if o["ok"]]
+    return {
+        "config": {
+            "protocol": args.protocol,
+            "mode": "auto" if args.auto else "realtime",
+            "outages": args.outages,
+        },
+        "observed": len(outages),
+        "resumed": len(ok),
+        "same_session": sum(1 for o in ok if o["same_session"]),
+        "state_kept": sum(1 for o in ok if o["state_after"] != DeviceState.IDLE),
+        "recover_ms": stats([o["recover_ms"] for o in ok]),
+        "flushed_frames": stats([o["flushed_frames"] for o in ok]),
+        "dropped_frames": sum(o["dropped_frames"] for o in outages),
+        "outages_detail": outages,
+    }
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 60)
+    print(
+        f"观察到 {report['observed']} 次断线，恢复 {report['resumed']} 次，"
+        f"沿用原会话 {report['same_session']} 次，状态保持 {report['state_kept']} 次"
+    )
+    s = report["recover_ms"]
+    if s.get("n"):
+        print(
+            f"恢复耗时(ms): p50={s['p50']} p90={s['p90']} p99={s['p99']} max={s['max']}"
+        )
+    f = report["flushed_frames"]
+    if f.get("n"):
+        print(f"补发缓存帧: 平均 {f['mean']}，最多 {f['max']}")
+    print(f"缓存溢出丢弃帧: {report['dropped_frames']}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="断线恢复基准测试")
+    parser.add_argument("--protocol", choices=["websocket", "mqtt"], default="websocket")
+    parser.add_argument("--outages", type=int, default=5, help="测量的断线次数")
+    parser.add_argument("--timeout", type=float, default=60.0, help="等待下一次断线的超时秒")
+    parser.add_argument("--warmup", type=float, default=2.0, help="启动后预热秒")
+    parser.add_argument("--auto", action="store_true", help="使用auto监听模式（默认realtime）")
+    parser.add_argument("--json", help="结果输出JSON路径")
+    args = parser.parse_args()
+
+    setup_logging()
+    report = asyncio.run(benchmark(args))
+    print_report(report)
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
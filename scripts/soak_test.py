@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""长时间浸泡测试 以加速时钟重复数千轮“唤醒 -> 聆听 -> TTS -> 空闲”，检查缓慢泄漏.
+
+无界面、无声卡地运行完整的 Application（复用 latency_benchmark 的虚拟音频设备与
+单轮驱动逻辑），每隔若干轮采样一次:
+- 进程常驻内存（RSS）、线程数
+- 存活的 asyncio 任务数、Application 后台任务数
+- gc 跟踪的对象总数及各类型数量
+- 命令队列、播放队列、唤醒词队列、重采样缓冲的长度
+
+预热轮次之后的采样按时间分成若干段，若各段中位数逐段上升且总增长超过阈值，
+判定为单调增长（疑似泄漏），以退出码 1 结束，并列出增长最多的对象类型。
+
+用法:
+    python scripts/local_server.py --tts-burst 100000 --auto-stop-ms 600 &
+    python scripts/soak_test.py --cycles 2000
+    python scripts/soak_test.py --cycles 5000 --speed 8 --protocol mqtt --json soak.json
+    python scripts/soak_test.py --wav question.wav --kws --cycles 500
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 添加项目根目录到Python路径 - 必须在导入项目模块之前
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.latency_benchmark import (  # noqa: E402
+    BenchmarkApplication,
+    load_wav_16k,
+    run_once,
+    wait_for,
+)
+from src.utils.latency_tracer import get_latency_tracer  # noqa: E402
+from src.utils.logging_config import get_logger, setup_logging  # noqa: E402
+from src.utils.memory_usage import get_rss_mb  # noqa: E402
+
+logger = get_logger(__name__)
+
+# 各指标判定为泄漏所需的最小总增长（低于此值视为噪声）
+MIN_GROWTH = {
+    "rss_mb": 8.0,
+    "threads": 2,
+    "tasks": 5,
+    "bg_tasks": 5,
+    "gc_objects": 5000,
+    "command_queue": 10,
+    "output_queue": 50,
+    "wakeword_queue": 20,
+    "resample_buffer": 4,
+}
+
+
+def take_sample(
+    app: BenchmarkApplication, cycle: int, started: float
+) -> Tuple[dict, Counter]:
+    """
+    采集一次资源占用（先完整回收，排除尚未回收的循环引用）
+    """
+    gc.collect()
+    objects = gc.get_objects()
+    types = Counter(type(obj).__name__ for obj in objects)
+    codec = app.audio_codec
+
+    sample = {
+        "cycle": cycle,
+        "elapsed_sec": round(time.monotonic() - started, 1),
+        "rss_mb": get_rss_mb(),
+        "threads": threading.active_count(),
+        "tasks": len(asyncio.all_tasks()),
+        "bg_tasks": len(app._bg_tasks),
+        "gc_objects": len(objects),
+        "command_queue": app.command_queue.qsize() if app.command_queue else 0,
+        "output_queue": codec._output_buffer.qsize() if codec else 0,
+        "wakeword_queue": codec._wakeword_buffer.qsize() if codec else 0,
+        "resample_buffer": len(codec._resample_output_buffer) if codec else 0,
+    }
+    del objects
+    return sample, types
+
+
+def detect_growth(values: List[float], min_growth: float, segments: int) -> dict:
+    """判断序列是否单调增长.
+
+    将序列均分为 segments 段取中位数，逐段严格上升且首尾段差值不小于
+    min_growth 时判定为增长。
+    """
+    if len(values) < segments * 2:
+        return {"growing": False, "reason": "样本不足"}
+    size = len(values) // segments
+    medians = [
+        statistics.median(values[i * size : (i + 1) * size]) for i in range(segments)
+    ]
+    delta = medians[-1] - medians[0]
+    rising = all(b > a for a, b in zip(medians, medians[1:]))
+    return {
+        "growing": rising and delta >= min_growth,
+        "segment_medians": [round(m, 1) for m in medians],
+        "delta": round(delta, 1),
+    }
+
+
+async def soak(args) -> dict:
+    if args.wav:
+        audio = load_wav_16k(args.wav)
+    else:
+        from scripts.local_server import synth_tone
+
+        audio = synth_tone(16000, args.utterance_sec)
+
+    get_latency_tracer().enable()
+    app = BenchmarkApplication(speed=args.speed)
+    app.aec_enabled = args.realtime
+    app_task = asyncio.create_task(app.run(mode="cli", protocol=args.protocol))
+
+    ready = await wait_for(
+        lambda: app.audio_codec is not None and app._shutdown_event is not None, 30
+    )
+    if not ready:
+        raise RuntimeError("应用初始化超时")
+    if not args.no_kws and app.wake_word_detector is None:
+        raise RuntimeError("唤醒词检测器不可用，去掉 --kws 即可直接触发")
+
+    started = time.monotonic()
+    samples: List[dict] = []
+    baseline_types = None
+    last_types = None
+    failures = 0
+
+    for cycle in range(1, args.cycles + 1):
+        result = await run_once(app, audio, args)
+        # 打点器只为判断本轮是否完成，清空以免其自身增长干扰结果
+        get_latency_tracer().reset()
+        if result is None or not result["ok"]:
+            failures += 1
+        if args.gap:
+            await asyncio.sleep(args.gap)
+
+        if cycle % args.sample_every == 0 or cycle == args.cycles:
+            sample, types = take_sample(app, cycle, started)
+            sample["failures"] = failures
+            samples.append(sample)
+            if baseline_types is None and cycle >= args.warmup_cycles:
+                baseline_types = types
+            last_types = types
+            print(
+                f"第 {cycle}/{args.cycles} 轮: RSS {sample['rss_mb']}MB | "
+                f"任务 {sample['tasks']}（后台 {sample['bg_tasks']}）| "
+                f"线程 {sample['threads']} | 对象 {sample['gc_objects']} | "
+                f"播放队列 {sample['output_queue']} | 失败 {failures}"
+            )
+            del types
+
+    await app.shutdown()
+    try:
+        await asyncio.wait_for(app_task, 10)
+    except Exception:
+        pass
+
+    return build_report(samples, baseline_types, last_types, failures, args)
+
+
+def build_report(
+    samples: List[dict], baseline_types, last_types, failures: int, args
+) -> dict:
+    measured = [s for s in samples if s["cycle"] >= args.warmup_cycles]
+    growth: Dict[str, dict] = {}
+    for key, min_growth in MIN_GROWTH.items():
+        values = [s[key] for s in measured if s[key] is not None]
+        growth[key] = detect_growth(values, min_growth, args.segments)
+
+    type_growth = []
+    if baseline_types is not None and last_types is not None:
+        diff = Counter(last_types)
+        diff.subtract(baseline_types)
+        type_growth = [(name, count) for name, count in diff.most_common(15) if count > 0]
+
+    return {
+        "config": {
+            "protocol": args.protocol,
+            "cycles": args.cycles,
+            "speed": args.speed,
+            "warmup_cycles": args.warmup_cycles,
+            "sample_every": args.sample_every,
+            "kws": not args.no_kws,
+        },
+        "failures": failures,
+        "leaks": [key for key, result in growth.items() if result["growing"]],
+        "growth": growth,
+        "type_growth": type_growth,
+        "samples": samples,
+    }
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 72)
+    print(
+        f"共 {report['config']['cycles']} 轮，失败 {report['failures']} 轮，"
+        f"预热 {report['config']['warmup_cycles']} 轮后的趋势（分段中位数）:"
+    )
+    for key, result in report["growth"].items():
+        if "segment_medians" not in result:
+            print(f"  {key:<16}{result['reason']}")
+            continue
+        flag = "  <- 单调增长" if result["growing"] else ""
+        medians = " -> ".join(str(m) for m in result["segment_medians"])
+        print(f"  {key:<16}{medians}（{result['delta']:+}）{flag}")
+    if report["type_growth"]:
+        print("增长最多的对象类型:")
+        for name, count in report["type_growth"]:
+            print(f"  {name:<32}+{count}")
+    if report["leaks"]:
+        print(f"疑似泄漏: {', '.join(report['leaks'])}")
+    else:
+        print("未发现单调增长")
+    print("=" * 72)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长时间浸泡测试（泄漏检测）")
+    parser.add_argument("--protocol", choices=["websocket", "mqtt"], default="websocket")
+    parser.add_argument("--cycles", type=int, default=2000, help="对话轮数")
+    parser.add_argument("--speed", type=float, default=4.0, help="虚拟声卡时钟倍速")
+    parser.add_argument("--wav", help="提问音频WAV（默认生成测试音）")
+    parser.add_argument("--utterance-sec", type=float, default=1.0, help="测试音时长秒")
+    parser.add_argument("--kws", action="store_true", help="依赖唤醒词模型触发（默认直接触发）")
+    parser.add_argument("--realtime", action="store_true", help="使用realtime监听模式（默认auto）")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单轮超时秒")
+    parser.add_argument("--gap", type=float, default=0.0, help="轮次间隔秒")
+    parser.add_argument("--sample-every", type=int, default=50, help="每N轮采样一次")
+    parser.add_argument("--warmup-cycles", type=int, default=200, help="不计入趋势的预热轮数")
+    parser.add_argument("--segments", type=int, default=4, help="趋势判定的分段数")
+    parser.add_argument("--json", help="结果输出JSON路径")
+    args = parser.parse_args()
+    args.no_kws = not args.kws
+    args.sample_every = max(1, args.sample_every)
+
+    setup_logging()
+    report = asyncio.run(soak(args))
+    print_report(report)
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"结果已保存到: {args.json}")
+
+    sys.exit(1 if report["leaks"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import platform
 import signal
 import sys
@@ -9,14 +8,14 @@ import typing as _t  # noqa: F401
 from typing import Set
 
 from src.constants.constants import AbortReason, DeviceState, ListeningMode
-from src.display import gui_display
 from src.mcp.mcp_server import McpServer
-from src.protocols.mqtt_protocol import MqttProtocol
-from src.protocols.websocket_protocol import WebsocketProtocol
+from src.utils import json_codec
 from src.utils.common_utils import handle_verification_code
 from src.utils.config_manager import ConfigManager
+from src.utils.latency_tracer import get_latency_tracer
 from src.utils.logging_config import get_logger
 from src.utils.opus_loader import setup_opus
+from src.utils.startup_profiler import get_startup_profiler
 
 # 检查是否为 macOS 系统
 if platform.system() == "Darwin":
@@ -106,6 +105,21 @@ class Application:
         self.protocol = None
         self.display = None
         self.wake_word_detector = None
+        # 各初始化阶段耗时（StagedInitializer.run 的结果）
+        self.init_timings = None
+        # 最近一次关闭的各步骤耗时（StagedShutdown.run 的结果）
+        self.shutdown_report = None
+        # 守护进程模式下的待机内存基线（_report_idle_memory 的结果）
+        self.idle_memory = None
+        # 事件循环延迟监测（LoopLagMonitor，启用时在核心任务启动时安装）
+        self.loop_monitor = None
+        # 本地指标端点（METRICS_OPTIONS.ENABLED 时启动）
+        self.metrics_server = None
+        self.barge_in_detector = None
+        self.opus_controller = None
+        self.stream_tuner = None
+        # 空闲超时后进入音频低功耗待机
+        self._low_power_task = None
         # 任务管理
         self.running = False
         self._main_tasks: Set[asyncio.Task] = set()
@@ -114,6 +128,8 @@ class Application:
 
         # 运行指标/计数
         self._command_dropped_count = 0
+        # 已调度但尚未发送完成的上行音频帧数（发送积压）
+        self._pending_audio_sends = 0
 
         # 命令队列 - 延迟到事件循环运行时初始化
         self.command_queue: asyncio.Queue = None
@@ -127,6 +143,10 @@ class Application:
         # MCP服务器
         self.mcp_server = McpServer.get_instance()
 
+        # 对话延迟打点（默认关闭，由延迟基准测试开启）
+        self._latency_tracer = get_latency_tracer()
+        self._startup = get_startup_profiler()
+
         # 消息处理器映射
         self._message_handlers = {
             "tts": self._handle_tts_message,
@@ -236,16 +256,24 @@ class Application:
             self._initialize_async_objects()
 
             # 初始化组件
-            await self._initialize_components(mode, protocol)
+            with self._startup.phase("components"):
+                await self._initialize_components(mode, protocol)
 
             # 启动核心任务
             await self._start_core_tasks()
 
             # 启动显示界面
-            if mode == "gui":
-                await self._start_gui_display()
-            else:
-                await self._start_cli_display()
+            with self._startup.phase("display_start"):
+                if mode == "gui":
+                    await self._start_gui_display()
+                elif mode == "daemon":
+                    await self._start_daemon_display()
+                else:
+                    await self._start_cli_display()
+
+            # 启动剖析到此结束（未开启时为空操作）
+            self._startup.mark("ready")
+            self._startup.finish()
 
             logger.info("应用程序已启动，按Ctrl+C退出")
 
@@ -265,43 +293,49 @@ class Application:
                 logger.error(f"关闭应用程序时出错: {e}")
 
     async def _initialize_components(self, mode: str, protocol: str):
-        """
-        初始化应用程序组件.
+        """初始化应用程序组件.
+
+        按依赖关系并发执行：唤醒词模型加载在线程池中与音频设备打开同时进行，
+        互不相关的服务（日程、倒计时、快捷键、IoT）并发启动。
         """
         logger.info("正在初始化应用程序组件...")
+        from src.core.staged_initializer import StagedInitializer
+
+        init = StagedInitializer(self._startup)
+        # 阻塞型阶段先添加，尽早进入线程池
+        init.add("wake_word_model", self._load_wake_word_model, blocking=True)
+        # 显示类型必须在设备状态设置之前
+        init.add("display", lambda: self._set_display_type(mode))
+        init.add(
+            "device_state",
+            lambda: self._set_device_state(DeviceState.IDLE),
+            after=["display"],
+        )
+        init.add("protocol", lambda: self._set_protocol_type(protocol))
+        # MCP发送回调经由协议发送
+        init.add("mcp_server", self._initialize_mcp_server, after=["protocol"])
+        init.add("iot_devices", self._initialize_iot_devices)
+        init.add("audio", self._initialize_audio)
+        init.add(
+            "wake_word",
+            self._initialize_wake_word_detector,
+            after=["wake_word_model", "audio"],
+        )
+        init.add("barge_in", self._initialize_barge_in_detector, after=["audio"])
+        init.add("protocol_callbacks", self._setup_protocol_callbacks, after=["protocol"])
+        init.add(
+            "opus_controller",
+            self._initialize_opus_controller,
+            after=["audio", "protocol_callbacks"],
+        )
+        init.add("stream_tuner", self._initialize_stream_tuner, after=["audio"])
+        init.add("calendar_reminder", self._start_calendar_reminder_service)
+        init.add("timer_service", self._start_timer_service)
+        if mode != "daemon":
+            # 守护进程没有桌面会话，不监听全局快捷键
+            init.add("shortcuts", self._initialize_shortcuts, after=["display"])
 
-        # 设置显示类型（必须在设备状态设置之前）
-        self._set_display_type(mode)
-
-        # 初始化MCP服务器
-        self._initialize_mcp_server()
-
-        # 设置设备状态
-        await self._set_device_state(DeviceState.IDLE)
-
-        # 初始化物联网设备
-        await self._initialize_iot_devices()
-
-        # 初始化音频编解码器
-        await self._initialize_audio()
-
-        # 设置协议
-        self._set_protocol_type(protocol)
-
-        # 初始化唤醒词检测
-        await self._initialize_wake_word_detector()
-
-        # 设置协议回调
-        self._setup_protocol_callbacks()
-
-        # 启动日程提醒服务
-        await self._start_calendar_reminder_service()
-
-        # 启动倒计时器服务
-        await self._start_timer_service()
-
-        # 初始化快捷键管理器
-        await self._initialize_shortcuts()
+        self.init_timings = await init.run()
 
         logger.info("应用程序组件初始化完成")
 
@@ -343,22 +377,26 @@ class Application:
             # 2. SPEAKING状态：只有在REALTIME模式下才发送（向后兼容）
             should_send = self._should_send_microphone_audio()
 
-            if (
-                should_send
-                and self.protocol
-                and self.protocol.is_audio_channel_opened()
-            ):
+            if should_send and self._audio_uplink_available():
 
-                # 线程安全地调度到主事件循环
+                # 线程安全地调度到主事件循环（携带采集时刻，供带时间戳的传输使用）
                 if self._main_loop and not self._main_loop.is_closed():
                     self._main_loop.call_soon_threadsafe(
-                        self._schedule_audio_send, encoded_data
+                        self._schedule_audio_send, encoded_data, time.monotonic()
                     )
 
         except Exception as e:
             logger.error(f"处理编码音频数据回调失败: {e}")
 
-    def _schedule_audio_send(self, encoded_data: bytes):
+    def _audio_uplink_available(self) -> bool:
+        """
+        音频通道可用，或正在断线恢复（帧由协议层缓存）
+        """
+        return bool(self.protocol) and (
+            self.protocol.is_audio_channel_opened() or self.protocol.is_resuming()
+        )
+
+    def _schedule_audio_send(self, encoded_data: bytes, capture_time: float = None):
         """
         在主事件循环中调度音频发送任务.
         """
@@ -369,21 +407,19 @@ class Application:
             # 核心逻辑：LISTENING状态或SPEAKING+REALTIME模式下发送音频
             should_send = self._should_send_microphone_audio()
 
-            if (
-                should_send
-                and self.protocol
-                and self.protocol.is_audio_channel_opened()
-            ):
+            if should_send and self._audio_uplink_available():
                 # 使用call_soon_threadsafe避免qasync任务重入
                 if self._main_loop and not self._main_loop.is_closed():
                     self._main_loop.call_soon_threadsafe(
-                        self._schedule_audio_send_task, encoded_data
+                        self._schedule_audio_send_task, encoded_data, capture_time
                     )
 
         except Exception as e:
             logger.error(f"调度音频发送失败: {e}")
 
-    def _schedule_audio_send_task(self, encoded_data: bytes):
+    def _schedule_audio_send_task(
+        self, encoded_data: bytes, capture_time: float = None
+    ):
         """
         在主事件循环中创建音频发送任务.
         """
@@ -393,10 +429,15 @@ class Application:
             
             # 并发限制，避免任务风暴
             async def _send():
-                async with self._send_audio_semaphore:
-                    await self.protocol.send_audio(encoded_data)
-
-            self._create_background_task(_send(), "发送音频数据")
+                try:
+                    async with self._send_audio_semaphore:
+                        await self.protocol.send_audio(encoded_data, capture_time)
+                        self._latency_tracer.mark_once("first_uplink_packet")
+                finally:
+                    self._pending_audio_sends -= 1
+
+            if self._create_background_task(_send(), "发送音频数据"):
+                self._pending_audio_sends += 1
         except Exception as e:
             logger.error(f"创建音频发送任务失败: {e}", exc_info=True)
 
@@ -433,9 +474,14 @@ class Application:
         设置协议类型.
         """
         logger.debug("设置协议类型: %s", protocol_type)
+        # 只导入使用的协议（paho / websockets 互不加载）
         if protocol_type == "mqtt":
+            from src.protocols.mqtt_protocol import MqttProtocol
+
             self.protocol = MqttProtocol(asyncio.get_running_loop())
         else:
+            from src.protocols.websocket_protocol import WebsocketProtocol
+
             self.protocol = WebsocketProtocol()
 
     def _set_display_type(self, mode: str):
@@ -444,9 +490,16 @@ class Application:
         """
         logger.debug("设置显示界面类型: %s", mode)
 
+        # 界面模块按需导入：cli/daemon 模式不加载 PyQt5
         if mode == "gui":
-            self.display = gui_display.GuiDisplay()
+            from src.display.gui_display import GuiDisplay
+
+            self.display = GuiDisplay()
             self._setup_gui_callbacks()
+        elif mode == "daemon":
+            from src.display.daemon_display import DaemonDisplay
+
+            self.display = DaemonDisplay()
         else:
             from src.display.cli_display import CliDisplay
 
@@ -532,6 +585,8 @@ class Application:
         self.protocol.on_incoming_json(self._on_incoming_json)
         self.protocol.on_audio_channel_opened(self._on_audio_channel_opened)
         self.protocol.on_audio_channel_closed(self._on_audio_channel_closed)
+        self.protocol.on_session_resuming(self._on_session_resuming)
+        self.protocol.on_session_resumed(self._on_session_resumed)
 
     async def _start_core_tasks(self):
         """
@@ -542,6 +597,33 @@ class Application:
         # 命令处理任务
         self._create_task(self._command_processor(), "命令处理")
 
+        # 网络质量显示刷新
+        self._create_task(self._network_quality_loop(), "网络质量监测")
+
+        # 本地指标端点（默认关闭，只监听 127.0.0.1）
+        await self._start_metrics_server()
+
+        # 事件循环延迟与慢回调监测
+        if self.config.get_config("LOOP_MONITOR_OPTIONS.ENABLED", True):
+            from src.utils.loop_monitor import get_loop_monitor
+
+            self.loop_monitor = get_loop_monitor()
+            self.loop_monitor.install()
+            self._create_task(self.loop_monitor.run(), "事件循环监测")
+            self._create_task(self._loop_lag_display_loop(), "事件循环延迟显示")
+
+        # 上行编码自适应
+        if self.opus_controller:
+            self._create_task(self.opus_controller.run(), "Opus自适应")
+
+        # 输出流调优
+        if self.stream_tuner:
+            self._create_task(self.stream_tuner.run(), "输出流调优")
+
+        # 启动时处于空闲状态，同样开始待机计时
+        if self.device_state == DeviceState.IDLE:
+            self._schedule_low_power()
+
     def _create_task(self, coro, name: str) -> asyncio.Task:
         """
         创建并管理任务.
@@ -587,6 +669,76 @@ class Application:
         task.add_done_callback(done_callback)
         return task
 
+    async def _network_quality_loop(self, interval: float = 2.0):
+        """
+        定期把协议层的网络质量摘要推送到界面（内容变化时才更新）
+        """
+        last = None
+        while self.running:
+            await asyncio.sleep(interval)
+            if not self.protocol or not self.display:
+                continue
+            stats = self.protocol.get_network_quality()
+            summary = self.protocol.network_monitor.summary(stats)
+            current = (summary, stats["quality"])
+            if current != last:
+                last = current
+                self._update_display_async(
+                    self.display.update_network_status, summary, stats["quality"]
+                )
+
+    async def _start_metrics_server(self):
+        """
+        按配置启动指标 HTTP 端点，并注册应用层指标.
+        """
+        from src.utils.metrics import get_metrics
+
+        get_metrics().register_collector("application", self._collect_metrics)
+        if not self.config.get_config("METRICS_OPTIONS.ENABLED", False):
+            return
+        from src.utils.metrics_server import MetricsServer
+
+        port = int(self.config.get_config("METRICS_OPTIONS.PORT", 9464))
+        try:
+            self.metrics_server = MetricsServer(port)
+            await self.metrics_server.start()
+        except OSError as e:
+            logger.error(f"启动指标端点失败（端口 {port}）: {e}")
+            self.metrics_server = None
+
+    def _collect_metrics(self, registry):
+        """
+        指标采集：设备状态、任务数与命令队列深度.
+        """
+        registry.describe("xiaozhi_device_state", "gauge", "当前设备状态（取值为1的序列）")
+        for state in (
+            DeviceState.IDLE,
+            DeviceState.CONNECTING,
+            DeviceState.LISTENING,
+            DeviceState.SPEAKING,
+        ):
+            registry.set(
+                "xiaozhi_device_state", int(self.device_state == state), state=state
+            )
+        registry.set("xiaozhi_tasks", len(self._main_tasks), pool="main")
+        registry.set("xiaozhi_tasks", len(self._bg_tasks), pool="background")
+        if self.command_queue is not None:
+            registry.set("xiaozhi_command_queue_size", self.command_queue.qsize())
+
+    async def _loop_lag_display_loop(self, interval: float = 2.0):
+        """
+        定期把事件循环延迟摘要推送到界面（内容变化时才更新）
+        """
+        last = None
+        while self.running:
+            await asyncio.sleep(interval)
+            if not self.display:
+                continue
+            summary = self.loop_monitor.summary()
+            if summary != last:
+                last = summary
+                self._update_display_async(self.display.update_loop_status, summary)
+
     async def _command_processor(self):
         """
         命令处理器.
@@ -634,6 +786,31 @@ class Application:
         """
         self._create_task(self.display.start(), "CLI显示")
 
+    async def _start_daemon_display(self):
+        """
+        启动守护进程显示，并在待机后报告内存占用.
+        """
+        await self.display.start()
+        self._create_background_task(self._report_idle_memory(), "待机内存报告")
+
+    async def _report_idle_memory(self):
+        """
+        启动后稍候记录常驻内存与已加载模块数（待机基线）
+        """
+        from src.utils.memory_usage import get_rss_mb
+
+        delay = float(self.config.get_config("DAEMON_OPTIONS.IDLE_REPORT_DELAY_SEC", 10))
+        await asyncio.sleep(delay)
+        self.idle_memory = {
+            "rss_mb": get_rss_mb(),
+            "modules": len(sys.modules),
+            "state": str(self.device_state),
+        }
+        logger.info(
+            f"待机内存: RSS {self.idle_memory['rss_mb']}MB，"
+            f"已加载模块 {self.idle_memory['modules']} 个"
+        )
+
     async def schedule_command(self, command):
         """
         调度命令到命令队列.
@@ -791,7 +968,8 @@ class Application:
             await self.protocol.send_abort_speaking(reason)
             await self._set_device_state(DeviceState.IDLE)
             restart = (
-                reason == AbortReason.WAKE_WORD_DETECTED
+                reason
+                in (AbortReason.WAKE_WORD_DETECTED, AbortReason.USER_INTERRUPTION)
                 and self.keep_listening
                 and self.protocol.is_audio_channel_opened()
             )
@@ -861,6 +1039,7 @@ class Application:
                 return
             logger.debug(f"设备状态变更: {self.device_state} -> {state}")
             self.device_state = state
+            self._latency_tracer.mark(f"state:{state}")
             if state == DeviceState.IDLE:
                 perform_idle = True
             elif state == DeviceState.CONNECTING:
@@ -870,6 +1049,10 @@ class Application:
             elif state == DeviceState.SPEAKING:
                 display_update = ("说话中...", True)
 
+        # 离开空闲状态时取消待机计时并恢复播放流
+        if not perform_idle:
+            await self._cancel_low_power()
+
         # 锁外执行I/O与耗时操作
         if perform_idle:
             await self._handle_idle_state()
@@ -889,6 +1072,44 @@ class Application:
         # 设置表情
         self.set_emotion("neutral")
 
+        # 空闲一段时间后进入低功耗待机
+        self._schedule_low_power()
+
+    def _schedule_low_power(self):
+        """
+        启动空闲待机计时.
+        """
+        if not self.audio_codec or not self.config.get_config(
+            "LOW_POWER_OPTIONS.ENABLED", True
+        ):
+            return
+        if self._low_power_task and not self._low_power_task.done():
+            return
+        timeout = float(self.config.get_config("LOW_POWER_OPTIONS.IDLE_TIMEOUT_SEC", 30))
+
+        async def _enter_after_timeout():
+            await asyncio.sleep(timeout)
+            if self.device_state == DeviceState.IDLE and self.audio_codec:
+                if await self.audio_codec.enter_low_power() and self.loop_monitor:
+                    # 待机期间不再周期唤醒监测线程
+                    self.loop_monitor.suspend()
+
+        self._low_power_task = self._create_background_task(
+            _enter_after_timeout(), "低功耗待机计时"
+        )
+
+    async def _cancel_low_power(self):
+        """
+        取消待机计时，已在待机中则立即恢复播放流.
+        """
+        if self._low_power_task and not self._low_power_task.done():
+            self._low_power_task.cancel()
+        self._low_power_task = None
+        if self.loop_monitor:
+            self.loop_monitor.resume()
+        if self.audio_codec and self.audio_codec.is_low_power():
+            await self.audio_codec.exit_low_power()
+
     async def _handle_listening_state(self):
         """
         处理监听状态.
@@ -962,6 +1183,7 @@ class Application:
             try:
                 # 记录最近一次收到服务端音频的时间
                 self._last_incoming_audio_at = time.monotonic()
+                self._latency_tracer.mark_once("first_tts_packet")
 
                 # 标记“非静默”，并重置定时器：在静默期后置位事件
                 try:
@@ -1016,7 +1238,7 @@ class Application:
                 return
 
             if isinstance(json_data, str):
-                data = json.loads(json_data)
+                data = json_codec.loads(json_data)
             else:
                 data = json_data
             msg_type = data.get("type", "")
@@ -1055,6 +1277,7 @@ class Application:
         """
         处理TTS开始事件.
         """
+        self._latency_tracer.mark("tts_start")
         logger.info(
             f"TTS开始，当前状态: {self.device_state}，监听模式: {self.listening_mode}"
         )
@@ -1082,6 +1305,7 @@ class Application:
         """
         处理TTS停止事件.
         """
+        self._latency_tracer.mark("tts_stop")
         logger.info(
             f"TTS停止，当前状态: {self.device_state}，监听模式: {self.listening_mode}"
         )
@@ -1130,6 +1354,7 @@ class Application:
         """
         处理STT消息.
         """
+        self._latency_tracer.mark("stt")
         text = data.get("text", "")
         if text:
             logger.info(f">> {text}")
@@ -1147,11 +1372,16 @@ class Application:
         """
         音频通道打开回调.
         """
+        self._latency_tracer.mark("channel_opened")
         logger.info("音频通道已打开")
         try:
             if self.audio_codec:
                 await self.audio_codec.start_streams()
 
+            # 新会话从最好档位开始；断线恢复的会话保留当前档位
+            if self.opus_controller and not self.protocol.is_resuming():
+                self.opus_controller.reset()
+
             # 发送物联网设备描述符
             from src.iot.thing_manager import ThingManager
 
@@ -1162,6 +1392,42 @@ class Application:
         except Exception as e:
             logger.error(f"音频通道打开回调处理失败: {e}", exc_info=True)
 
+    def _on_session_resuming(self, reason):
+        """
+        会话恢复开始回调：保持当前状态，仅提示用户.
+        """
+        self._update_display_async(self.display.update_status, "网络中断，恢复中...", False)
+
+    async def _on_session_resumed(self, same_session: bool, outage_ms: float):
+        """
+        会话恢复完成回调：在不重置状态机的前提下接续对话.
+        """
+        state = self.device_state
+        logger.info(
+            f"会话恢复完成，中断 {outage_ms:.0f}ms，当前状态: {state}，"
+            f"{'原会话' if same_session else '新会话'}"
+        )
+
+        if state == DeviceState.LISTENING:
+            if not same_session:
+                # 新会话中服务端没有监听状态，重新下发开始监听
+                await self.protocol.send_start_listening(self.listening_mode)
+            self._update_display_async(self.display.update_status, "聆听中...", True)
+        elif state == DeviceState.SPEAKING:
+            if same_session:
+                self._update_display_async(
+                    self.display.update_status, "说话中...", True
+                )
+                return
+            # 新会话不会继续未完成的TTS，按本轮结束处理
+            if self.audio_codec:
+                await self.audio_codec.clear_audio_queue()
+            if self.keep_listening:
+                await self.protocol.send_start_listening(self.listening_mode)
+                await self._set_device_state(DeviceState.LISTENING)
+            else:
+                await self._set_device_state(DeviceState.IDLE)
+
     async def _on_audio_channel_closed(self):
         """
         音频通道关闭回调.
@@ -1170,14 +1436,27 @@ class Application:
         await self._set_device_state(DeviceState.IDLE)
         self.keep_listening = False
 
-    async def _initialize_wake_word_detector(self):
+    def _load_wake_word_model(self):
         """
-        初始化唤醒词检测器.
+        创建唤醒词检测器并加载模型（阻塞，在线程池中执行）
         """
         try:
             from src.audio_processing.wake_word_detect import WakeWordDetector
 
             self.wake_word_detector = WakeWordDetector()
+        except Exception as e:
+            logger.error(f"加载唤醒词模型失败: {e}")
+            self.wake_word_detector = None
+
+    async def _initialize_wake_word_detector(self):
+        """
+        初始化唤醒词检测器.
+        """
+        try:
+            if self.wake_word_detector is None:
+                self._load_wake_word_model()
+            if self.wake_word_detector is None:
+                return
 
             # 设置回调
             self.wake_word_detector.on_detected(self._on_wake_word_detected)
@@ -1194,10 +1473,74 @@ class Application:
             logger.error(f"初始化唤醒词检测器失败: {e}")
             self.wake_word_detector = None
 
+    def _initialize_barge_in_detector(self):
+        """
+        初始化语音打断检测器（消费音频编解码器的AEC后采集帧）
+        """
+        if not self.config.get_config("BARGE_IN_OPTIONS.ENABLED", False):
+            logger.info("语音打断检测已禁用")
+            return
+        if not self.audio_codec:
+            logger.info("音频编解码器不可用，跳过语音打断检测器初始化")
+            return
+
+        try:
+            from src.audio_processing.vad_detector import VADDetector
+
+            self.barge_in_detector = VADDetector(
+                self.audio_codec, self, self._main_loop
+            )
+            self.barge_in_detector.start()
+            logger.info("语音打断检测器初始化成功")
+        except Exception as e:
+            logger.error(f"初始化语音打断检测器失败: {e}")
+            self.barge_in_detector = None
+
+    def _initialize_opus_controller(self):
+        """
+        初始化上行 Opus 编码自适应（按发送积压、RTT、丢包调整码率/FEC）
+        """
+        if not self.config.get_config("ADAPTIVE_OPUS_OPTIONS.ENABLED", True):
+            logger.info("上行编码自适应已禁用")
+            return
+        if not self.audio_codec or not self.protocol:
+            return
+
+        from src.audio_codecs.adaptive_opus import AdaptiveOpusController
+
+        self.opus_controller = AdaptiveOpusController(
+            self.audio_codec,
+            self.protocol,
+            send_backlog=lambda: self._pending_audio_sends,
+            is_active=lambda: self._should_send_microphone_audio()
+            and self.protocol.is_audio_channel_opened(),
+        )
+        logger.info(
+            f"上行编码自适应已启用，码率档位: {self.opus_controller.levels}"
+        )
+
+    def _initialize_stream_tuner(self):
+        """
+        初始化输出流调优（按欠载频率调整延迟档位与回调块大小）
+        """
+        if not self.config.get_config("OUTPUT_TUNING_OPTIONS.ENABLED", True):
+            logger.info("输出流调优已禁用")
+            return
+        # 虚拟音频设备没有真实输出流
+        if not self.audio_codec or self.audio_codec.output_stream is None:
+            return
+
+        from src.audio_codecs.stream_tuner import OutputStreamTuner
+
+        self.stream_tuner = OutputStreamTuner(self.audio_codec)
+        logger.info(f"输出流调优已启用，当前参数: {self.stream_tuner.settings()}")
+
     async def _on_wake_word_detected(self, wake_word, full_text):
         """
         唤醒词检测回调.
         """
+        self._latency_tracer.new_round()
+        self._latency_tracer.mark("wake_word_detected")
         logger.info(f"检测到唤醒词: {wake_word}")
 
         if self.device_state == DeviceState.IDLE:
@@ -1339,91 +1682,108 @@ class Application:
             self._shutdown_event.set()
 
         try:
-            # 2. 关闭唤醒词检测器
-            await self._safe_close_resource(
-                self.wake_word_detector, "唤醒词检测器", "stop"
+            from src.core.staged_shutdown import StagedShutdown
+
+            options = self.config.get_config("SHUTDOWN_OPTIONS", {}) or {}
+            teardown = StagedShutdown(
+                deadline=float(options.get("DEADLINE_SEC", 3.0)),
+                slow_ms=float(options.get("SLOW_STAGE_MS", 500)),
+            )
+            # 互不依赖的步骤并发执行；音频设备要等读取它的检测器和任务先停下
+            teardown.add(
+                "wake_word",
+                lambda: self._safe_close_resource(
+                    self.wake_word_detector, "唤醒词检测器", "stop"
+                ),
+            )
+            # 注销采集帧监听
+            teardown.add(
+                "barge_in",
+                lambda: self._safe_close_resource(
+                    self.barge_in_detector, "语音打断检测器", "stop"
+                ),
+            )
+            teardown.add("main_tasks", self._cancel_main_tasks)
+            teardown.add("bg_tasks", self._cancel_bg_tasks)
+            # 尽早关闭协议连接，避免事件循环结束后仍有网络等待
+            teardown.add("protocol", self._close_protocol)
+            teardown.add(
+                "audio",
+                lambda: self._safe_close_resource(self.audio_codec, "音频设备"),
+                after=("wake_word", "barge_in", "main_tasks", "bg_tasks"),
             )
+            teardown.add(
+                "mcp_server",
+                lambda: self._safe_close_resource(self.mcp_server, "MCP服务器"),
+            )
+            teardown.add("queues", self._drain_queues, after=("main_tasks",))
+            if self.metrics_server:
+                teardown.add("metrics_server", self.metrics_server.stop)
+            self.shutdown_report = await teardown.run()
+            if self.loop_monitor:
+                self.loop_monitor.uninstall()
+
+            # 最后停止UI显示（不受截止时间约束，GUI需要它退出事件循环）
+            await self._safe_close_resource(self.display, "显示界面")
 
-            # 3. 取消所有长期任务
-            if self._main_tasks:
-                logger.info(f"取消 {len(self._main_tasks)} 个主要任务")
-                tasks = list(self._main_tasks)
-                for task in tasks:
-                    if not task.done():
-                        task.cancel()
+            logger.info("应用程序关闭完成")
 
-                try:
-                    # 等待任务取消完成
-                    await asyncio.wait(tasks, timeout=2.0)
-                except asyncio.TimeoutError:
-                    logger.warning("部分任务取消超时")
-                except Exception as e:
-                    logger.warning(f"等待任务完成时出错: {e}")
+        except Exception as e:
+            logger.error(f"关闭应用程序时出错: {e}", exc_info=True)
 
-                self._main_tasks.clear()
+    async def _cancel_main_tasks(self):
+        """
+        取消所有长期任务.
+        """
+        if not self._main_tasks:
+            return
+        logger.info(f"取消 {len(self._main_tasks)} 个主要任务")
+        tasks = list(self._main_tasks)
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        # 未响应取消的任务由关闭截止时间兜底
+        await asyncio.wait(tasks)
+        self._main_tasks.clear()
 
-            # 4. 取消后台任务（短期任务池）
-            try:
-                if self._bg_tasks:
-                    for t in list(self._bg_tasks):
-                        if not t.done():
-                            t.cancel()
-                    await asyncio.gather(*self._bg_tasks, return_exceptions=True)
-                self._bg_tasks.clear()
-            except Exception as e:
-                logger.warning(f"取消后台任务时出错: {e}")
+    async def _cancel_bg_tasks(self):
+        """
+        取消后台任务（短期任务池）
+        """
+        if self._bg_tasks:
+            for t in list(self._bg_tasks):
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*self._bg_tasks, return_exceptions=True)
+        self._bg_tasks.clear()
 
-            # 5. 关闭协议连接（尽早关闭，避免事件循环结束后仍有网络等待）
-            if self.protocol:
-                try:
-                    await self.protocol.close_audio_channel()
-                    logger.info("协议连接已关闭")
-                except Exception as e:
-                    logger.error(f"关闭协议连接失败: {e}")
+    async def _close_protocol(self):
+        """
+        关闭协议连接.
+        """
+        if self.protocol:
+            await self.protocol.close_audio_channel()
+            logger.info("协议连接已关闭")
 
-            # 6. 关闭音频设备（先停流后彻底关闭，缓解C扩展退出竞态）
-            if self.audio_codec:
+    def _drain_queues(self):
+        """
+        清空命令队列，取消尾静默定时器并置静默事件，避免等待.
+        """
+        for q in [
+            self.command_queue,
+        ]:
+            while not q.empty():
                 try:
-                    await self.audio_codec.stop_streams()
-                except Exception:
-                    pass
-            # 尽早释放音频资源，避免事件循环关闭后再 awaiting 内部 sleep
-            await self._safe_close_resource(self.audio_codec, "音频设备")
-
-            # 7. 关闭MCP服务器
-            await self._safe_close_resource(self.mcp_server, "MCP服务器")
-
-            # 8. 清理队列
-            try:
-                for q in [
-                    self.command_queue,
-                ]:
-                    while not q.empty():
-                        try:
-                            q.get_nowait()
-                        except asyncio.QueueEmpty:
-                            break
-                logger.info("队列已清空")
-            except Exception as e:
-                logger.error(f"清空队列失败: {e}")
-
-            # 9. 取消尾静默定时器并置静默事件，避免等待
-            try:
-                if self._incoming_audio_idle_handle:
-                    self._incoming_audio_idle_handle.cancel()
-                    self._incoming_audio_idle_handle = None
-                if self._incoming_audio_idle_event:
-                    self._incoming_audio_idle_event.set()
-            except Exception:
-                pass
-
-            # 10. 最后停止UI显示
-            await self._safe_close_resource(self.display, "显示界面")
-
-            logger.info("应用程序关闭完成")
+                    q.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+        logger.info("队列已清空")
 
-        except Exception as e:
-            logger.error(f"关闭应用程序时出错: {e}", exc_info=True)
+        if self._incoming_audio_idle_handle:
+            self._incoming_audio_idle_handle.cancel()
+            self._incoming_audio_idle_handle = None
+        if self._incoming_audio_idle_event:
+            self._incoming_audio_idle_event.set()
 
     def _initialize_mcp_server(self):
         """
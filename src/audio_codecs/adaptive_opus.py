@@ -0,0 +1,211 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+from src.utils.config_manager import ConfigManager
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class AdaptiveOpusController:
+    """上行 Opus 编码参数自适应.
+
+    周期性读取发送积压、RTT 和丢包，在分级表中升降档：
+    - 0 档即编码器初始码率（opus 默认或校准结果），网络正常时不改动编码器
+    - 网络变差（积压/高RTT/探测超时）立即降一档：逐级降低码率
+    - 网络持续良好 HOLD_SEC 后才升一档（迟滞，避免来回抖动）
+    - 丢包率超过阈值时开启带内 FEC，并按实测丢包设置 packet_loss_perc
+
+    每个采集帧编码为一个包，包时长始终等于握手声明的帧长，服务端无需重新协商。
+    下行丢包作为链路丢包的近似（上行丢包客户端无法直接测得）。
+    每次决策都会记录日志并保存在 decisions 中，便于事后评估。
+    """
+
+    # 降档使用的码率（只取低于 0 档码率的部分）
+    DEGRADED_BITRATES = (24000, 16000, 12000, 8000)
+
+    def __init__(
+        self,
+        audio_codec,
+        protocol,
+        send_backlog: Callable[[], int],
+        is_active: Optional[Callable[[], bool]] = None,
+    ):
+        self.audio_codec = audio_codec
+        self.protocol = protocol
+        self._send_backlog = send_backlog
+        self._is_active = is_active or (lambda: True)
+
+        config = ConfigManager.get_instance()
+        self.interval = float(config.get_config("ADAPTIVE_OPUS_OPTIONS.INTERVAL_SEC", 2.0))
+        self.hold_sec = float(config.get_config("ADAPTIVE_OPUS_OPTIONS.HOLD_SEC", 10.0))
+        self.max_backlog = int(config.get_config("ADAPTIVE_OPUS_OPTIONS.MAX_BACKLOG", 3))
+        self.max_rtt_ms = float(config.get_config("ADAPTIVE_OPUS_OPTIONS.MAX_RTT_MS", 300))
+        self.fec_loss = float(config.get_config("ADAPTIVE_OPUS_OPTIONS.FEC_LOSS_RATE", 0.02))
+
+        # 0 档码率取编码器创建时的码率（编码器尚未创建时在 reset 中补取）
+        self.levels: List[Optional[int]] = []
+        self._build_levels()
+
+        self.level = 0
+        self.fec = False
+        self.packet_loss_perc = 0
+        self._last_change = time.monotonic()
+        self._last_probe_timeouts = 0
+        self.decisions = deque(maxlen=200)
+
+    def _build_levels(self):
+        """
+        以编码器初始码率为 0 档，其后为更低的降档码率.
+        """
+        baseline = self.audio_codec.get_encoder_params().get("bitrate")
+        if baseline is None:
+            self.levels = [None]
+            return
+        self.levels = [baseline] + [
+            bitrate for bitrate in self.DEGRADED_BITRATES if bitrate < baseline
+        ]
+
+    @property
+    def degraded(self) -> bool:
+        return self.level != 0 or self.fec or self.packet_loss_perc != 0
+
+    def settings(self, level: Optional[int] = None) -> dict:
+        """
+        指定档位（默认当前档位）对应的编码参数.
+        """
+        return {
+            "bitrate": self.levels[self.level if level is None else level],
+            "fec": self.fec,
+            "packet_loss_perc": self.packet_loss_perc,
+        }
+
+    def apply(self):
+        """
+        把当前参数下发给编码器（在音频线程的下一帧生效）
+        """
+        self.audio_codec.set_encoder_params(**self.settings())
+
+    def reset(self):
+        """
+        新会话回到 0 档，FEC 关闭（已在 0 档时不改动编码器）
+        """
+        self._last_change = time.monotonic()
+        if self.levels == [None]:
+            self._build_levels()
+        if not self.degraded:
+            return
+        self.level = 0
+        self.fec = False
+        self.packet_loss_perc = 0
+        self.apply()
+
+    def evaluate(self) -> Optional[dict]:
+        """评估一次网络状况并在需要时调整参数.
+
+        Returns:
+            dict: 发生调整时返回决策记录，否则为 None
+        """
+        stats = self.protocol.get_network_quality()
+        backlog = self._send_backlog()
+        rtt = stats.get("rtt_avg_ms")
+        loss = stats.get("loss_rate") or 0.0
+        timeouts = stats.get("probe_timeouts", 0)
+        new_timeouts = timeouts - self._last_probe_timeouts
+        self._last_probe_timeouts = timeouts
+
+        reasons = []
+        if backlog >= self.max_backlog:
+            reasons.append(f"发送积压 {backlog} 帧")
+        if rtt is not None and rtt >= self.max_rtt_ms:
+            reasons.append(f"RTT {rtt:.0f}ms")
+        if new_timeouts > 0:
+            reasons.append(f"探测超时 {new_timeouts} 次")
+
+        now = time.monotonic()
+        level = self.level
+        if reasons:
+            level = min(self.level + 1, len(self.levels) - 1)
+        elif (
+            now - self._last_change >= self.hold_sec
+            and backlog == 0
+            and (rtt is None or rtt < self.max_rtt_ms * 0.6)
+        ):
+            level = max(self.level - 1, 0)
+            reasons.append(f"已稳定 {now - self._last_change:.0f}s")
+
+        # FEC 与丢包率：开启阈值高于关闭阈值（迟滞）
+        fec = self.fec
+        if loss >= self.fec_loss:
+            fec = True
+        elif loss < self.fec_loss / 2:
+            fec = False
+        # 按 5% 量化，避免丢包率小幅波动也触发调整
+        packet_loss_perc = min(30, 5 * max(1, round(loss * 20))) if fec else 0
+        if (fec, packet_loss_perc) != (self.fec, self.packet_loss_perc):
+            reasons.append(f"丢包 {loss * 100:.1f}%")
+
+        if (level, fec, packet_loss_perc) == (
+            self.level,
+            self.fec,
+            self.packet_loss_perc,
+        ):
+            return None
+
+        before = self.settings()
+        if level != self.level:
+            self._last_change = now
+        self.level = level
+        self.fec = fec
+        self.packet_loss_perc = packet_loss_perc
+        after = self.settings()
+        self.apply()
+
+        decision = {
+            "time": time.time(),
+            "level": level,
+            "before": before,
+            "after": after,
+            "inputs": {
+                "backlog": backlog,
+                "rtt_ms": rtt,
+                "loss_rate": loss,
+                "jitter_ms": stats.get("jitter_ms"),
+                "probe_timeouts": new_timeouts,
+            },
+            "reason": "，".join(reasons),
+        }
+        self.decisions.append(decision)
+        logger.info(
+            f"Opus自适应: 码率 {before['bitrate']}->{after['bitrate']}，"
+            f"FEC {'开' if after['fec'] else '关'}(丢包预估 {packet_loss_perc}%)，"
+            f"原因: {decision['reason']}"
+        )
+        return decision
+
+    async def run(self):
+        """
+        周期性评估，仅在音频上行进行时调整.
+        """
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                if not self._is_active():
+                    continue
+                try:
+                    self.evaluate()
+                except Exception as e:
+                    logger.warning(f"Opus自适应评估失败: {e}")
+        except asyncio.CancelledError:
+            pass
+
+    def get_stats(self) -> dict:
+        return {
+            "level": self.level,
+            "settings": self.settings(),
+            "levels": self.levels,
+            "decisions": len(self.decisions),
+            "last_decision": self.decisions[-1] if self.decisions else None,
+        }
@@ -1,13 +1,16 @@
 import ctypes
 import platform
+import time
 from collections import deque
 from typing import Any, Dict, Optional
 
 import numpy as np
 import sounddevice as sd
+import soxr
 
 from libs.webrtc_apm import WebRTCAudioProcessing, create_default_config
 from src.constants.constants import AudioConfig
+from src.utils.config_manager import ConfigManager
 from src.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -42,6 +45,31 @@ class AECProcessor:
         self._webrtc_frame_size = 160  # WebRTC标准：16kHz, 10ms = 160 samples
         self._system_frame_size = AudioConfig.INPUT_FRAME_SIZE  # 系统配置的帧大小
         
+        # 播放参考模式（Linux）：直接使用 AudioCodec 自身的播放数据作为参考信号
+        config = ConfigManager.get_instance()
+        self._playout_reference_enabled = config.get_config(
+            "AEC_OPTIONS.PLAYOUT_REFERENCE", True
+        )
+        self._use_playout_reference = False
+        self._render_resampler = None  # 设备输出采样率 -> 16kHz（流式，保留状态）
+        self._render_source_rate = None
+        self._render_pending = np.zeros(0, dtype=np.int16)
+        self._render_pending_time = None  # 待切分数据首个样本的播放时刻
+        # (播放时刻, 10ms参考帧)，约500ms上限
+        self._render_chunks = deque(maxlen=50)
+
+        # 延迟测量（秒）与对齐延迟（毫秒）
+        self._output_latency = None
+        self._input_latency = None
+        self._stream_delay_ms = 40
+
+        # ERLE统计（仅在参考信号有能量时累计）
+        self._render_active_threshold = 100.0  # 参考帧RMS阈值
+        self._render_active = False
+        self._erle_in_power = 0.0
+        self._erle_out_power = 0.0
+        self._erle_alpha = 0.05
+
         # 状态标志
         self._is_initialized = False
         self._is_closing = False
@@ -49,7 +77,11 @@ class AECProcessor:
     async def initialize(self):
         """初始化AEC处理器"""
         try:
-            if self._is_windows or self._is_linux:
+            if self._is_linux and self._playout_reference_enabled:
+                # Linux 平台使用 WebRTC + 自身播放数据作为参考信号
+                await self._initialize_apm()
+                self._use_playout_reference = True
+            elif self._is_windows or self._is_linux:
                 # Windows 和 Linux 平台使用系统级AEC，无需额外处理
                 logger.info(f"{self._platform.capitalize()} 平台使用系统级回声消除，AEC处理器已启用")
                 self._is_initialized = True
@@ -71,26 +103,33 @@ class AECProcessor:
             await self.close()
             raise
     
+    @staticmethod
+    def create_apm_config():
+        """创建AEC处理器使用的WebRTC APM配置（离线评估脚本复用）"""
+        config = create_default_config()
+        
+        # 启用回声消除
+        config.echo.enabled = True
+        config.echo.mobile_mode = False
+        config.echo.enforce_high_pass_filtering = True
+        
+        # 启用噪声抑制
+        config.noise_suppress.enabled = True
+        config.noise_suppress.noise_level = 2  # HIGH
+        
+        # 启用高通滤波器
+        config.high_pass.enabled = True
+        config.high_pass.apply_in_full_band = True
+        
+        return config
+    
     async def _initialize_apm(self):
         """初始化WebRTC音频处理模块"""
         try:
             self.apm = WebRTCAudioProcessing()
             
             # 创建配置
-            self.apm_config = create_default_config()
-            
-            # 启用回声消除
-            self.apm_config.echo.enabled = True
-            self.apm_config.echo.mobile_mode = False
-            self.apm_config.echo.enforce_high_pass_filtering = True
-            
-            # 启用噪声抑制
-            self.apm_config.noise_suppress.enabled = True
-            self.apm_config.noise_suppress.noise_level = 2  # HIGH
-            
-            # 启用高通滤波器
-            self.apm_config.high_pass.enabled = True
-            self.apm_config.high_pass.apply_in_full_band = True
+            self.apm_config = self.create_apm_config()
             
             # 应用配置
             result = self.apm.apply_config(self.apm_config)
@@ -105,7 +144,7 @@ class AECProcessor:
             self.render_config = self.apm.create_stream_config(sample_rate, channels)
             
             # 设置流延迟
-            self.apm.set_stream_delay_ms(40)  # 50ms延迟
+            self.apm.set_stream_delay_ms(self._stream_delay_ms)
             
             logger.info("WebRTC APM初始化完成")
             
@@ -221,13 +260,96 @@ class AECProcessor:
         """参考信号流结束回调"""
         logger.info("参考信号流已结束")
     
-    def process_audio(self, capture_audio: np.ndarray) -> np.ndarray:
+    def is_webrtc_active(self) -> bool:
+        """
+        是否在应用层使用 WebRTC APM 处理采集音频（macOS 或 Linux 播放参考模式）
+        """
+        return self._is_initialized and self.apm is not None and (
+            self._is_macos or self._use_playout_reference
+        )
+
+    def uses_playout_reference(self) -> bool:
+        """
+        是否需要 AudioCodec 推送播放数据作为参考信号.
+        """
+        return self._use_playout_reference and not self._is_closing
+
+    def push_playout_reference(
+        self, samples: np.ndarray, sample_rate: int, output_latency: float
+    ):
+        """
+        推送一块即将播放的PCM作为参考信号（在播放回调线程中调用）
+
+        Args:
+            samples: 写入输出设备的音频数据 (int16, 单声道)
+            sample_rate: 输出设备采样率
+            output_latency: 测得的该块数据到达扬声器的延迟（秒）
+        """
+        if not self.uses_playout_reference():
+            return
+
+        try:
+            now = time.monotonic()
+            self._output_latency = self._smooth(self._output_latency, output_latency)
+
+            # 重采样到16kHz（流式重采样器保留跨块状态，避免块边界失真）
+            if sample_rate != AudioConfig.INPUT_SAMPLE_RATE:
+                if (
+                    self._render_resampler is None
+                    or self._render_source_rate != sample_rate
+                ):
+                    self._render_resampler = soxr.ResampleStream(
+                        sample_rate,
+                        AudioConfig.INPUT_SAMPLE_RATE,
+                        AudioConfig.CHANNELS,
+                        dtype="int16",
+                        quality="QQ",
+                    )
+                    self._render_source_rate = sample_rate
+                    logger.info(
+                        f"参考信号重采样: {sample_rate}Hz -> {AudioConfig.INPUT_SAMPLE_RATE}Hz"
+                    )
+                samples = self._render_resampler.resample_chunk(samples, last=False)
+
+            if len(samples) == 0:
+                return
+
+            # 待切分缓冲区首样本的播放时刻
+            if len(self._render_pending) == 0:
+                self._render_pending_time = now + output_latency
+            self._render_pending = np.concatenate(
+                (self._render_pending, samples.astype(np.int16, copy=False))
+            )
+
+            # 切分为10ms帧，按样本位置推算每帧的播放时刻
+            frame_size = self._webrtc_frame_size
+            num_frames = len(self._render_pending) // frame_size
+            if num_frames == 0:
+                return
+            frame_duration = frame_size / AudioConfig.INPUT_SAMPLE_RATE
+            frames = self._render_pending[: num_frames * frame_size].reshape(
+                num_frames, frame_size
+            )
+            for i in range(num_frames):
+                self._render_chunks.append(
+                    (self._render_pending_time + i * frame_duration, frames[i].copy())
+                )
+            self._render_pending = self._render_pending[num_frames * frame_size :]
+            self._render_pending_time += num_frames * frame_duration
+
+        except Exception as e:
+            logger.error(f"推送播放参考信号失败: {e}")
+
+    def process_audio(
+        self, capture_audio: np.ndarray, input_latency: Optional[float] = None
+    ) -> np.ndarray:
         """
         处理音频帧，应用AEC
         支持10ms/20ms/40ms/60ms等不同帧长度，通过分割处理实现
         
         Args:
             capture_audio: 麦克风采集的音频数据 (16kHz, int16)
+            input_latency: 帧末样本从被采集到现在的延迟（秒），播放参考模式用于时间对齐
             
         Returns:
             处理后的音频数据
@@ -235,6 +357,10 @@ class AECProcessor:
         if not self._is_initialized:
             return capture_audio
         
+        # Linux 播放参考模式：按时间戳对齐参考帧后交给 WebRTC 处理
+        if self._use_playout_reference and self.apm is not None:
+            return self._process_playout_aligned(capture_audio, input_latency)
+
         # Windows 和 Linux 平台直接返回原始音频（系统级处理）
         if self._is_windows or self._is_linux:
             return capture_audio
@@ -263,37 +389,142 @@ class AECProcessor:
             logger.error(f"AEC处理失败: {e}")
             return capture_audio
     
-    def _process_single_aec_frame(self, capture_audio: np.ndarray) -> np.ndarray:
-        """处理单个10ms WebRTC帧"""
-        # 获取参考信号
-        reference_audio = self._get_reference_frame(self._webrtc_frame_size)
-        
-        # 创建ctypes缓冲区
-        capture_buffer = (ctypes.c_short * self._webrtc_frame_size)(*capture_audio)
-        reference_buffer = (ctypes.c_short * self._webrtc_frame_size)(*reference_audio)
-        
-        processed_capture = (ctypes.c_short * self._webrtc_frame_size)()
+    def _process_playout_aligned(
+        self, capture_audio: np.ndarray, input_latency: Optional[float]
+    ) -> np.ndarray:
+        """
+        播放参考模式：每个10ms采集块之前，先送入在该块结束前已播放的参考帧
+        """
+        frame_size = self._webrtc_frame_size
+        if len(capture_audio) % frame_size != 0:
+            logger.warning(f"音频帧大小不是WebRTC帧的整数倍: {len(capture_audio)}, WebRTC帧: {frame_size}")
+            return capture_audio
+
+        try:
+            frame_duration = frame_size / AudioConfig.INPUT_SAMPLE_RATE
+            if input_latency is not None:
+                self._input_latency = self._smooth(self._input_latency, input_latency)
+            latency = self._input_latency or 0.0
+            # 帧首样本的采集时刻
+            capture_start = (
+                time.monotonic() - latency - len(capture_audio) / AudioConfig.INPUT_SAMPLE_RATE
+            )
+
+            num_chunks = len(capture_audio) // frame_size
+            processed_chunks = []
+            for i in range(num_chunks):
+                chunk_end = capture_start + (i + 1) * frame_duration
+                last_play_time = None
+                render_power = 0.0
+                # 送入在该采集块结束前已经到达扬声器的参考帧
+                while self._render_chunks and self._render_chunks[0][0] <= chunk_end:
+                    play_time, reference = self._render_chunks.popleft()
+                    self._process_render_frame(reference)
+                    last_play_time = play_time
+                    render_power = max(
+                        render_power, float(np.mean(reference.astype(np.float32) ** 2))
+                    )
+
+                if last_play_time is not None:
+                    self._render_active = (
+                        render_power > self._render_active_threshold ** 2
+                    )
+                    self._update_stream_delay((chunk_end - last_play_time) * 1000)
+
+                chunk = capture_audio[i * frame_size : (i + 1) * frame_size]
+                processed = self._process_capture_frame(chunk)
+                if self._render_active:
+                    self._update_erle(chunk, processed)
+                processed_chunks.append(processed)
+
+            return np.concatenate(processed_chunks)
+
+        except Exception as e:
+            logger.error(f"AEC处理失败: {e}")
+            return capture_audio
+
+    def _update_stream_delay(self, delay_ms: float):
+        """
+        更新 WebRTC 流延迟（仅在变化明显时下发，避免频繁调用）
+        """
+        delay_ms = int(round(max(0.0, delay_ms)))
+        if abs(delay_ms - self._stream_delay_ms) >= 5:
+            self._stream_delay_ms = delay_ms
+            self.apm.set_stream_delay_ms(delay_ms)
+
+    def _update_erle(self, capture: np.ndarray, processed: np.ndarray):
+        """
+        累计回声期间的输入/输出功率，用于计算ERLE.
+        """
+        alpha = self._erle_alpha
+        in_power = float(np.mean(capture.astype(np.float32) ** 2))
+        out_power = float(np.mean(processed.astype(np.float32) ** 2))
+        self._erle_in_power += alpha * (in_power - self._erle_in_power)
+        self._erle_out_power += alpha * (out_power - self._erle_out_power)
+
+    def get_erle_db(self) -> Optional[float]:
+        """
+        回声回波损耗增强（ERLE，dB），尚无回声统计时返回None.
+        """
+        if self._erle_in_power <= 0.0:
+            return None
+        return float(
+            10.0 * np.log10(self._erle_in_power / max(self._erle_out_power, 1e-6))
+        )
+
+    @staticmethod
+    def _smooth(current: Optional[float], value: float, alpha: float = 0.1) -> float:
+        """
+        指数平滑.
+        """
+        if current is None:
+            return value
+        return current + alpha * (value - current)
+
+    def _process_render_frame(self, reference_audio: np.ndarray):
+        """
+        处理单个10ms参考帧（render stream）
+        """
+        reference_buffer = (ctypes.c_short * self._webrtc_frame_size).from_buffer_copy(
+            reference_audio.astype(np.int16, copy=False).tobytes()
+        )
         processed_reference = (ctypes.c_short * self._webrtc_frame_size)()
-        
-        # 首先处理参考信号（render stream）
+
         render_result = self.apm.process_reverse_stream(
             reference_buffer, self.render_config, self.render_config, processed_reference
         )
-        
+
         if render_result != 0:
             logger.warning(f"参考信号处理失败，错误码: {render_result}")
-        
-        # 然后处理采集信号（capture stream）
+
+    def _process_capture_frame(self, capture_audio: np.ndarray) -> np.ndarray:
+        """
+        处理单个10ms采集帧（capture stream）
+        """
+        capture_buffer = (ctypes.c_short * self._webrtc_frame_size).from_buffer_copy(
+            capture_audio.astype(np.int16, copy=False).tobytes()
+        )
+        processed_capture = (ctypes.c_short * self._webrtc_frame_size)()
+
         capture_result = self.apm.process_stream(
             capture_buffer, self.capture_config, self.capture_config, processed_capture
         )
-        
+
         if capture_result != 0:
             logger.warning(f"采集信号处理失败，错误码: {capture_result}")
             return capture_audio
-        
+
         # 转换回numpy数组
-        return np.array(processed_capture, dtype=np.int16)
+        return np.frombuffer(processed_capture, dtype=np.int16).copy()
+
+    def _process_single_aec_frame(self, capture_audio: np.ndarray) -> np.ndarray:
+        """处理单个10ms WebRTC帧"""
+        # 获取参考信号
+        reference_audio = self._get_reference_frame(self._webrtc_frame_size)
+        
+        # 首先处理参考信号（render stream），然后处理采集信号（capture stream）
+        self._process_render_frame(reference_audio)
+        return self._process_capture_frame(capture_audio)
     
     def _process_chunked_aec_frames(self, capture_audio: np.ndarray, num_chunks: int) -> np.ndarray:
         """分割处理大帧（20ms/40ms/60ms等）"""
@@ -327,6 +558,10 @@ class AECProcessor:
     
     def is_reference_available(self) -> bool:
         """检查参考信号是否可用"""
+        if self._use_playout_reference:
+            # 播放参考模式：只要APM就绪，参考信号即来自自身播放流
+            return self._is_initialized and self.apm is not None
+
         if self._is_windows or self._is_linux:
             # Windows 和 Linux 使用系统级AEC，总是可用
             return self._is_initialized
@@ -349,6 +584,29 @@ class AECProcessor:
                 'aec_type': 'system_level',
                 'description': 'Windows 系统底层回声消除'
             })
+        elif self._is_linux and self._use_playout_reference:
+            erle_db = self.get_erle_db()
+            path_delay = None
+            if self._output_latency is not None and self._input_latency is not None:
+                path_delay = round((self._output_latency + self._input_latency) * 1000, 1)
+            status.update({
+                'aec_type': 'webrtc_playout',
+                'description': 'WebRTC + 自身播放流参考信号',
+                'webrtc_apm_active': self.apm is not None,
+                'output_latency_ms': (
+                    round(self._output_latency * 1000, 1)
+                    if self._output_latency is not None else None
+                ),
+                'input_latency_ms': (
+                    round(self._input_latency * 1000, 1)
+                    if self._input_latency is not None else None
+                ),
+                'estimated_delay_ms': path_delay,
+                'stream_delay_ms': self._stream_delay_ms,
+                'reference_buffer_frames': len(self._render_chunks),
+                'render_active': self._render_active,
+                'erle_db': round(erle_db, 1) if erle_db is not None else None,
+            })
         elif self._is_linux:
             status.update({
                 'aec_type': 'system_level',
@@ -379,8 +637,8 @@ class AECProcessor:
         logger.info("开始关闭AEC处理器...")
         
         try:
-            # 仅在 macOS 平台清理 WebRTC 相关资源
-            if self._is_macos:
+            # 仅在应用层使用 WebRTC 的平台清理相关资源
+            if self._is_macos or self._use_playout_reference:
                 # 停止参考信号流
                 if self.reference_stream:
                     try:
@@ -407,6 +665,10 @@ class AECProcessor:
             
             # 清理缓冲区
             self._reference_buffer.clear()
+            self._render_chunks.clear()
+            self._render_pending = np.zeros(0, dtype=np.int16)
+            self._render_resampler = None
+            self._use_playout_reference = False
             
             self._is_initialized = False
             logger.info("AEC处理器已关闭")
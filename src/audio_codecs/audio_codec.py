@@ -12,9 +12,13 @@ import soxr
 from src.audio_codecs.aec_processor import AECProcessor
 from src.constants.constants import AudioConfig
 from src.utils.config_manager import ConfigManager
-from src.utils.logging_config import get_logger
+from src.utils.latency_tracer import get_latency_tracer
+from src.utils.logging_config import get_logger, get_rate_limited_logger
+from src.utils.metrics import get_metrics
 
 logger = get_logger(__name__)
+# 音频回调线程上的日志：延迟格式化并限频，避免刷屏
+throttled_logger = get_rate_limited_logger(__name__)
 
 
 class AudioCodec:
@@ -46,7 +50,28 @@ class AudioCodec:
         self._resample_input_buffer = deque()
         self._resample_output_buffer = deque()
 
+        # 重采样质量与流延迟档位（由硬件校准写入配置）
+        self._resample_quality = self.config.get_config(
+            "AUDIO_OPTIONS.RESAMPLE_QUALITY", "QQ"
+        )
+        self._stream_latency = self.config.get_config(
+            "AUDIO_OPTIONS.STREAM_LATENCY", "low"
+        )
+
+        # 输出流延迟档位与块时长（由输出流调优按设备调整）
+        self.output_device_name = None
+        self._output_latency = self._stream_latency
+        self._output_block_ms = AudioConfig.FRAME_DURATION
+        # 直接播放时上一块未播完的剩余样本
+        self._output_remainder = None
+        # 低功耗待机：播放流停止，采集只供唤醒词检测
+        self._low_power = False
+        self._wake_latency_ms = None
+        # 欠载/溢出计数（音频线程累加，调优任务读取）
+        self._xruns = {"input_overflow": 0, "output_underflow": 0}
+
         self._device_input_frame_size = None
+        self._output_stream_sample_rate = None  # 输出流实际采样率（AEC参考信号用）
         self._is_closing = False
 
         # 音频流对象
@@ -59,11 +84,51 @@ class AudioCodec:
 
         # 实时编码回调（直接发送，不走队列）
         self._encoded_audio_callback = None
+        # 编码参数：由事件循环线程提交，音频线程在下一帧编码前应用
+        self._pending_encoder_params = None
+        # 当前生效的编码参数快照（只在创建编码器和音频线程应用参数时整体替换）
+        self._encoder_params = {}
+
+        # 采集帧监听者（AEC之后的16kHz帧，在音频线程中同步调用，如打断检测）
+        self._audio_listeners = ()
+        # 最近一次播放块的RMS电平（供监听者估计残余回声）
+        self._playback_level = 0.0
 
         # AEC处理器
         self.aec_processor = AECProcessor()
         self._aec_enabled = False
 
+        # 延迟打点（首个解码帧/首个播放帧）
+        self._latency_tracer = get_latency_tracer()
+
+        # 性能指标：抓取时读取，不在音频线程上写入
+        get_metrics().register_collector("audio", self._collect_metrics)
+
+    def _collect_metrics(self, registry):
+        """
+        指标采集：流参数、欠载/溢出累计次数与队列深度.
+        """
+        stats = self.get_stream_stats()
+        registry.describe(
+            "xiaozhi_audio_output_underflows_total", "counter", "播放流欠载次数"
+        )
+        registry.describe(
+            "xiaozhi_audio_input_overflows_total", "counter", "录音流溢出次数"
+        )
+        registry.set(
+            "xiaozhi_audio_output_underflows_total",
+            stats["output_underflow"],
+            kind="counter",
+        )
+        registry.set(
+            "xiaozhi_audio_input_overflows_total", stats["input_overflow"], kind="counter"
+        )
+        registry.set("xiaozhi_audio_output_latency_ms", stats["output_latency_ms"])
+        registry.set("xiaozhi_audio_output_block_ms", stats["output_block_ms"])
+        registry.set("xiaozhi_audio_low_power", int(stats["low_power"]))
+        registry.set("xiaozhi_audio_output_queue_frames", self._output_buffer.qsize())
+        registry.set("xiaozhi_audio_wakeword_queue_frames", self._wakeword_buffer.qsize())
+
     async def initialize(self):
         """
         初始化音频设备.
@@ -80,6 +145,8 @@ class AudioCodec:
             self.device_output_sample_rate = int(
                 output_device_info["default_samplerate"]
             )
+            self.output_device_name = output_device_info["name"]
+            self._load_output_tuning()
             frame_duration_sec = AudioConfig.FRAME_DURATION / 1000
             self._device_input_frame_size = int(
                 self.device_input_sample_rate * frame_duration_sec
@@ -93,11 +160,7 @@ class AudioCodec:
             sd.default.channels = AudioConfig.CHANNELS
             sd.default.dtype = np.int16
             await self._create_streams()
-            self.opus_encoder = opuslib.Encoder(
-                AudioConfig.INPUT_SAMPLE_RATE,
-                AudioConfig.CHANNELS,
-                opuslib.APPLICATION_AUDIO,
-            )
+            self._create_opus_encoder()
             self.opus_decoder = opuslib.Decoder(
                 AudioConfig.OUTPUT_SAMPLE_RATE, AudioConfig.CHANNELS
             )
@@ -117,6 +180,48 @@ class AudioCodec:
             await self.close()
             raise
 
+    def _load_output_tuning(self):
+        """
+        读取该输出设备上次调优得到的延迟档位与块时长.
+        """
+        tuning = self.config.get_config("AUDIO_OPTIONS.OUTPUT_TUNING", {}) or {}
+        saved = tuning.get(self.output_device_name)
+        if not saved:
+            return
+        self._output_latency = saved.get("LATENCY", self._output_latency)
+        self._output_block_ms = saved.get("BLOCK_MS", self._output_block_ms)
+        logger.info(
+            f"输出设备 {self.output_device_name} 使用调优参数: "
+            f"latency={self._output_latency}, 块时长 {self._output_block_ms}ms"
+        )
+
+    def _output_stream_params(self):
+        """
+        输出流采样率与块大小：设备支持24kHz时直接使用，否则用设备默认采样率并重采样.
+        """
+        if self.device_output_sample_rate == AudioConfig.OUTPUT_SAMPLE_RATE:
+            sample_rate = AudioConfig.OUTPUT_SAMPLE_RATE
+        else:
+            sample_rate = self.device_output_sample_rate
+        return sample_rate, int(sample_rate * self._output_block_ms / 1000)
+
+    def _open_output_stream(self):
+        """
+        按当前参数创建并启动输出流.
+        """
+        output_sample_rate, blocksize = self._output_stream_params()
+        self.output_stream = sd.OutputStream(
+            samplerate=output_sample_rate,
+            channels=AudioConfig.CHANNELS,
+            dtype=np.int16,
+            blocksize=blocksize,
+            callback=self._output_callback,
+            finished_callback=self._output_finished_callback,
+            latency=self._output_latency,
+        )
+        self._output_stream_sample_rate = output_sample_rate
+        self.output_stream.start()
+
     async def _create_resamplers(self):
         """
         创建重采样器 输入：设备采样率 -> 16kHz（用于编码） 输出：24kHz -> 设备采样率（播放用）
@@ -128,7 +233,7 @@ class AudioCodec:
                 AudioConfig.INPUT_SAMPLE_RATE,
                 AudioConfig.CHANNELS,
                 dtype="int16",
-                quality="QQ",
+                quality=self._resample_quality,
             )
             logger.info(f"输入重采样: {self.device_input_sample_rate}Hz -> 16kHz")
 
@@ -139,7 +244,7 @@ class AudioCodec:
                 self.device_output_sample_rate,
                 AudioConfig.CHANNELS,
                 dtype="int16",
-                quality="QQ",
+                quality=self._resample_quality,
             )
             logger.info(
                 f"输出重采样: {AudioConfig.OUTPUT_SAMPLE_RATE}Hz -> {self.device_output_sample_rate}Hz"
@@ -163,58 +268,44 @@ class AudioCodec:
 
     async def _create_streams(self):
         """
-        创建音频流.
+        创建音频流（打开设备在部分板卡上较慢，放到线程池中执行）
         """
         try:
-            # 麦克风输入流，使用指定设备
-            self.input_stream = sd.InputStream(
-                device=self.mic_device_id,  # 指定麦克风设备ID
-                samplerate=self.device_input_sample_rate,
-                channels=AudioConfig.CHANNELS,
-                dtype=np.int16,
-                blocksize=self._device_input_frame_size,
-                callback=self._input_callback,
-                finished_callback=self._input_finished_callback,
-                latency="low",
-            )
-
-            # 根据设备支持的采样率选择输出采样率
-            if self.device_output_sample_rate == AudioConfig.OUTPUT_SAMPLE_RATE:
-                # 设备支持24kHz，直接使用
-                output_sample_rate = AudioConfig.OUTPUT_SAMPLE_RATE
-                device_output_frame_size = AudioConfig.OUTPUT_FRAME_SIZE
-            else:
-                # 设备不支持24kHz，使用设备默认采样率并启用重采样
-                output_sample_rate = self.device_output_sample_rate
-                device_output_frame_size = int(
-                    self.device_output_sample_rate * (AudioConfig.FRAME_DURATION / 1000)
-                )
-
-            self.output_stream = sd.OutputStream(
-                samplerate=output_sample_rate,
-                channels=AudioConfig.CHANNELS,
-                dtype=np.int16,
-                blocksize=device_output_frame_size,
-                callback=self._output_callback,
-                finished_callback=self._output_finished_callback,
-                latency="low",
-            )
-
-            self.input_stream.start()
-            self.output_stream.start()
-
+            await asyncio.to_thread(self._open_streams)
             logger.info("音频流已启动")
 
         except Exception as e:
             logger.error(f"创建音频流失败: {e}")
             raise
 
+    def _open_streams(self):
+        """
+        打开并启动输入/输出流.
+        """
+        # 麦克风输入流，使用指定设备
+        self.input_stream = sd.InputStream(
+            device=self.mic_device_id,  # 指定麦克风设备ID
+            samplerate=self.device_input_sample_rate,
+            channels=AudioConfig.CHANNELS,
+            dtype=np.int16,
+            blocksize=self._device_input_frame_size,
+            callback=self._input_callback,
+            finished_callback=self._input_finished_callback,
+            latency=self._stream_latency,
+        )
+
+        self.input_stream.start()
+        self._open_output_stream()
+
     def _input_callback(self, indata, frames, time_info, status):
         """
         录音回调，硬件驱动调用 处理流程：原始音频 -> 重采样16kHz -> 编码发送 + 唤醒词检测.
         """
-        if status and "overflow" not in str(status).lower():
-            logger.warning(f"输入流状态: {status}")
+        if status:
+            if status.input_overflow:
+                self._xruns["input_overflow"] += 1
+            elif "overflow" not in str(status).lower():
+                throttled_logger.warning("输入流状态: %s", status)
 
         if self._is_closing:
             return
@@ -228,13 +319,35 @@ class AudioCodec:
                 if audio_data is None:
                     return
 
-            # 应用AEC处理（仅 macOS 需要）
-            if (self._aec_enabled and len(audio_data) == AudioConfig.INPUT_FRAME_SIZE and self.aec_processor._is_macos):
+            # 低功耗待机：没有播放也不上行，跳过AEC/监听者/编码，只喂唤醒词检测
+            if self._low_power:
+                self._put_audio_data_safe(self._wakeword_buffer, audio_data)
+                return
 
+            # 应用AEC处理（macOS / Linux 播放参考模式）
+            if (
+                self._aec_enabled
+                and len(audio_data) == AudioConfig.INPUT_FRAME_SIZE
+                and self.aec_processor.is_webrtc_active()
+            ):
                 try:
-                    audio_data = self.aec_processor.process_audio(audio_data)
+                    # 帧末样本的采集延迟 = 设备输入延迟 + 重采样缓冲中尚未取出的样本
+                    input_latency = self._measure_stream_latency(
+                        time_info, frames, is_input=True
+                    ) + len(self._resample_input_buffer) / AudioConfig.INPUT_SAMPLE_RATE
+                    audio_data = self.aec_processor.process_audio(
+                        audio_data, input_latency
+                    )
                 except Exception as e:
-                    logger.warning(f"AEC处理失败，使用原始音频: {e}")
+                    throttled_logger.warning("AEC处理失败，使用原始音频: %s", e)
+
+            # 分发给采集帧监听者（共享同一采集流，不再单独打开麦克风）
+            if self._audio_listeners and len(audio_data) == AudioConfig.INPUT_FRAME_SIZE:
+                for listener in self._audio_listeners:
+                    try:
+                        listener(audio_data)
+                    except Exception as e:
+                        throttled_logger.warning("采集帧监听者处理失败: %s", e)
 
             # 实时编码并发送（不走队列，减少延迟）
             if (
@@ -242,22 +355,102 @@ class AudioCodec:
                 and len(audio_data) == AudioConfig.INPUT_FRAME_SIZE
             ):
                 try:
+                    if self._pending_encoder_params is not None:
+                        self._apply_encoder_params()
                     pcm_data = audio_data.astype(np.int16).tobytes()
                     encoded_data = self.opus_encoder.encode(
                         pcm_data, AudioConfig.INPUT_FRAME_SIZE
                     )
-
                     if encoded_data:
                         self._encoded_audio_callback(encoded_data)
 
                 except Exception as e:
-                    logger.warning(f"实时录音编码失败: {e}")
+                    throttled_logger.warning("实时录音编码失败: %s", e)
 
             # 同时提供给唤醒词检测（走队列）
             self._put_audio_data_safe(self._wakeword_buffer, audio_data.copy())
 
         except Exception as e:
-            logger.error(f"输入回调错误: {e}")
+            throttled_logger.error("输入回调错误: %s", e)
+
+    def set_encoder_params(
+        self,
+        bitrate: Optional[int] = None,
+        fec: Optional[bool] = None,
+        packet_loss_perc: Optional[int] = None,
+    ):
+        """提交上行编码参数（线程安全，下一帧编码前生效）
+
+        Args:
+            bitrate: 码率(bps)
+            fec: 是否开启带内FEC
+            packet_loss_perc: 预估丢包率(0-100)，影响FEC冗余量
+        """
+        params = {
+            "bitrate": bitrate,
+            "fec": fec,
+            "packet_loss_perc": packet_loss_perc,
+        }
+        # 整体替换引用，音频线程读取时无需加锁
+        self._pending_encoder_params = {
+            key: value for key, value in params.items() if value is not None
+        }
+
+    def _apply_encoder_params(self):
+        """
+        在音频线程中应用待生效的编码参数，避免与 encode 并发调用编码器.
+        """
+        params, self._pending_encoder_params = self._pending_encoder_params, None
+        if not params or not self.opus_encoder:
+            return
+        try:
+            if "bitrate" in params:
+                self.opus_encoder.bitrate = params["bitrate"]
+            if "fec" in params:
+                # opuslib 的 inband_fec setter 漏传了参数，直接调用 ctl
+                opuslib.api.encoder.encoder_ctl(
+                    self.opus_encoder.encoder_state,
+                    opuslib.api.ctl.set_inband_fec,
+                    int(params["fec"]),
+                )
+            if "packet_loss_perc" in params:
+                self.opus_encoder.packet_loss_perc = params["packet_loss_perc"]
+        except Exception as e:
+            throttled_logger.warning("应用编码参数失败: %s", e)
+        finally:
+            self._snapshot_encoder_params()
+
+    def _create_opus_encoder(self):
+        """
+        创建上行编码器并记录其初始参数（此时尚未开始实时编码）
+        """
+        self.opus_encoder = opuslib.Encoder(
+            AudioConfig.INPUT_SAMPLE_RATE,
+            AudioConfig.CHANNELS,
+            opuslib.APPLICATION_AUDIO,
+        )
+        self._snapshot_encoder_params()
+
+    def _snapshot_encoder_params(self):
+        """
+        读取编码器当前参数，只能在创建编码器时或音频线程中调用.
+        """
+        try:
+            self._encoder_params = {
+                "bitrate": self.opus_encoder.bitrate,
+                "fec": bool(self.opus_encoder.inband_fec),
+                "packet_loss_perc": self.opus_encoder.packet_loss_perc,
+            }
+        except Exception as e:
+            throttled_logger.warning("读取编码参数失败: %s", e)
+
+    def get_encoder_params(self) -> dict:
+        """
+        当前生效的上行编码参数（读取快照，不访问编码器，可在任意线程调用）
+        """
+        if not self.opus_encoder:
+            return {}
+        return dict(self._encoder_params)
 
     def _process_input_resampling(self, audio_data):
         """
@@ -279,7 +472,7 @@ class AudioCodec:
             return np.array(frame_data, dtype=np.int16)
 
         except Exception as e:
-            logger.error(f"输入重采样失败: {e}")
+            throttled_logger.error("输入重采样失败: %s", e)
             return None
 
     def _put_audio_data_safe(self, queue, audio_data):
@@ -300,8 +493,10 @@ class AudioCodec:
         播放回调，硬件驱动调用 从播放队列取数据输出到扬声器.
         """
         if status:
-            if "underflow" not in str(status).lower():
-                logger.warning(f"输出流状态: {status}")
+            if status.output_underflow:
+                self._xruns["output_underflow"] += 1
+            elif "underflow" not in str(status).lower():
+                throttled_logger.warning("输出流状态: %s", status)
 
         try:
             if self.output_resampler is not None:
@@ -312,29 +507,80 @@ class AudioCodec:
                 self._output_callback_direct(outdata, frames)
 
         except Exception as e:
-            logger.error(f"输出回调错误: {e}")
+            throttled_logger.error("输出回调错误: %s", e)
             outdata.fill(0)
 
-    def _output_callback_direct(self, outdata: np.ndarray, frames: int):
-        """
-        直接播放24kHz数据（设备支持24kHz时）
+        # 有监听者时记录播放电平
+        if self._audio_listeners:
+            self._playback_level = float(
+                np.sqrt(np.mean(outdata.astype(np.float32) ** 2))
+            )
+
+        # 实际播放的数据作为AEC参考信号（Linux 播放参考模式）
+        aec_processor = self.aec_processor
+        if (
+            self._aec_enabled
+            and aec_processor is not None
+            and aec_processor.uses_playout_reference()
+        ):
+            aec_processor.push_playout_reference(
+                outdata[:, 0].copy(),
+                self._output_stream_sample_rate,
+                self._measure_stream_latency(time_info, frames, is_input=False),
+            )
+
+    def _measure_stream_latency(self, time_info, frames: int, is_input: bool) -> float:
+        """测量设备延迟（秒），时间戳不可用时回退到流的标称延迟.
+
+        输入：帧末样本被采集到当前回调的时间；输出：首样本从当前回调到扬声器的时间
         """
+        stream = self.input_stream if is_input else self.output_stream
         try:
-            # 从播放队列获取音频数据
-            audio_data = self._output_buffer.get_nowait()
-
-            if len(audio_data) >= frames:
-                output_frames = audio_data[:frames]
-                outdata[:] = output_frames.reshape(-1, AudioConfig.CHANNELS)
-            else:
-                outdata[: len(audio_data)] = audio_data.reshape(
-                    -1, AudioConfig.CHANNELS
+            if is_input:
+                sample_rate = self.device_input_sample_rate
+                latency = (
+                    time_info.currentTime
+                    - time_info.inputBufferAdcTime
+                    - frames / sample_rate
                 )
-                outdata[len(audio_data) :] = 0
+            else:
+                latency = time_info.outputBufferDacTime - time_info.currentTime
+            if 0.0 <= latency < 1.0 and time_info.currentTime > 0:
+                return latency
+        except Exception:
+            pass
 
-        except asyncio.QueueEmpty:
+        try:
+            return float(stream.latency) if stream is not None else 0.0
+        except Exception:
+            return 0.0
+
+    def _output_callback_direct(self, outdata: np.ndarray, frames: int):
+        """直接播放24kHz数据（设备支持24kHz时）
+
+        块大小可能与解码帧长不同（输出流调优），不足一块时拼接下一帧，多余部分留到下一块。
+        """
+        filled = 0
+        pending = self._output_remainder
+        while filled < frames:
+            if pending is None or len(pending) == 0:
+                try:
+                    # 从播放队列获取音频数据
+                    pending = self._output_buffer.get_nowait()
+                    self._latency_tracer.mark_once("first_tts_played")
+                except asyncio.QueueEmpty:
+                    break
+            count = min(frames - filled, len(pending))
+            outdata[filled : filled + count] = pending[:count].reshape(
+                -1, AudioConfig.CHANNELS
+            )
+            pending = pending[count:]
+            filled += count
+
+        self._output_remainder = pending if pending is not None and len(pending) else None
+        if filled < frames:
             # 无数据时输出静音
-            outdata.fill(0)
+            outdata[filled:] = 0
 
     def _output_callback_with_resample(self, outdata: np.ndarray, frames: int):
         """
@@ -345,6 +591,7 @@ class AudioCodec:
             while len(self._resample_output_buffer) < frames:
                 try:
                     audio_data = self._output_buffer.get_nowait()
+                    self._latency_tracer.mark_once("first_tts_played")
 
                     # 24kHz -> 设备采样率重采样
                     resampled_data = self.output_resampler.resample_chunk(
@@ -371,7 +618,7 @@ class AudioCodec:
                 outdata.fill(0)
 
         except Exception as e:
-            logger.warning(f"重采样输出失败: {e}")
+            throttled_logger.warning("重采样输出失败: %s", e)
             outdata.fill(0)
 
     def _input_finished_callback(self):
@@ -412,39 +659,14 @@ class AudioCodec:
                     blocksize=self._device_input_frame_size,
                     callback=self._input_callback,
                     finished_callback=self._input_finished_callback,
-                    latency="low",
+                    latency=self._stream_latency,
                 )
                 self.input_stream.start()
                 logger.info("输入流重新初始化成功")
                 return True
             else:
-                if self.output_stream:
-                    self.output_stream.stop()
-                    self.output_stream.close()
-
-                # 根据设备支持的采样率选择输出采样率
-                if self.device_output_sample_rate == AudioConfig.OUTPUT_SAMPLE_RATE:
-                    # 设备支持24kHz，直接使用
-                    output_sample_rate = AudioConfig.OUTPUT_SAMPLE_RATE
-                    device_output_frame_size = AudioConfig.OUTPUT_FRAME_SIZE
-                else:
-                    # 设备不支持24kHz，使用设备默认采样率并启用重采样
-                    output_sample_rate = self.device_output_sample_rate
-                    device_output_frame_size = int(
-                        self.device_output_sample_rate
-                        * (AudioConfig.FRAME_DURATION / 1000)
-                    )
-
-                self.output_stream = sd.OutputStream(
-                    samplerate=output_sample_rate,
-                    channels=AudioConfig.CHANNELS,
-                    dtype=np.int16,
-                    blocksize=device_output_frame_size,
-                    callback=self._output_callback,
-                    finished_callback=self._output_finished_callback,
-                    latency="low",
-                )
-                self.output_stream.start()
+                # 调优常在播放中途触发，打开设备较慢，放到线程池中执行
+                await asyncio.to_thread(self._reopen_output_stream)
                 logger.info("输出流重新初始化成功")
                 return None
         except Exception as e:
@@ -455,6 +677,114 @@ class AudioCodec:
             else:
                 raise
 
+    def _reopen_output_stream(self):
+        """
+        关闭并按当前参数重新打开输出流.
+        """
+        if self.output_stream:
+            self.output_stream.stop()
+            self.output_stream.close()
+
+        # 播放队列与剩余样本保留在编解码器中，重建后继续播放
+        self._open_output_stream()
+
+    async def set_output_stream_params(self, latency, block_ms: int) -> bool:
+        """按新的延迟档位与块时长重建输出流，排队中的音频不丢弃.
+
+        Args:
+            latency: sounddevice 延迟（"low"/"high" 或秒数）
+            block_ms: 回调块时长（毫秒）
+
+        Returns:
+            bool: 是否重建成功（失败时恢复原参数）
+        """
+        if self.output_stream is None or self._is_closing:
+            return False
+        previous = (self._output_latency, self._output_block_ms)
+        self._output_latency, self._output_block_ms = latency, block_ms
+        try:
+            await self.reinitialize_stream(is_input=False)
+            return True
+        except Exception as e:
+            logger.warning(f"按新参数重建输出流失败，恢复原参数: {e}")
+            self._output_latency, self._output_block_ms = previous
+            try:
+                await self.reinitialize_stream(is_input=False)
+            except Exception:
+                pass
+            return False
+
+    async def enter_low_power(self) -> bool:
+        """进入低功耗待机：停止播放流，采集只供唤醒词检测.
+
+        Returns:
+            bool: 是否进入（仍有待播音频时不进入）
+        """
+        if self._low_power or self._is_closing or not self.is_output_idle():
+            return False
+        self._low_power = True
+        self._output_remainder = None
+        try:
+            if self.output_stream and self.output_stream.active:
+                self.output_stream.stop()
+        except Exception as e:
+            logger.warning(f"停止输出流失败: {e}")
+        logger.info("音频进入低功耗待机")
+        return True
+
+    async def exit_low_power(self):
+        """
+        退出低功耗待机：恢复播放流与完整采集处理.
+        """
+        if not self._low_power:
+            return
+        self._low_power = False
+        self._resume_output()
+        logger.info(f"音频退出低功耗待机，播放流恢复耗时 {self._wake_latency_ms}ms")
+
+    def _resume_output(self):
+        """
+        重新启动已停止的输出流并记录耗时.
+        """
+        start = time.perf_counter()
+        try:
+            if self.output_stream and not self.output_stream.active:
+                self.output_stream.start()
+        except Exception as e:
+            logger.warning(f"恢复输出流失败: {e}")
+        self._wake_latency_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def is_low_power(self) -> bool:
+        return self._low_power
+
+    def is_output_idle(self) -> bool:
+        """
+        播放队列中没有待播音频.
+        """
+        return self._output_buffer.empty() and not self._resample_output_buffer
+
+    def get_stream_stats(self) -> dict:
+        """
+        音频流参数与累计欠载/溢出次数.
+        """
+        try:
+            output_latency = (
+                round(float(self.output_stream.latency) * 1000, 1)
+                if self.output_stream is not None
+                else None
+            )
+        except Exception:
+            output_latency = None
+        return {
+            "output_device": self.output_device_name,
+            "output_latency": self._output_latency,
+            "output_block_ms": self._output_block_ms,
+            "output_latency_ms": output_latency,
+            "low_power": self._low_power,
+            "wake_latency_ms": self._wake_latency_ms,
+            **self._xruns,
+        }
+
     async def get_raw_audio_for_detection(self) -> Optional[bytes]:
         """
         获取唤醒词音频数据.
@@ -489,6 +819,28 @@ class AudioCodec:
         else:
             logger.info("禁用编码回调")
 
+    def add_audio_listener(self, listener):
+        """添加采集帧监听者.
+
+        监听者在音频驱动线程中以AEC处理后的16kHz int16帧被同步调用，必须轻量且不阻塞
+        """
+        if listener not in self._audio_listeners:
+            self._audio_listeners = self._audio_listeners + (listener,)
+
+    def remove_audio_listener(self, listener):
+        """
+        移除采集帧监听者.
+        """
+        self._audio_listeners = tuple(
+            existing for existing in self._audio_listeners if existing != listener
+        )
+
+    def get_playback_level(self) -> float:
+        """
+        获取最近一次播放块的RMS电平（int16刻度）
+        """
+        return self._playback_level
+
     def is_aec_enabled(self) -> bool:
         """
         检查AEC是否启用.
@@ -536,8 +888,12 @@ class AudioCodec:
         """
         解码音频并播放 网络接收的Opus数据 -> 解码24kHz -> 播放队列.
         """
+        # 待机中收到音频（如服务端主动播报）时立即恢复播放流
+        if self._low_power:
+            await self.exit_low_power()
+
         try:
-            # Opus解码为24kHz PCM数据
+            # Opus解码为24kHz PCM数据（空负载表示丢帧，由解码器做丢包补偿PLC）
             pcm_data = self.opus_decoder.decode(
                 opus_data, AudioConfig.OUTPUT_FRAME_SIZE
             )
@@ -553,6 +909,7 @@ class AudioCodec:
 
             # 放入播放队列
             self._put_audio_data_safe(self._output_buffer, audio_array)
+            self._latency_tracer.mark_once("first_tts_decoded")
 
         except opuslib.OpusError as e:
             logger.warning(f"Opus解码失败，丢弃此帧: {e}")
@@ -574,9 +931,11 @@ class AudioCodec:
             output_remaining = self._output_buffer.qsize()
             logger.warning(f"音频播放超时，剩余队列 - 输出: {output_remaining} 帧")
 
-    async def clear_audio_queue(self):
-        """
-        清空音频队列.
+    async def clear_audio_queue(self, collect: bool = True):
+        """清空音频队列.
+
+        Args:
+            collect: 丢弃较多帧时是否执行垃圾回收（关闭时不需要）
         """
         cleared_count = 0
 
@@ -601,10 +960,12 @@ class AudioCodec:
             cleared_count += len(self._resample_output_buffer)
             self._resample_output_buffer.clear()
 
+        self._output_remainder = None
+
         if cleared_count > 0:
             logger.info(f"清空音频队列，丢弃 {cleared_count} 帧音频数据")
 
-        if cleared_count > 100:
+        if collect and cleared_count > 100:
             gc.collect()
             logger.debug("执行垃圾回收以释放内存")
 
@@ -659,6 +1020,26 @@ class AudioCodec:
             except Exception as e:
                 logger.warning(f"清理{name}重采样器失败: {e}")
 
+    def _close_streams(self):
+        """
+        先停止两个流再关闭（缓解C扩展退出竞态）
+        """
+        for name, stream in (("输入", self.input_stream), ("输出", self.output_stream)):
+            try:
+                if stream and stream.active:
+                    stream.stop()
+            except Exception as e:
+                logger.warning(f"停止{name}流失败: {e}")
+
+        for name, stream in (("输入", self.input_stream), ("输出", self.output_stream)):
+            try:
+                if stream:
+                    stream.close()
+            except Exception as e:
+                logger.warning(f"关闭{name}流失败: {e}")
+        self.input_stream = None
+        self.output_stream = None
+
     async def close(self):
         """
         关闭音频编解码器.
@@ -668,27 +1049,12 @@ class AudioCodec:
 
         self._is_closing = True
         logger.info("开始关闭音频编解码器...")
+        get_metrics().unregister_collector("audio")
 
         try:
-            await self.clear_audio_queue()
-
-            if self.input_stream:
-                try:
-                    self.input_stream.stop()
-                    self.input_stream.close()
-                except Exception as e:
-                    logger.warning(f"关闭输入流失败: {e}")
-                finally:
-                    self.input_stream = None
-
-            if self.output_stream:
-                try:
-                    self.output_stream.stop()
-                    self.output_stream.close()
-                except Exception as e:
-                    logger.warning(f"关闭输出流失败: {e}")
-                finally:
-                    self.output_stream = None
+            await self.clear_audio_queue(collect=False)
+            # PortAudio 停流/关流会阻塞（等待回调结束），放到线程池
+            await asyncio.to_thread(self._close_streams)
 
             await self._cleanup_resampler(self.input_resampler, "输入")
             await self._cleanup_resampler(self.output_resampler, "输出")
@@ -710,8 +1076,6 @@ class AudioCodec:
             self.opus_encoder = None
             self.opus_decoder = None
 
-            gc.collect()
-
             logger.info("音频资源已完全释放")
         except Exception as e:
             logger.error(f"关闭音频编解码器过程中发生错误: {e}")
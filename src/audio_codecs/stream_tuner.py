@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+from src.constants.constants import AudioConfig
+from src.utils.config_manager import ConfigManager
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class OutputStreamTuner:
+    """输出流延迟与块大小自动调优.
+
+    周期性读取输出流欠载（underflow）计数，按每分钟次数在分级表中升降档：
+    - 欠载频繁立即升一档：加大设备缓冲/回调块，换取稳定
+    - 持续 HOLD_SEC 无欠载且当前没有待播音频时才降一档，尝试更低延迟
+    - 降档后很快又欠载的档位记为失败，FAIL_BACKOFF_SEC 内不再尝试（迟滞）
+
+    重建输出流时播放队列保留在编解码器中，排队的音频不会丢失。
+    调优结果按输出设备名保存到配置，下次启动直接使用。
+    """
+
+    # (sounddevice 延迟档位, 回调块时长相对帧长的倍数)，0 档延迟最低
+    LEVELS = (
+        ("low", 0.5),
+        ("low", 1),
+        ("high", 1),
+        ("high", 2),
+    )
+
+    def __init__(self, audio_codec):
+        self.audio_codec = audio_codec
+
+        config = ConfigManager.get_instance()
+        self.config = config
+        self.interval = float(config.get_config("OUTPUT_TUNING_OPTIONS.INTERVAL_SEC", 10.0))
+        self.window_sec = float(config.get_config("OUTPUT_TUNING_OPTIONS.WINDOW_SEC", 60.0))
+        self.max_per_min = float(
+            config.get_config("OUTPUT_TUNING_OPTIONS.MAX_UNDERRUNS_PER_MIN", 3)
+        )
+        self.hold_sec = float(config.get_config("OUTPUT_TUNING_OPTIONS.HOLD_SEC", 300.0))
+        self.fail_backoff_sec = float(
+            config.get_config("OUTPUT_TUNING_OPTIONS.FAIL_BACKOFF_SEC", 3600.0)
+        )
+
+        self.level = self._current_level()
+        self._samples = deque()
+        self._last_change = time.monotonic()
+        self._failed_at = {}
+        self.decisions = deque(maxlen=100)
+
+    def settings(self, level: Optional[int] = None) -> dict:
+        """
+        指定档位（默认当前档位）对应的输出流参数.
+        """
+        latency, factor = self.LEVELS[self.level if level is None else level]
+        return {
+            "latency": latency,
+            "block_ms": max(5, int(AudioConfig.FRAME_DURATION * factor)),
+        }
+
+    def _current_level(self) -> int:
+        """
+        编解码器当前参数对应的档位（不在表中时取最接近的）
+        """
+        stats = self.audio_codec.get_stream_stats()
+        latency, block_ms = stats["output_latency"], stats["output_block_ms"]
+        candidates = [
+            index
+            for index in range(len(self.LEVELS))
+            if self.settings(index)["latency"] == latency
+        ] or list(range(len(self.LEVELS)))
+        return min(
+            candidates, key=lambda index: abs(self.settings(index)["block_ms"] - block_ms)
+        )
+
+    def _underrun_rate(self, now: float):
+        """
+        窗口内欠载次数与每分钟速率.
+        """
+        total = self.audio_codec.get_stream_stats()["output_underflow"]
+        self._samples.append((now, total))
+        while len(self._samples) > 1 and now - self._samples[0][0] > self.window_sec:
+            self._samples.popleft()
+        start_time, start_total = self._samples[0]
+        count = total - start_total
+        elapsed = now - start_time
+        rate = count * 60 / elapsed if elapsed > 0 else 0.0
+        return count, rate
+
+    async def evaluate(self) -> Optional[dict]:
+        """评估一次欠载情况并在需要时重建输出流.
+
+        Returns:
+            dict: 发生调整时返回决策记录，否则为 None
+        """
+        # 低功耗待机时输出流已停止，不做评估
+        if self.audio_codec.is_low_power():
+            self._samples.clear()
+            return None
+
+        now = time.monotonic()
+        count, rate = self._underrun_rate(now)
+        stable_for = now - self._last_change
+
+        level = self.level
+        reason = None
+        if count >= 2 and rate >= self.max_per_min:
+            if self.level < len(self.LEVELS) - 1:
+                level = self.level + 1
+                reason = f"欠载 {rate:.1f} 次/分钟"
+                # 刚降档就欠载，说明该档位不可用
+                if stable_for < self.hold_sec:
+                    self._failed_at[self.level] = now
+        elif count == 0 and stable_for >= self.hold_sec and self.level > 0:
+            target = self.level - 1
+            failed = self._failed_at.get(target)
+            if (
+                failed is None or now - failed >= self.fail_backoff_sec
+            ) and self.audio_codec.is_output_idle():
+                level = target
+                reason = f"已 {stable_for:.0f}s 无欠载"
+
+        if level == self.level:
+            return None
+
+        before, after = self.settings(), self.settings(level)
+        if not await self.audio_codec.set_output_stream_params(
+            after["latency"], after["block_ms"]
+        ):
+            return None
+
+        self.level = level
+        self._last_change = now
+        # 旧流的计数不计入新参数的窗口
+        self._samples.clear()
+        self._persist()
+
+        decision = {
+            "time": time.time(),
+            "level": level,
+            "before": before,
+            "after": after,
+            "underruns": count,
+            "underruns_per_min": round(rate, 2),
+            "reason": reason,
+        }
+        self.decisions.append(decision)
+        logger.info(
+            f"输出流调优: latency {before['latency']}->{after['latency']}，"
+            f"块时长 {before['block_ms']}->{after['block_ms']}ms，原因: {reason}"
+        )
+        return decision
+
+    def _persist(self):
+        """
+        按输出设备保存当前参数.
+        """
+        device = self.audio_codec.output_device_name
+        if not device:
+            return
+        tuning = dict(self.config.get_config("AUDIO_OPTIONS.OUTPUT_TUNING", {}) or {})
+        settings = self.settings()
+        tuning[device] = {
+            "LATENCY": settings["latency"],
+            "BLOCK_MS": settings["block_ms"],
+        }
+        self.config.update_config("AUDIO_OPTIONS.OUTPUT_TUNING", tuning)
+
+    async def run(self):
+        """
+        周期性评估.
+        """
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self.evaluate()
+                except Exception as e:
+                    logger.warning(f"输出流调优评估失败: {e}")
+        except asyncio.CancelledError:
+            pass
+
+    def get_stats(self) -> dict:
+        return {
+            "level": self.level,
+            "settings": self.settings(),
+            "stream": self.audio_codec.get_stream_stats(),
+            "decisions": len(self.decisions),
+            "last_decision": self.decisions[-1] if self.decisions else None,
+        }
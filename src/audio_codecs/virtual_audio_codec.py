@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+import opuslib
+
+from src.audio_codecs.audio_codec import AudioCodec
+from src.constants.constants import AudioConfig
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class VirtualAudioCodec(AudioCodec):
+    """无声卡的虚拟音频编解码器，用于基准测试、压测和无人值守运行.
+
+    不打开任何音频设备，由事件循环上的时钟任务按帧时长驱动原有的录音/播放回调：
+    - 录音：优先取 feed() 注入的16kHz PCM，没有则送静音帧
+    - 播放：按实时速率从播放队列取帧后丢弃（只计数）
+    其余逻辑（Opus编解码、唤醒词队列、监听者、实时编码回调）与 AudioCodec 完全一致。
+    """
+
+    def __init__(self, speed: float = 1.0):
+        super().__init__()
+        self.speed = max(speed, 0.01)
+        self._pending_input = deque()
+        self._clock_task: Optional[asyncio.Task] = None
+        self.input_frames = 0
+        self.played_frames = 0
+
+    async def initialize(self):
+        """
+        初始化虚拟设备（固定16kHz输入/24kHz输出，无需重采样）
+        """
+        self.device_input_sample_rate = AudioConfig.INPUT_SAMPLE_RATE
+        self.device_output_sample_rate = AudioConfig.OUTPUT_SAMPLE_RATE
+        self._device_input_frame_size = AudioConfig.INPUT_FRAME_SIZE
+        self._output_stream_sample_rate = AudioConfig.OUTPUT_SAMPLE_RATE
+
+        self._create_opus_encoder()
+        self.opus_decoder = opuslib.Decoder(
+            AudioConfig.OUTPUT_SAMPLE_RATE, AudioConfig.CHANNELS
+        )
+        # 虚拟输入已是纯净信号，不做回声消除
+        self._aec_enabled = False
+
+        await self.start_streams()
+        logger.info(f"虚拟音频设备已初始化，时钟倍速: {self.speed}")
+
+    def feed(self, pcm: np.ndarray):
+        """
+        注入16kHz单声道int16录音数据（按帧时长逐帧送入录音回调）
+        """
+        pcm = np.asarray(pcm, dtype=np.int16)
+        frame_size = AudioConfig.INPUT_FRAME_SIZE
+        pad = (-len(pcm)) % frame_size
+        if pad:
+            pcm = np.concatenate([pcm, np.zeros(pad, dtype=np.int16)])
+        for start in range(0, len(pcm), frame_size):
+            self._pending_input.append(pcm[start : start + frame_size])
+
+    def pending_input_frames(self) -> int:
+        """
+        尚未送入的注入帧数.
+        """
+        return len(self._pending_input)
+
+    async def _clock_loop(self):
+        """
+        虚拟声卡时钟：每个帧时长驱动一次录音回调和播放回调.
+        """
+        interval = AudioConfig.FRAME_DURATION / 1000 / self.speed
+        silence = np.zeros(AudioConfig.INPUT_FRAME_SIZE, dtype=np.int16)
+        outdata = np.zeros(
+            (AudioConfig.OUTPUT_FRAME_SIZE, AudioConfig.CHANNELS), dtype=np.int16
+        )
+        next_tick = time.monotonic()
+
+        try:
+            while not self._is_closing:
+                frame = self._pending_input.popleft() if self._pending_input else silence
+                self._input_callback(
+                    frame.reshape(-1, AudioConfig.CHANNELS),
+                    AudioConfig.INPUT_FRAME_SIZE,
+                    None,
+                    None,
+                )
+                self.input_frames += 1
+
+                # 低功耗待机时播放流停止，不再驱动播放回调
+                if not self._low_power:
+                    had_audio = not self._output_buffer.empty()
+                    self._output_callback(
+                        outdata, AudioConfig.OUTPUT_FRAME_SIZE, None, None
+                    )
+                    if had_audio:
+                        self.played_frames += 1
+
+                # 以绝对时间推进，避免累计漂移
+                next_tick += interval
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    next_tick = time.monotonic()
+                    await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            pass
+
+    async def start_streams(self):
+        """
+        启动虚拟时钟.
+        """
+        if self._clock_task is None or self._clock_task.done():
+            self._clock_task = asyncio.create_task(
+                self._clock_loop(), name="虚拟音频时钟"
+            )
+
+    async def stop_streams(self):
+        """
+        停止虚拟时钟.
+        """
+        if self._clock_task and not self._clock_task.done():
+            self._clock_task.cancel()
+            try:
+                await self._clock_task
+            except asyncio.CancelledError:
+                pass
+        self._clock_task = None
+
+    async def reinitialize_stream(self, is_input=True):
+        """
+        虚拟设备无需重建.
+        """
+        return True if is_input else None
+
+    async def close(self):
+        """
+        关闭虚拟编解码器.
+        """
+        await self.stop_streams()
+        self._pending_input.clear()
+        await super().close()
@@ -1,90 +1,109 @@
-import logging
-import threading
 import time
+from collections import deque
+from typing import Optional
 
 import numpy as np
-import pyaudio
 import webrtcvad
 
-from src.constants.constants import AbortReason, DeviceState
+from src.constants.constants import AbortReason, AudioConfig, DeviceState
+from src.utils.config_manager import ConfigManager
+from src.utils.logging_config import get_logger
 
-# 配置日志
-logger = logging.getLogger("VADDetector")
+logger = get_logger(__name__)
 
 
 class VADDetector:
-    """
-    基于WebRTC VAD的语音活动检测器，用于检测用户打断.
+    """基于WebRTC VAD的语音打断检测器.
+
+    不再单独打开麦克风，而是作为 AudioCodec 的帧监听者消费经过AEC处理后的采集帧：
+    每帧先向量化计算各子帧能量，仅对超过基础门限的 10/20/30ms 子帧运行 webrtcvad，
+    语音子帧还须超过随播放电平和残余回声耦合自适应抬升的门限，持续语音达到设定时长后触发打断。
+    回声耦合只从低于基础门限或 webrtcvad 判为非语音的子帧学习，并限制上限，
+    避免被门限拦下的近端语音反过来抬高门限。
     """
 
-    def __init__(self, audio_codec, protocol, app_instance, loop):
+    def __init__(self, audio_codec, app_instance, loop):
         """初始化VAD检测器.
 
         参数:
-            audio_codec: 音频编解码器实例
-            protocol: 通信协议实例
+            audio_codec: 音频编解码器实例（提供采集帧和播放电平）
             app_instance: 应用程序实例
-            loop: 事件循环
+            loop: 主事件循环
         """
         self.audio_codec = audio_codec
-        self.protocol = protocol
         self.app = app_instance
         self.loop = loop
 
+        config = ConfigManager.get_instance()
+
         # VAD设置
         self.vad = webrtcvad.Vad()
-        self.vad.set_mode(3)  # 设置最高灵敏度
+        self.vad.set_mode(int(config.get_config("BARGE_IN_OPTIONS.VAD_MODE", 3)))
 
         # 参数设置
-        self.sample_rate = 16000
-        self.frame_duration = 20  # 毫秒
-        self.frame_size = int(self.sample_rate * self.frame_duration / 1000)
-        self.speech_window = 5  # 连续检测到多少帧语音才触发打断
-        self.energy_threshold = 300  # 能量阈值
+        self.sample_rate = AudioConfig.INPUT_SAMPLE_RATE
+        self.sub_frame_ms = self._choose_sub_frame_ms(
+            int(config.get_config("BARGE_IN_OPTIONS.SUB_FRAME_MS", 20))
+        )
+        self.sub_frame_size = int(self.sample_rate * self.sub_frame_ms / 1000)
+        self.min_speech_ms = int(config.get_config("BARGE_IN_OPTIONS.MIN_SPEECH_MS", 200))
+        self.max_gap_ms = int(config.get_config("BARGE_IN_OPTIONS.MAX_GAP_MS", 60))
+        self.energy_threshold = float(
+            config.get_config("BARGE_IN_OPTIONS.ENERGY_THRESHOLD", 300)
+        )
+        self.echo_margin = float(config.get_config("BARGE_IN_OPTIONS.ECHO_MARGIN", 2.0))
+        self.max_echo_coupling = float(
+            config.get_config("BARGE_IN_OPTIONS.MAX_ECHO_COUPLING", 0.5)
+        )
+
+        # 残余回声耦合估计：非语音子帧上 AEC后能量 / 播放电平 的平滑值
+        self._echo_coupling = 0.0
+        self._coupling_alpha = 0.05
 
         # 状态变量
         self.running = False
         self.paused = False
-        self.thread = None
-        self.speech_count = 0
-        self.silence_count = 0
-        self.triggered = False
+        self._speech_ms = 0
+        self._gap_ms = 0
+        self._speech_onset = None  # 首个语音子帧的采集时刻
+        self._triggered = False
 
-        # 创建独立的PyAudio实例和流，避免与主音频流冲突
-        self.pa = None
-        self.stream = None
+        # 检测延迟统计（毫秒）
+        self._latencies = deque(maxlen=50)
+        self._trigger_count = 0
+
+    def _choose_sub_frame_ms(self, preferred: int) -> int:
+        """
+        选择能整除采集帧长度的 webrtcvad 子帧长度（10/20/30ms）
+        """
+        frame_ms = AudioConfig.FRAME_DURATION
+        candidates = [preferred] + [ms for ms in (30, 20, 10) if ms != preferred]
+        for ms in candidates:
+            if ms in (10, 20, 30) and frame_ms % ms == 0:
+                return ms
+        return 10
 
     def start(self):
         """
-        启动VAD检测器.
+        启动VAD检测器（注册为采集帧监听者）
         """
-        if self.thread and self.thread.is_alive():
+        if self.running:
             logger.warning("VAD检测器已经在运行")
             return
 
         self.running = True
         self.paused = False
-
-        # 初始化PyAudio和流
-        self._initialize_audio_stream()
-
-        # 启动检测线程
-        self.thread = threading.Thread(target=self._detection_loop, daemon=True)
-        self.thread.start()
-        logger.info("VAD检测器已启动")
+        self._reset_state()
+        self.audio_codec.add_audio_listener(self._on_audio_frame)
+        logger.info(f"VAD检测器已启动，子帧: {self.sub_frame_ms}ms")
 
     def stop(self):
         """
         停止VAD检测器.
         """
         self.running = False
-
-        # 关闭音频流
-        self._close_audio_stream()
-
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=1.0)
-
+        if self.audio_codec:
+            self.audio_codec.remove_audio_listener(self._on_audio_frame)
         logger.info("VAD检测器已停止")
 
     def pause(self):
@@ -99,10 +118,7 @@ class VADDetector:
         恢复VAD检测.
         """
         self.paused = False
-        # 重置状态
-        self.speech_count = 0
-        self.silence_count = 0
-        self.triggered = False
+        self._reset_state()
         logger.info("VAD检测器已恢复")
 
     def is_running(self):
@@ -111,188 +127,129 @@ class VADDetector:
         """
         return self.running and not self.paused
 
-    def _initialize_audio_stream(self):
+    def _on_audio_frame(self, frame: np.ndarray):
         """
-        初始化独立的音频流.
+        采集帧回调（在音频驱动线程中调用，必须轻量且不阻塞）
         """
-        try:
-            # 创建PyAudio实例
-            self.pa = pyaudio.PyAudio()
-
-            # 获取默认输入设备
-            device_index = None
-            for i in range(self.pa.get_device_count()):
-                device_info = self.pa.get_device_info_by_index(i)
-                if device_info["maxInputChannels"] > 0:
-                    device_index = i
-                    break
-
-            if device_index is None:
-                logger.error("找不到可用的输入设备")
-                return False
-
-            # 创建输入流
-            self.stream = self.pa.open(
-                format=pyaudio.paInt16,
-                channels=1,
-                rate=self.sample_rate,
-                input=True,
-                input_device_index=device_index,
-                frames_per_buffer=self.frame_size,
-                start=True,
-            )
-
-            logger.info(f"VAD检测器音频流已初始化，使用设备索引: {device_index}")
-            return True
+        if not self.running or self.paused:
+            return
 
-        except Exception as e:
-            logger.error(f"初始化VAD音频流失败: {e}")
-            return False
+        # 只在说话状态下进行检测
+        if self.app.device_state != DeviceState.SPEAKING:
+            if self._speech_ms or self._triggered:
+                self._reset_state()
+            return
 
-    def _close_audio_stream(self):
-        """
-        关闭音频流.
-        """
         try:
-            if self.stream:
-                self.stream.stop_stream()
-                self.stream.close()
-                self.stream = None
-
-            if self.pa:
-                self.pa.terminate()
-                self.pa = None
-
-            logger.info("VAD检测器音频流已关闭")
-        except Exception as e:
-            logger.error(f"关闭VAD音频流失败: {e}")
+            frame_end = time.monotonic()
+            num_sub = len(frame) // self.sub_frame_size
+            if num_sub == 0:
+                return
 
-    def _detection_loop(self):
-        """
-        VAD检测主循环.
-        """
-        logger.info("VAD检测循环已启动")
-
-        while self.running:
-            # 如果暂停或者音频流未初始化，则跳过
-            if self.paused or not self.stream:
-                time.sleep(0.1)
-                continue
-
-            try:
-                # 只在说话状态下进行检测
-                if self.app.device_state == DeviceState.SPEAKING:
-                    # 读取音频帧
-                    frame = self._read_audio_frame()
-                    if not frame:
-                        time.sleep(0.01)
-                        continue
-
-                    # 检测是否是语音
-                    is_speech = self._detect_speech(frame)
-
-                    # 如果检测到语音并且达到触发条件，处理打断
-                    if is_speech:
-                        self._handle_speech_frame(frame)
-                    else:
-                        self._handle_silence_frame(frame)
+            sub_frames = frame[: num_sub * self.sub_frame_size].reshape(
+                num_sub, self.sub_frame_size
+            )
+            # 向量化计算每个子帧的RMS能量
+            energies = np.sqrt(np.mean(sub_frames.astype(np.float32) ** 2, axis=1))
+            threshold = self._current_threshold()
+
+            for i in range(num_sub):
+                sub_start = frame_end - (num_sub - i) * self.sub_frame_ms / 1000
+                energy = energies[i]
+                voiced = energy > self.energy_threshold and self.vad.is_speech(
+                    sub_frames[i].tobytes(), self.sample_rate
+                )
+                if voiced and energy > threshold:
+                    self._handle_speech(sub_start)
                 else:
-                    # 不在说话状态，重置状态
-                    self._reset_state()
-
-            except Exception as e:
-                logger.error(f"VAD检测循环出错: {e}")
-
-            time.sleep(0.01)  # 小延迟，减少CPU使用
-
-        logger.info("VAD检测循环已结束")
-
-    def _read_audio_frame(self):
-        """
-        读取一帧音频数据.
-        """
-        try:
-            if not self.stream or not self.stream.is_active():
-                return None
-
-            # 读取音频数据
-            data = self.stream.read(self.frame_size, exception_on_overflow=False)
-            return data
+                    # 被回声门限拦下的语音子帧不参与耦合学习
+                    self._handle_silence(energy, learn=not voiced)
+                if self._triggered:
+                    break
         except Exception as e:
-            logger.error(f"读取音频帧失败: {e}")
-            return None
+            logger.error(f"VAD检测出错: {e}")
 
-    def _detect_speech(self, frame):
+    def _current_threshold(self) -> float:
         """
-        检测是否是语音.
+        当前能量门限：基础门限与预计残余回声电平取较大值.
         """
-        try:
-            # 确保帧长度正确
-            if len(frame) != self.frame_size * 2:  # 16位音频，每个样本2字节
-                return False
+        playback_level = self.audio_codec.get_playback_level()
+        residual_echo = self._echo_coupling * playback_level
+        return max(self.energy_threshold, self.echo_margin * residual_echo)
 
-            # 使用VAD检测
-            is_speech = self.vad.is_speech(frame, self.sample_rate)
-
-            # 计算音频能量
-            audio_data = np.frombuffer(frame, dtype=np.int16)
-            energy = np.mean(np.abs(audio_data))
-
-            # 结合VAD和能量阈值
-            is_valid_speech = is_speech and energy > self.energy_threshold
-
-            if is_valid_speech:
-                logger.debug(
-                    f"检测到语音 [能量: {energy:.2f}] [连续语音帧: {self.speech_count+1}]"
-                )
-
-            return is_valid_speech
-        except Exception as e:
-            logger.error(f"检测语音失败: {e}")
-            return False
-
-    def _handle_speech_frame(self, frame):
+    def _handle_speech(self, sub_start: float):
         """
-        处理语音帧.
+        处理语音子帧.
         """
-        self.speech_count += 1
-        self.silence_count = 0
+        if self._speech_onset is None:
+            self._speech_onset = sub_start
+        self._speech_ms += self.sub_frame_ms
+        self._gap_ms = 0
 
-        # 检测到足够的连续语音帧，触发打断
-        if self.speech_count >= self.speech_window and not self.triggered:
-            self.triggered = True
-            logger.info("检测到持续语音，触发打断！")
+        # 检测到足够时长的语音，触发打断
+        if self._speech_ms >= self.min_speech_ms and not self._triggered:
+            self._triggered = True
             self._trigger_interrupt()
 
-            # 立即暂停自己，防止重复触发
-            self.paused = True
-            logger.info("VAD检测器已自动暂停以防止重复触发")
-
-            # 重置状态
-            self.speech_count = 0
-            self.silence_count = 0
-            self.triggered = False
-
-    def _handle_silence_frame(self, frame):
+    def _handle_silence(self, energy: float, learn: bool = True):
         """
-        处理静音帧.
+        处理非语音子帧，learn 为真时同时更新残余回声耦合估计.
         """
-        self.silence_count += 1
-        self.speech_count = 0
+        playback_level = self.audio_codec.get_playback_level()
+        if learn and playback_level > 1.0:
+            coupling = min(energy / playback_level, self.max_echo_coupling)
+            self._echo_coupling += self._coupling_alpha * (
+                coupling - self._echo_coupling
+            )
+
+        # 允许短暂停顿，超过最大间隔才重置
+        if self._speech_ms:
+            self._gap_ms += self.sub_frame_ms
+            if self._gap_ms > self.max_gap_ms:
+                self._speech_ms = 0
+                self._gap_ms = 0
+                self._speech_onset = None
 
     def _reset_state(self):
         """
         重置状态.
         """
-        self.speech_count = 0
-        self.silence_count = 0
-        self.triggered = False
+        self._speech_ms = 0
+        self._gap_ms = 0
+        self._speech_onset = None
+        self._triggered = False
 
     def _trigger_interrupt(self):
         """
         触发打断.
         """
-        # 通知应用程序中止当前语音输出
-        self.app.schedule(
-            lambda: self.app.abort_speaking(AbortReason.WAKE_WORD_DETECTED)
+        # 检测延迟：从首个语音子帧被采集到触发打断的时间
+        latency_ms = (time.monotonic() - self._speech_onset) * 1000
+        self._latencies.append(latency_ms)
+        self._trigger_count += 1
+        logger.info(f"检测到持续语音，触发打断！检测延迟: {latency_ms:.0f}ms")
+
+        # 通知应用程序中止当前语音输出（线程安全地切回主事件循环）
+        self.app.schedule_command_nowait(
+            lambda: self.app.abort_speaking(AbortReason.USER_INTERRUPTION)
         )
+
+    def get_stats(self) -> dict:
+        """
+        获取检测统计信息.
+        """
+        latencies = list(self._latencies)
+        last_latency: Optional[float] = latencies[-1] if latencies else None
+        return {
+            "running": self.is_running(),
+            "sub_frame_ms": self.sub_frame_ms,
+            "trigger_count": self._trigger_count,
+            "threshold": round(self._current_threshold(), 1),
+            "echo_coupling": round(self._echo_coupling, 4),
+            "last_detection_latency_ms": (
+                round(last_latency, 1) if last_latency is not None else None
+            ),
+            "mean_detection_latency_ms": (
+                round(float(np.mean(latencies)), 1) if latencies else None
+            ),
+        }
@@ -9,6 +9,7 @@ import sherpa_onnx
 from src.constants.constants import AudioConfig
 from src.utils.config_manager import ConfigManager
 from src.utils.logging_config import get_logger
+from src.utils.metrics import get_metrics
 from src.utils.resource_finder import resource_finder
 
 logger = get_logger(__name__)
@@ -31,6 +32,10 @@ class WakeWordDetector:
         self.on_detected_callback: Optional[Callable] = None
         self.on_error: Optional[Callable] = None
 
+        # 实时率统计：送入的音频时长与解码耗时
+        self._audio_sec = 0.0
+        self._busy_sec = 0.0
+
         # 配置检查
         config = ConfigManager.get_instance()
         if not config.get_config("WAKE_WORD_OPTIONS.USE_WAKE_WORD", False):
@@ -51,6 +56,8 @@ class WakeWordDetector:
         self._init_kws_model()
         self._validate_config()
 
+        get_metrics().register_collector("kws", self._collect_metrics)
+
     def _load_config(self, config):
         """
         加载配置参数.
@@ -234,6 +241,7 @@ class WakeWordDetector:
                 return
 
             # 批量处理音频数据
+            start = time.perf_counter()
             for data in audio_batches:
                 # 转换音频格式
                 if isinstance(data, bytes):
@@ -247,17 +255,21 @@ class WakeWordDetector:
                 self.stream.accept_waveform(
                     sample_rate=self.sample_rate, waveform=samples
                 )
+                self._audio_sec += len(samples) / self.sample_rate
 
             # 处理检测结果
+            result = None
             while self.keyword_spotter.is_ready(self.stream):
                 self.keyword_spotter.decode_stream(self.stream)
                 result = self.keyword_spotter.get_result(self.stream)
-
                 if result:
-                    await self._handle_detection_result(result)
-                    # 重置流状态
-                    self.keyword_spotter.reset_stream(self.stream)
                     break  # 检测到后立即处理，不继续批量处理
+            self._busy_sec += time.perf_counter() - start
+
+            if result:
+                await self._handle_detection_result(result)
+                # 重置流状态
+                self.keyword_spotter.reset_stream(self.stream)
 
         except Exception as e:
             logger.debug(f"KWS音频处理错误: {e}")
@@ -350,8 +362,31 @@ class WakeWordDetector:
             "keywords_threshold": self.keywords_threshold,
             "keywords_score": self.keywords_score,
             "is_running": self.is_running(),
+            "audio_sec": round(self._audio_sec, 1),
+            "real_time_factor": self.real_time_factor(),
         }
 
+    def real_time_factor(self) -> Optional[float]:
+        """
+        解码耗时 / 音频时长（越小越好，>1 表示跟不上实时）
+        """
+        if not self._audio_sec:
+            return None
+        return round(self._busy_sec / self._audio_sec, 4)
+
+    def _collect_metrics(self, registry):
+        """
+        指标采集：KWS 实时率与累计处理的音频时长.
+        """
+        registry.describe(
+            "xiaozhi_kws_real_time_factor", "gauge", "唤醒词解码耗时与音频时长之比"
+        )
+        registry.set("xiaozhi_kws_real_time_factor", self.real_time_factor())
+        registry.set(
+            "xiaozhi_kws_audio_seconds_total", self._audio_sec, kind="counter"
+        )
+        registry.set("xiaozhi_kws_running", int(self.is_running()))
+
     def clear_cache(self):
         """
         清空缓存.
@@ -70,6 +70,11 @@ def get_frame_duration() -> int:
         if not is_official_server(ota_url):
             return 60
 
+        # 硬件校准实测过本机性能时以校准结果为准
+        calibrated = config.get_config("AUDIO_OPTIONS.FRAME_DURATION")
+        if calibrated in (20, 60):
+            return calibrated
+
         # 检测ARM架构设备（如树莓派）
         machine = platform.machine().lower()
         arm_archs = ["arm", "aarch64", "armv7l", "armv6l"]
@@ -106,3 +111,13 @@ class AudioConfig:
     INPUT_FRAME_SIZE = int(INPUT_SAMPLE_RATE * (FRAME_DURATION / 1000))
     # Linux系统使用固定帧大小以减少PCM打印，其他系统动态计算
     OUTPUT_FRAME_SIZE = int(OUTPUT_SAMPLE_RATE * (FRAME_DURATION / 1000))
+
+    @classmethod
+    def set_frame_duration(cls, frame_duration: int):
+        """修改帧长度并重新计算帧大小.
+
+        须在音频设备和协议初始化之前调用（如启动时硬件校准之后）
+        """
+        cls.FRAME_DURATION = frame_duration
+        cls.INPUT_FRAME_SIZE = int(cls.INPUT_SAMPLE_RATE * (frame_duration / 1000))
+        cls.OUTPUT_FRAME_SIZE = int(cls.OUTPUT_SAMPLE_RATE * (frame_duration / 1000))
@@ -0,0 +1,489 @@
+"""
+硬件校准.
+
+实测本机几秒钟，替代写死的经验值（ARM 用 60ms 帧、KWS 4 线程、QQ 重采样、low 延迟）：
+1. Opus 编码/解码在 20ms 与 60ms 帧长下的实时率
+2. QQ 档 soxr 重采样的实时率（设备采样率 <-> 16k/24k），计入处理链开销；
+   更高档位只增加 CPU 与群延迟（影响 AEC 播放参考对齐和端到端延迟），不作候选
+3. 唤醒词模型在不同线程数下的实时率（模型存在时）
+4. 通过与 AudioCodec 相同参数的音频流测量设备上报延迟与欠载/溢出
+
+选出最快且稳定的组合，经 ConfigManager 写入 config.json。
+结果带 CPU 指纹，CPU/架构变化后启动时自动重新校准（更换默认音频设备不会触发），
+也可随时手动重跑。
+"""
+
+import asyncio
+import os
+import platform
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.constants.constants import AudioConfig
+from src.utils.config_manager import ConfigManager
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _rtf(elapsed: float, audio_seconds: float) -> float:
+    return round(elapsed / audio_seconds, 5) if audio_seconds else 0.0
+
+
+class HardwareCalibrator:
+    # 2: 固定 QQ 重采样、指纹只含 CPU 信息（旧结果可能选了 VHQ，需重新校准）
+    VERSION = 2
+
+    FRAME_DURATIONS = (20, 60)
+    # 最快、延迟最小的重采样档位
+    RESAMPLE_QUALITY = "QQ"
+    KWS_THREADS = (1, 2, 4)
+    STREAM_LATENCIES = ("low", "high")
+
+    # 20ms 帧下整条音频处理链（编解码+重采样+KWS）占单核的比例上限
+    FRAME_20MS_BUDGET = 0.25
+    # KWS 线程数：在最快结果的该倍数内取最少线程
+    KWS_TOLERANCE = 1.1
+
+    def __init__(self, seconds: float = 2.0, test_devices: bool = True):
+        """
+        Args:
+            seconds: 每项 CPU 测试处理的音频时长（秒）
+            test_devices: 是否打开音频设备测量延迟
+        """
+        self.config = ConfigManager.get_instance()
+        self.seconds = seconds
+        self.test_devices = test_devices
+        self._kws_detector = None
+        rng = np.random.default_rng(0)
+        # 带语音频段的测试信号：白噪声 + 正弦，避免 Opus 对静音走捷径
+        t = np.arange(int(48000 * seconds)) / 48000
+        self._signal_48k = (
+            np.sin(2 * np.pi * 220 * t) * 6000 + rng.normal(0, 2000, len(t))
+        ).astype(np.int16)
+
+    # ------------------------------------------------------------------
+    # 指纹
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def hardware_fingerprint() -> Dict:
+        """
+        决定是否需要重新校准的 CPU 信息（启动时比较，不查询音频设备）
+        """
+        return {
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "cpu_count": os.cpu_count(),
+        }
+
+    @staticmethod
+    def audio_devices() -> Dict:
+        """
+        校准时的默认音频设备（仅记录，不参与指纹比较）
+        """
+        devices = {}
+        try:
+            import sounddevice as sd
+
+            input_id, output_id = sd.default.device
+            devices["input_device"] = sd.query_devices(input_id)["name"]
+            devices["output_device"] = sd.query_devices(output_id)["name"]
+        except Exception:
+            pass
+        return devices
+
+    @classmethod
+    def needs_calibration(cls) -> bool:
+        """
+        尚未校准、校准版本过旧或 CPU 指纹变化.
+        """
+        record = ConfigManager.get_instance().get_config("CALIBRATION")
+        if not record or record.get("VERSION") != cls.VERSION:
+            return True
+        return record.get("FINGERPRINT") != cls.hardware_fingerprint()
+
+    # ------------------------------------------------------------------
+    # 单项测试（CPU 密集，在线程池中执行）
+    # ------------------------------------------------------------------
+
+    def _signal(self, sample_rate: int) -> np.ndarray:
+        if sample_rate == 48000:
+            return self._signal_48k
+        step = 48000 / sample_rate
+        index = (np.arange(int(len(self._signal_48k) / step)) * step).astype(int)
+        return self._signal_48k[index]
+
+    def bench_codec(self, frame_duration: int) -> Dict:
+        """
+        Opus 编码（16k 上行）与解码（下行采样率）实时率.
+        """
+        import opuslib
+
+        encoder = opuslib.Encoder(
+            AudioConfig.INPUT_SAMPLE_RATE, AudioConfig.CHANNELS, opuslib.APPLICATION_AUDIO
+        )
+        decoder = opuslib.Decoder(AudioConfig.OUTPUT_SAMPLE_RATE, AudioConfig.CHANNELS)
+        tts_encoder = opuslib.Encoder(
+            AudioConfig.OUTPUT_SAMPLE_RATE, AudioConfig.CHANNELS, opuslib.APPLICATION_AUDIO
+        )
+
+        in_size = AudioConfig.INPUT_SAMPLE_RATE * frame_duration // 1000
+        out_size = AudioConfig.OUTPUT_SAMPLE_RATE * frame_duration // 1000
+        pcm_in = self._signal(AudioConfig.INPUT_SAMPLE_RATE)
+        pcm_out = self._signal(AudioConfig.OUTPUT_SAMPLE_RATE)
+        in_frames = [
+            pcm_in[i : i + in_size].tobytes()
+            for i in range(0, len(pcm_in) - in_size + 1, in_size)
+        ]
+        packets = [
+            tts_encoder.encode(pcm_out[i : i + out_size].tobytes(), out_size)
+            for i in range(0, len(pcm_out) - out_size + 1, out_size)
+        ]
+
+        start = time.perf_counter()
+        for frame in in_frames:
+            encoder.encode(frame, in_size)
+        encode_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for packet in packets:
+            decoder.decode(packet, out_size)
+        decode_elapsed = time.perf_counter() - start
+
+        return {
+            "encode_rtf": _rtf(encode_elapsed, len(in_frames) * frame_duration / 1000),
+            "decode_rtf": _rtf(decode_elapsed, len(packets) * frame_duration / 1000),
+        }
+
+    def bench_resample(
+        self, from_rate: int, to_rate: int, quality: str, frame_duration: int
+    ) -> float:
+        """
+        按帧流式重采样的实时率.
+        """
+        import soxr
+
+        resampler = soxr.ResampleStream(
+            from_rate, to_rate, AudioConfig.CHANNELS, dtype="int16", quality=quality
+        )
+        pcm = self._signal(from_rate)
+        size = from_rate * frame_duration // 1000
+        chunks = [pcm[i : i + size] for i in range(0, len(pcm) - size + 1, size)]
+
+        start = time.perf_counter()
+        for chunk in chunks:
+            resampler.resample_chunk(chunk, last=False)
+        return _rtf(time.perf_counter() - start, len(chunks) * frame_duration / 1000)
+
+    def bench_kws(self, threads: int) -> Optional[float]:
+        """
+        唤醒词模型实时率（模型不可用时返回 None）
+        """
+        if self._kws_detector is None:
+            from src.audio_processing.wake_word_detect import WakeWordDetector
+
+            self._kws_detector = WakeWordDetector()
+        detector = self._kws_detector
+        if not detector.enabled or not detector.keyword_spotter:
+            return None
+        if detector.num_threads != threads:
+            detector.num_threads = threads
+            detector._init_kws_model()
+            if not detector.enabled:
+                return None
+
+        spotter = detector.keyword_spotter
+        stream = spotter.create_stream()
+        samples = self._signal(AudioConfig.INPUT_SAMPLE_RATE).astype(np.float32) / 32768
+        size = AudioConfig.INPUT_FRAME_SIZE
+
+        start = time.perf_counter()
+        for i in range(0, len(samples) - size + 1, size):
+            stream.accept_waveform(
+                sample_rate=AudioConfig.INPUT_SAMPLE_RATE, waveform=samples[i : i + size]
+            )
+            while spotter.is_ready(stream):
+                spotter.decode_stream(stream)
+        return _rtf(time.perf_counter() - start, len(samples) / AudioConfig.INPUT_SAMPLE_RATE)
+
+    # ------------------------------------------------------------------
+    # 设备测试
+    # ------------------------------------------------------------------
+
+    async def bench_device(self, latency: str, frame_duration: int) -> Optional[Dict]:
+        """以与 AudioCodec 相同的参数打开双工流，统计欠载/溢出和上报延迟.
+
+        Returns:
+            dict: 失败时为 None
+        """
+        try:
+            import sounddevice as sd
+
+            input_id, output_id = sd.default.device
+            input_rate = int(sd.query_devices(input_id)["default_samplerate"])
+            output_rate = int(sd.query_devices(output_id)["default_samplerate"])
+        except Exception as e:
+            logger.warning(f"无法查询音频设备，跳过设备测试: {e}")
+            return None
+
+        problems = {"input_overflow": 0, "output_underflow": 0}
+
+        def on_status(status):
+            if status.input_overflow:
+                problems["input_overflow"] += 1
+            if status.output_underflow:
+                problems["output_underflow"] += 1
+
+        def input_callback(indata, frames, time_info, status):
+            on_status(status)
+
+        def output_callback(outdata, frames, time_info, status):
+            on_status(status)
+            outdata.fill(0)
+
+        try:
+            input_stream = sd.InputStream(
+                samplerate=input_rate,
+                channels=AudioConfig.CHANNELS,
+                dtype=np.int16,
+                blocksize=input_rate * frame_duration // 1000,
+                callback=input_callback,
+                latency=latency,
+            )
+            output_stream = sd.OutputStream(
+                samplerate=output_rate,
+                channels=AudioConfig.CHANNELS,
+                dtype=np.int16,
+                blocksize=output_rate * frame_duration // 1000,
+                callback=output_callback,
+                latency=latency,
+            )
+        except Exception as e:
+            logger.warning(f"打开音频流失败({latency}): {e}")
+            return None
+
+        try:
+            input_stream.start()
+            output_stream.start()
+            await asyncio.sleep(min(self.seconds, 2.0))
+            input_latency = float(input_stream.latency)
+            output_latency = float(output_stream.latency)
+        finally:
+            for stream in (input_stream, output_stream):
+                try:
+                    stream.stop()
+                    stream.close()
+                except Exception:
+                    pass
+
+        block = frame_duration / 1000
+        return {
+            "input_latency_ms": round(input_latency * 1000, 1),
+            "output_latency_ms": round(output_latency * 1000, 1),
+            # 采集块 + 输入延迟 + 输出延迟 + 播放块
+            "round_trip_ms": round((input_latency + output_latency + 2 * block) * 1000, 1),
+            **problems,
+        }
+
+    # ------------------------------------------------------------------
+    # 流程
+    # ------------------------------------------------------------------
+
+    def _device_rates(self) -> Dict[str, int]:
+        try:
+            import sounddevice as sd
+
+            input_id, output_id = sd.default.device
+            return {
+                "input": int(sd.query_devices(input_id)["default_samplerate"]),
+                "output": int(sd.query_devices(output_id)["default_samplerate"]),
+            }
+        except Exception:
+            return {"input": 48000, "output": 48000}
+
+    def _bench_cpu(self) -> Dict:
+        results: Dict = {"codec": {}, "resample": {}, "kws": {}}
+        for frame_duration in self.FRAME_DURATIONS:
+            results["codec"][frame_duration] = self.bench_codec(frame_duration)
+
+        rates = self._device_rates()
+        results["device_rates"] = rates
+        quality = self.RESAMPLE_QUALITY
+        results["resample"][quality] = {
+            "input": self.bench_resample(
+                rates["input"], AudioConfig.INPUT_SAMPLE_RATE, quality, 20
+            ),
+            "output": self.bench_resample(
+                AudioConfig.OUTPUT_SAMPLE_RATE, rates["output"], quality, 20
+            ),
+        }
+
+        max_threads = os.cpu_count() or 1
+        for threads in self.KWS_THREADS:
+            if threads > max_threads:
+                break
+            # 各测两次取较慢的一次，过滤偶发抖动
+            runs = [self.bench_kws(threads) for _ in range(2)]
+            if any(rtf is None for rtf in runs):
+                results["kws"] = None
+                break
+            results["kws"][threads] = max(runs)
+        return results
+
+    def choose(self, results: Dict) -> Dict:
+        """
+        根据测量结果选择配置.
+        """
+        rates = results["device_rates"]
+        resample = results["resample"]
+        needs_resample = (
+            rates["input"] != AudioConfig.INPUT_SAMPLE_RATE
+            or rates["output"] != AudioConfig.OUTPUT_SAMPLE_RATE
+        )
+        quality = self.RESAMPLE_QUALITY
+
+        kws = results["kws"]
+        threads = None
+        if kws:
+            fastest = min(kws.values())
+            threads = min(
+                n for n, rtf in kws.items() if rtf <= fastest * self.KWS_TOLERANCE
+            )
+
+        codec_20 = results["codec"][20]
+        pipeline_20 = (
+            codec_20["encode_rtf"]
+            + codec_20["decode_rtf"]
+            + (
+                resample[quality]["input"] + resample[quality]["output"]
+                if needs_resample
+                else 0.0
+            )
+            + (kws[threads] if kws else 0.0)
+        )
+        frame_duration = 20 if pipeline_20 <= self.FRAME_20MS_BUDGET else 60
+
+        latency = "low"
+        devices = results.get("devices") or {}
+        if devices.get("low") and (
+            devices["low"]["input_overflow"] or devices["low"]["output_underflow"]
+        ):
+            latency = "high"
+
+        return {
+            "FRAME_DURATION": frame_duration,
+            "RESAMPLE_QUALITY": quality,
+            "STREAM_LATENCY": latency,
+            "KWS_THREADS": threads,
+            "pipeline_rtf_20ms": round(pipeline_20, 4),
+        }
+
+    async def run(self) -> Dict:
+        """
+        执行全部测试并返回测量结果与选定配置（不写入配置）
+        """
+        started = time.perf_counter()
+        logger.info("开始硬件校准...")
+        results = await asyncio.to_thread(self._bench_cpu)
+
+        if self.test_devices:
+            results["devices"] = {}
+            choice = self.choose(results)
+            for latency in self.STREAM_LATENCIES:
+                device = await self.bench_device(latency, choice["FRAME_DURATION"])
+                results["devices"][latency] = device
+                # low 档稳定则无需再测 high
+                if device and not (device["input_overflow"] or device["output_underflow"]):
+                    break
+
+        results["choice"] = self.choose(results)
+        results["elapsed_sec"] = round(time.perf_counter() - started, 2)
+        logger.info(f"硬件校准完成，耗时 {results['elapsed_sec']}s: {results['choice']}")
+        return results
+
+    def save(self, results: Dict) -> bool:
+        """
+        将选定配置写入 config.json，并使帧长在本进程内立即生效.
+        """
+        choice = results["choice"]
+        ok = self.config.update_config(
+            "AUDIO_OPTIONS.FRAME_DURATION", choice["FRAME_DURATION"]
+        )
+        ok &= self.config.update_config(
+            "AUDIO_OPTIONS.RESAMPLE_QUALITY", choice["RESAMPLE_QUALITY"]
+        )
+        ok &= self.config.update_config(
+            "AUDIO_OPTIONS.STREAM_LATENCY", choice["STREAM_LATENCY"]
+        )
+        if choice["KWS_THREADS"]:
+            ok &= self.config.update_config(
+                "WAKE_WORD_OPTIONS.NUM_THREADS", choice["KWS_THREADS"]
+            )
+        ok &= self.config.update_config(
+            "CALIBRATION",
+            {
+                "VERSION": self.VERSION,
+                "TIMESTAMP": int(time.time()),
+                "FINGERPRINT": self.hardware_fingerprint(),
+                "DEVICES": self.audio_devices(),
+                "RESULTS": _json_keys(results),
+            },
+        )
+
+        # 帧长只对官方服务器生效（与 get_frame_duration 一致）
+        from src.constants.constants import get_frame_duration
+
+        AudioConfig.set_frame_duration(get_frame_duration())
+        return ok
+
+
+def _json_keys(value):
+    """
+    JSON 只允许字符串键（帧长、线程数等整数键转为字符串）
+    """
+    if isinstance(value, dict):
+        return {str(key): _json_keys(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_keys(item) for item in value]
+    return value
+
+
+def format_report(results: Dict) -> List[str]:
+    """
+    校准结果的可读摘要.
+    """
+    lines = []
+    for frame_duration, codec in results["codec"].items():
+        lines.append(
+            f"Opus {frame_duration}ms: 编码 RTF {codec['encode_rtf']:.4f}，"
+            f"解码 RTF {codec['decode_rtf']:.4f}"
+        )
+    rates = results["device_rates"]
+    lines.append(f"设备采样率: 输入 {rates['input']}Hz，输出 {rates['output']}Hz")
+    for quality, cost in results["resample"].items():
+        lines.append(
+            f"重采样 {quality}: 输入 RTF {cost['input']:.4f}，输出 RTF {cost['output']:.4f}"
+        )
+    if results["kws"]:
+        for threads, rtf in results["kws"].items():
+            lines.append(f"KWS {threads} 线程: RTF {rtf:.4f}")
+    else:
+        lines.append("KWS: 模型不可用，未测量")
+    for latency, device in (results.get("devices") or {}).items():
+        if device:
+            lines.append(
+                f"音频流 latency={latency}: 输入 {device['input_latency_ms']}ms，"
+                f"输出 {device['output_latency_ms']}ms，往返约 {device['round_trip_ms']}ms，"
+                f"溢出 {device['input_overflow']} 次，欠载 {device['output_underflow']} 次"
+            )
+        else:
+            lines.append(f"音频流 latency={latency}: 无法打开")
+    choice = results["choice"]
+    lines.append(
+        f"选定: 帧长 {choice['FRAME_DURATION']}ms，重采样 {choice['RESAMPLE_QUALITY']}，"
+        f"流延迟 {choice['STREAM_LATENCY']}，KWS 线程 {choice['KWS_THREADS'] or '不变'}"
+    )
+    return lines
@@ -0,0 +1,131 @@
+"""
+带总截止时间的并发关闭器.
+
+与 StagedInitializer 相同的依赖声明方式：互不依赖的关闭步骤并发执行，
+全部步骤共享一个截止时间，到期仍未完成的步骤被取消，并报告耗时最长的组件。
+"""
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ShutdownStage:
+    name: str
+    func: Callable
+    after: Tuple[str, ...] = ()
+    timing: Dict = field(default_factory=dict)
+
+
+class StagedShutdown:
+    def __init__(self, deadline: float = 3.0, slow_ms: float = 500):
+        """
+        Args:
+            deadline: 全部步骤的总截止时间（秒）
+            slow_ms: 单个步骤超过该耗时记录警告
+        """
+        self._stages: Dict[str, ShutdownStage] = {}
+        self._deadline = deadline
+        self._slow_ms = slow_ms
+        self._t0 = 0.0
+
+    def add(self, name: str, func: Callable, after: Iterable[str] = ()):
+        """添加关闭步骤.
+
+        Args:
+            name: 步骤名
+            func: 同步函数或返回协程的函数
+            after: 依赖的步骤（必须已添加）；依赖失败或超时不影响本步骤执行
+        """
+        after = tuple(after)
+        missing = [dep for dep in after if dep not in self._stages]
+        if missing:
+            raise ValueError(f"步骤 {name} 依赖未定义的步骤: {missing}")
+        if name in self._stages:
+            raise ValueError(f"步骤 {name} 重复定义")
+        self._stages[name] = ShutdownStage(name, func, after)
+
+    async def _run_stage(self, stage: ShutdownStage, tasks: Dict[str, asyncio.Task]):
+        ready = time.perf_counter()
+        if stage.after:
+            await asyncio.wait([tasks[dep] for dep in stage.after])
+            ready = time.perf_counter()
+        stage.timing = {"start_ms": round((ready - self._t0) * 1000, 1)}
+        try:
+            result = stage.func()
+            if inspect.isawaitable(result):
+                await result
+            stage.timing["status"] = "ok"
+        except asyncio.CancelledError:
+            stage.timing["status"] = "timeout"
+            raise
+        except Exception as e:
+            stage.timing["status"] = "error"
+            stage.timing["error"] = str(e)
+            logger.error(f"关闭步骤 {stage.name} 失败: {e}")
+        finally:
+            stage.timing["duration_ms"] = round(
+                (time.perf_counter() - ready) * 1000, 1
+            )
+
+    async def run(self) -> Dict:
+        """执行全部步骤，不抛出异常.
+
+        Returns:
+            dict: total_ms、各步骤的开始时间/耗时/状态（ok、error、timeout），
+            超时被取消的步骤列表与最慢的步骤
+        """
+        self._t0 = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        for stage in self._stages.values():
+            tasks[stage.name] = asyncio.create_task(
+                self._run_stage(stage, tasks), name=f"关闭:{stage.name}"
+            )
+
+        _, pending = await asyncio.wait(tasks.values(), timeout=self._deadline)
+        if pending:
+            for task in pending:
+                task.cancel()
+            # 只给被取消的步骤很短的收尾时间，不再等待
+            await asyncio.wait(pending, timeout=0.1)
+
+        total_ms = round((time.perf_counter() - self._t0) * 1000, 1)
+        timings = {}
+        for name, stage in self._stages.items():
+            timing = dict(stage.timing)
+            if tasks[name] in pending:
+                # 依赖未完成而尚未开始的步骤耗时记为0
+                timing["status"] = "timeout"
+                timing.setdefault("duration_ms", 0.0)
+            timings[name] = timing
+
+        timed_out = [name for name, t in timings.items() if t["status"] == "timeout"]
+        slowest: Optional[str] = max(
+            timings, key=lambda n: timings[n]["duration_ms"], default=None
+        )
+        logger.info(
+            f"关闭耗时 {total_ms}ms: "
+            + "，".join(f"{n} {t['duration_ms']}ms" for n, t in timings.items())
+        )
+        if timed_out:
+            logger.warning(
+                f"关闭超过截止时间 {self._deadline}s，已取消: {', '.join(timed_out)}"
+            )
+        for name, timing in timings.items():
+            if name not in timed_out and timing["duration_ms"] > self._slow_ms:
+                logger.warning(f"关闭步骤 {name} 较慢: {timing['duration_ms']}ms")
+
+        return {
+            "total_ms": total_ms,
+            "deadline_sec": self._deadline,
+            "stages": timings,
+            "timed_out": timed_out,
+            "slowest": slowest,
+        }
@@ -307,7 +307,7 @@ class SystemInitializer:
         """处理激活流程，根据需要创建激活界面.
 
         Args:
-            mode: 界面模式，"gui"或"cli"
+            mode: 界面模式，"gui"、"cli"或"daemon"（非 gui 均走命令行激活）
 
         Returns:
             Dict: 激活结果
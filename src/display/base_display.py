@@ -62,6 +62,21 @@ class BaseDisplay(ABC):
         关闭显示.
         """
 
+    async def update_network_status(self, summary: str, quality: str):
+        """更新网络质量显示（默认不显示）
+
+        Args:
+            summary: 一行摘要，如 "RTT 45ms · 抖动 8ms · 丢包 0.5% · 良好"
+            quality: good / fair / poor / unknown
+        """
+
+    async def update_loop_status(self, summary: str):
+        """更新事件循环延迟显示（默认不显示）
+
+        Args:
+            summary: 一行摘要，如 "延迟 p50 1ms · p99 12ms · 最大 80ms · 慢回调 3"
+        """
+
     async def toggle_mode(self):
         """
         切换模式（在基类中定义接口）
@@ -9,6 +9,7 @@ from collections import deque
 from typing import Callable, Optional
 
 from src.display.base_display import BaseDisplay
+from src.utils.logging_config import detach_console_handlers
 
 
 class CliDisplay(BaseDisplay):
@@ -24,6 +25,9 @@ class CliDisplay(BaseDisplay):
         self._dash_connected = False
         self._dash_text = ""
         self._dash_emotion = ""
+        self._dash_network = ""
+        self._dash_loop = ""
+        self._profile_task: Optional[asyncio.Task] = None
         # 布局：仅两块区域（显示区 + 输入区）
         # 预留两行输入空间（分隔线 + 输入行），并额外多留一行用于中文输入溢出的清理
         self._input_area_lines = 3
@@ -102,6 +106,24 @@ class CliDisplay(BaseDisplay):
         self._dash_emotion = emotion_name
         await self._render_dashboard()
 
+    async def update_network_status(self, summary: str, quality: str):
+        """
+        更新网络质量（仅更新仪表盘，不追加新行）。
+        """
+        if summary == self._dash_network:
+            return
+        self._dash_network = summary
+        await self._render_dashboard()
+
+    async def update_loop_status(self, summary: str):
+        """
+        更新事件循环延迟（仅更新仪表盘，不追加新行）。
+        """
+        if summary == self._dash_loop:
+            return
+        self._dash_loop = summary
+        await self._render_dashboard()
+
     async def start(self):
         """
         启动异步CLI显示.
@@ -179,12 +201,7 @@ class CliDisplay(BaseDisplay):
 
         root = logging.getLogger()
         # 移除直接写 stdout/stderr 的处理器，避免覆盖渲染
-        for h in list(root.handlers):
-            if isinstance(h, logging.StreamHandler) and getattr(h, "stream", None) in (
-                sys.stdout,
-                sys.stderr,
-            ):
-                root.removeHandler(h)
+        detach_console_handlers()
 
         handler = _DisplayLogHandler(self)
         handler.setLevel(logging.WARNING)
@@ -210,10 +227,35 @@ class CliDisplay(BaseDisplay):
         elif cmd == "x":
             if self.abort_callback:
                 await self.command_queue.put(self.abort_callback)
+        elif cmd == "p" or (cmd.startswith("p ") and cmd[2:].strip().isdigit()):
+            self._start_profile(int(cmd[2:].strip() or 10))
         else:
             if self.send_text_callback:
                 await self.send_text_callback(cmd)
 
+    def _start_profile(self, seconds: int):
+        """
+        后台采样剖析，结果文件路径显示在仪表盘.
+        """
+        if self._profile_task and not self._profile_task.done():
+            self._dash_text = "采样剖析进行中，请稍候"
+            return
+        self._dash_text = f"采样剖析中（{seconds} 秒）..."
+        self._profile_task = asyncio.create_task(self._run_profile(seconds))
+
+    async def _run_profile(self, seconds: int):
+        from src.utils.sampling_profiler import capture_profile
+
+        try:
+            result = await capture_profile(max(1, seconds))
+            self._dash_text = (
+                f"剖析完成: {result['folded']} | {result['tracemalloc']}"
+            )
+        except Exception as e:
+            self.logger.error(f"采样剖析失败: {e}")
+            self._dash_text = f"采样剖析失败: {e}"
+        await self._render_dashboard()
+
     async def close(self):
         """
         关闭CLI显示.
@@ -225,7 +267,10 @@ class CliDisplay(BaseDisplay):
         """
         将帮助信息写入顶部内容显示区，而非直接打印。
         """
-        help_text = "r: 开始/停止 | x: 打断 | q: 退出 | h: 帮助 | 其他: 发送文本"
+        help_text = (
+            "r: 开始/停止 | x: 打断 | p [秒]: 采样剖析 | q: 退出 | h: 帮助 | "
+            "其他: 发送文本"
+        )
         self._dash_text = help_text
 
     async def _init_screen(self):
@@ -328,6 +373,8 @@ class CliDisplay(BaseDisplay):
         lines = [
             f"状态: {trunc(self._dash_status)}",
             f"连接: {'已连接' if self._dash_connected else '未连接'}",
+            f"网络: {trunc(self._dash_network) or '-'}",
+            f"循环: {trunc(self._dash_loop) or '-'}",
             f"表情: {trunc(self._dash_emotion)}",
             f"文本: {trunc(self._dash_text)}",
         ]
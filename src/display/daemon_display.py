@@ -0,0 +1,52 @@
+from typing import Callable, Optional
+
+from src.display.base_display import BaseDisplay
+
+
+class DaemonDisplay(BaseDisplay):
+    """无界面（守护进程）显示：不读取终端输入，状态与文本只写日志.
+
+    不导入任何界面库，适合以系统服务方式运行在内存有限的设备上。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._last_status = None
+
+    async def set_callbacks(
+        self,
+        press_callback: Optional[Callable] = None,
+        release_callback: Optional[Callable] = None,
+        mode_callback: Optional[Callable] = None,
+        auto_callback: Optional[Callable] = None,
+        abort_callback: Optional[Callable] = None,
+        send_text_callback: Optional[Callable] = None,
+    ):
+        """
+        无输入设备，忽略回调.
+        """
+
+    async def update_button_status(self, text: str):
+        pass
+
+    async def update_status(self, status: str, connected: bool):
+        """
+        仅在状态变化时记录.
+        """
+        current = (status, connected)
+        if current != self._last_status:
+            self._last_status = current
+            self.logger.info(f"状态: {status}（{'已连接' if connected else '未连接'}）")
+
+    async def update_text(self, text: str):
+        if text:
+            self.logger.info(f"文本: {text}")
+
+    async def update_emotion(self, emotion_name: str):
+        pass
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        self.logger.info("守护进程显示已关闭")
@@ -51,6 +51,7 @@ class GuiDisplay(BaseDisplay, QObject, metaclass=CombinedMeta):
         self._running = True
         self.current_status = ""
         self.is_connected = True
+        self._network_quality = "unknown"
 
         # 回调函数
         self.button_press_callback = None
@@ -153,8 +154,7 @@ class GuiDisplay(BaseDisplay, QObject, metaclass=CombinedMeta):
         """
         更新状态文本并处理相关逻辑.
         """
-        full_status_text = f"状态: {status}"
-        self._safe_update_label(self.status_label, full_status_text)
+        self._safe_update_label(self.status_label, self._format_status(status))
 
         # 既跟踪状态文本变化，也跟踪连接状态变化
         new_connected = bool(connected)
@@ -170,6 +170,27 @@ class GuiDisplay(BaseDisplay, QObject, metaclass=CombinedMeta):
         if status_changed or connected_changed:
             self._update_system_tray(status)
 
+    async def update_network_status(self, summary: str, quality: str):
+        """
+        网络质量：摘要放在状态标签的提示中，网络变差时在状态后追加提示.
+        """
+        if self.status_label:
+            try:
+                self.status_label.setToolTip(f"网络: {summary}" if summary else "")
+            except RuntimeError as e:
+                self.logger.error(f"更新标签失败: {e}")
+        if quality != self._network_quality:
+            self._network_quality = quality
+            if self.current_status:
+                self._safe_update_label(
+                    self.status_label, self._format_status(self.current_status)
+                )
+
+    def _format_status(self, status: str) -> str:
+        labels = {"fair": "网络一般", "poor": "网络较差"}
+        hint = labels.get(self._network_quality)
+        return f"状态: {status} ({hint})" if hint else f"状态: {status}"
+
     async def update_text(self, text: str):
         """
         更新TTS文本.
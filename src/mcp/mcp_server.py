@@ -4,13 +4,21 @@ Reference: https://modelcontextprotocol.io/specification/2024-11-05
 """
 
 import asyncio
-import json
+import hashlib
+import importlib
+import threading
+import time
 from dataclasses import dataclass, field
 from enum import Enum
+from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from src.constants.system import SystemConstants
+from src.utils import json_codec
+from src.utils.config_manager import ConfigManager
 from src.utils.logging_config import get_logger
+from src.utils.metrics import get_metrics
+from src.utils.resource_finder import get_user_cache_dir
 
 logger = get_logger(__name__)
 
@@ -191,22 +199,134 @@ class McpTool:
             else:
                 text = str(result)
 
-            return json.dumps(
+            return json_codec.dumps(
                 {"content": [{"type": "text", "text": text}], "isError": False}
             )
 
         except Exception as e:
             logger.error(f"Error calling tool {self.name}: {e}", exc_info=True)
-            return json.dumps(
+            return json_codec.dumps(
                 {"content": [{"type": "text", "text": str(e)}], "isError": True}
             )
 
 
+class ToolProvider:
+    """一组工具的提供者（对应 src/mcp/tools 下的一个包）
+
+    register(add_tool) 在内部导入实现模块、创建管理器并注册工具；
+    首次 load() 时才执行，结果缓存。
+    """
+
+    TOOLS_DIR = Path(__file__).parent / "tools"
+
+    def __init__(self, name: str, register: Callable[[Callable], None]):
+        self.name = name
+        self._register = register
+        self._tools: Optional[Dict[str, McpTool]] = None
+        self.load_ms: Optional[float] = None
+        # 同步加载与线程池加载可能并发，导入只执行一次
+        self._thread_lock = threading.Lock()
+        self._load_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._tools is not None
+
+    def load(self) -> Dict[str, McpTool]:
+        """
+        导入实现模块并收集其注册的工具.
+        """
+        with self._thread_lock:
+            if self._tools is None:
+                self._load_locked()
+        return self._tools
+
+    async def load_async(self) -> Dict[str, McpTool]:
+        """在线程池中加载，不阻塞事件循环（首次导入可能耗时数百毫秒）
+
+        并发的首次调用等待同一次加载。
+        """
+        if self._tools is not None:
+            return self._tools
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self._tools is None:
+                await asyncio.to_thread(self.load)
+        return self._tools
+
+    def _load_locked(self):
+        tools: Dict[str, McpTool] = {}
+
+        def collect(tool):
+            if isinstance(tool, tuple):
+                tool = McpTool(*tool)
+            tools[tool.name] = tool
+
+        start = time.perf_counter()
+        self._register(collect)
+        self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+        self._tools = tools
+        logger.info(f"[MCP] 工具模块 {self.name} 已加载，耗时 {self.load_ms}ms")
+
+    def fingerprint(self) -> str:
+        """
+        实现包源码的指纹（文件修改时间与大小），源码变化后描述缓存失效.
+        """
+        digest = hashlib.sha1(SystemConstants.APP_VERSION.encode())
+        package = self.TOOLS_DIR / self.name
+        for path in sorted(package.rglob("*.py")):
+            stat = path.stat()
+            digest.update(
+                f"{path.relative_to(package)}:{stat.st_mtime_ns}:{stat.st_size}".encode()
+            )
+        return digest.hexdigest()
+
+
+class DeferredMcpTool:
+    """由缓存描述注册的工具，首次调用时才加载提供者.
+
+    tools/list 只需名称、描述和参数模式；参数解析与执行交给加载后的真实工具。
+    """
+
+    def __init__(self, descriptor: Dict[str, Any], provider: ToolProvider):
+        self.name = descriptor["name"]
+        self.description = descriptor["description"]
+        self._descriptor = descriptor
+        self.provider = provider
+
+    def to_json(self) -> Dict[str, Any]:
+        return self._descriptor
+
+    async def call(self, arguments: Dict[str, Any]) -> str:
+        try:
+            tools = await self.provider.load_async()
+            tool = tools.get(self.name)
+        except Exception as e:
+            logger.error(f"加载工具模块 {self.provider.name} 失败: {e}", exc_info=True)
+            tool = None
+        if tool is None:
+            return json_codec.dumps(
+                {
+                    "content": [{"type": "text", "text": f"Tool unavailable: {self.name}"}],
+                    "isError": True,
+                }
+            )
+        return await tool.call(arguments)
+
+
 class McpServer:
     """
     MCP服务器实现.
     """
 
+    # 工具描述缓存格式版本
+    MANIFEST_VERSION = 1
+    # tools/list 单页负载上限（字节）
+    TOOLS_LIST_PAGE_BYTES = 8000
+    # 紧凑模式下工具描述的最大字符数
+    COMPACT_DESCRIPTION_CHARS = 200
+
     _instance = None
 
     @classmethod
@@ -220,8 +340,27 @@ class McpServer:
 
     def __init__(self):
         self.tools: List[McpTool] = []
+        # 名称 -> 工具（同名时以先注册者为准）
+        self._tools_by_name: Dict[str, McpTool] = {}
+        # tools/list 缓存：各工具的序列化结果与按游标缓存的整页应答，add_tool 时失效
+        self._tool_entries: Optional[List[Tuple[str, int]]] = None
+        self._tool_index: Dict[str, int] = {}
+        self._tools_list_pages: Dict[str, str] = {}
+        # 紧凑模式：工具描述只保留首行，减少 tools/list 的分页往返
+        self.compact_tool_schema = bool(
+            ConfigManager.get_instance().get_config(
+                "MCP_OPTIONS.COMPACT_TOOL_SCHEMA", False
+            )
+        )
         self._send_callback: Optional[Callable] = None
         self._camera = None
+        self._providers: Dict[str, ToolProvider] = {}
+        # 视觉服务配置：摄像头模块延迟加载时，待加载后再应用
+        self._vision_config: Optional[Tuple[str, Optional[str]]] = None
+
+        metrics = get_metrics()
+        metrics.describe("xiaozhi_mcp_tool_calls_total", "counter", "MCP工具调用次数")
+        metrics.describe("xiaozhi_mcp_tool_duration_ms", "histogram", "MCP工具调用耗时")
 
     def set_send_callback(self, callback: Callable):
         """
@@ -239,69 +378,79 @@ class McpServer:
             tool = McpTool(name, description, properties, callback)
 
         # 检查是否已存在
-        if any(t.name == tool.name for t in self.tools):
+        if tool.name in self._tools_by_name:
             logger.warning(f"Tool {tool.name} already added")
             return
 
         logger.info(f"Add tool: {tool.name}")
         self.tools.append(tool)
+        self._tools_by_name[tool.name] = tool
+        self._invalidate_tools_list()
 
-    def add_common_tools(self):
+    def get_tool(self, name: str) -> Optional[McpTool]:
         """
-        添加通用工具.
+        按名称查找工具.
         """
-        # 备份原有工具列表
-        original_tools = self.tools.copy()
-        self.tools.clear()
-
-        # 添加系统工具
-        from src.mcp.tools.system import get_system_tools_manager
-
-        system_manager = get_system_tools_manager()
-        system_manager.init_tools(self.add_tool, PropertyList, Property, PropertyType)
-
-        # 添加日程管理工具
-        from src.mcp.tools.calendar import get_calendar_manager
-
-        calendar_manager = get_calendar_manager()
-        calendar_manager.init_tools(self.add_tool, PropertyList, Property, PropertyType)
-
-        # 添加倒计时器工具
-        from src.mcp.tools.timer import get_timer_manager
-
-        timer_manager = get_timer_manager()
-        timer_manager.init_tools(self.add_tool, PropertyList, Property, PropertyType)
-
-        # 添加音乐播放器工具
-        from src.mcp.tools.music import get_music_tools_manager
-
-        music_manager = get_music_tools_manager()
-        music_manager.init_tools(self.add_tool, PropertyList, Property, PropertyType)
-
-        # 添加12306铁路查询工具
-        from src.mcp.tools.railway import get_railway_tools_manager
-
-        railway_manager = get_railway_tools_manager()
-        railway_manager.init_tools(self.add_tool, PropertyList, Property, PropertyType)
-
-        # 添加搜索工具
-        from src.mcp.tools.search import get_search_manager
-
-        search_manager = get_search_manager()
-        search_manager.init_tools(self.add_tool, PropertyList, Property, PropertyType)
-
-        # 添加菜谱工具
-        from src.mcp.tools.recipe import get_recipe_manager
+        return self._tools_by_name.get(name)
 
-        recipe_manager = get_recipe_manager()
-        recipe_manager.init_tools(self.add_tool, PropertyList, Property, PropertyType)
-
-        # 添加摄像头工具
+    def _reindex_tools(self):
+        """
+        直接修改 self.tools 后重建名称索引.
+        """
+        self._tools_by_name.clear()
+        for tool in self.tools:
+            self._tools_by_name.setdefault(tool.name, tool)
+        self._invalidate_tools_list()
+
+    def _invalidate_tools_list(self):
+        self._tool_entries = None
+        self._tool_index.clear()
+        self._tools_list_pages.clear()
+
+    def _common_tool_providers(self) -> List[ToolProvider]:
+        """
+        通用工具提供者（注册顺序即 tools/list 顺序）
+        """
+
+        def manager_provider(name: str, factory: str) -> ToolProvider:
+            def register(add_tool):
+                module = importlib.import_module(f"src.mcp.tools.{name}")
+                manager = getattr(module, factory)()
+                manager.init_tools(add_tool, PropertyList, Property, PropertyType)
+
+            return ToolProvider(name, register)
+
+        return [
+            # 系统工具
+            manager_provider("system", "get_system_tools_manager"),
+            # 日程管理工具
+            manager_provider("calendar", "get_calendar_manager"),
+            # 倒计时器工具
+            manager_provider("timer", "get_timer_manager"),
+            # 音乐播放器工具
+            manager_provider("music", "get_music_tools_manager"),
+            # 12306铁路查询工具
+            manager_provider("railway", "get_railway_tools_manager"),
+            # 搜索工具
+            manager_provider("search", "get_search_manager"),
+            # 菜谱工具
+            manager_provider("recipe", "get_recipe_manager"),
+            # 摄像头工具
+            ToolProvider("camera", self._register_camera_tools),
+            # 高德地图工具
+            manager_provider("amap", "get_amap_manager"),
+            # 八字命理工具
+            manager_provider("bazi", "get_bazi_manager"),
+        ]
+
+    def _register_camera_tools(self, add_tool):
+        """
+        注册摄像头工具.
+        """
         from src.mcp.tools.camera import take_photo
 
-        # 注册take_photo工具
         properties = PropertyList([Property("question", PropertyType.STRING)])
-        self.add_tool(
+        add_tool(
             McpTool(
                 "take_photo",
                 "拍照并分析图像内容。可以进行物体识别、文字识别、场景分析、问题解答等。适用于：看看这是什么、拍照识别、读取文字、分析场景、解答问题等需求。Take photo and analyze image content including object recognition, text recognition, scene analysis, and question answering.",
@@ -309,21 +458,110 @@ class McpServer:
                 take_photo,
             )
         )
+        # 初始化时已收到视觉服务配置
+        if self._vision_config:
+            self._apply_vision_config(*self._vision_config)
 
-        # 添加高德地图工具
-        from src.mcp.tools.amap import get_amap_manager
-
-        amap_manager = get_amap_manager()
-        amap_manager.init_tools(self.add_tool, PropertyList, Property, PropertyType)
+    def add_common_tools(self):
+        """添加通用工具.
 
-        # 添加八字命理工具
-        from src.mcp.tools.bazi import get_bazi_manager
+        默认按缓存的工具描述注册（名称、说明、参数模式），实现模块在首次 tools/call 时
+        才导入并初始化管理器；缓存缺失或源码变化的提供者立即加载并刷新缓存。
+        """
+        start = time.perf_counter()
+        deferred = ConfigManager.get_instance().get_config(
+            "MCP_OPTIONS.DEFERRED_TOOLS", True
+        )
 
-        bazi_manager = get_bazi_manager()
-        bazi_manager.init_tools(self.add_tool, PropertyList, Property, PropertyType)
+        # 备份原有工具列表
+        original_tools = self.tools.copy()
+        self.tools.clear()
+        self._reindex_tools()
+
+        manifest = self._load_tool_manifest() if deferred else {}
+        manifest_changed = False
+        deferred_count = 0
+
+        for provider in self._common_tool_providers():
+            self._providers[provider.name] = provider
+            fingerprint = provider.fingerprint() if deferred else None
+            entry = manifest.get(provider.name)
+
+            if entry and entry.get("fingerprint") == fingerprint:
+                for descriptor in entry["tools"]:
+                    self.add_tool(DeferredMcpTool(descriptor, provider))
+                deferred_count += 1
+                continue
+
+            try:
+                tools = provider.load()
+            except Exception as e:
+                logger.error(f"加载工具模块 {provider.name} 失败: {e}", exc_info=True)
+                continue
+            for tool in tools.values():
+                self.add_tool(tool)
+            if deferred:
+                manifest[provider.name] = {
+                    "fingerprint": fingerprint,
+                    "tools": [tool.to_json() for tool in tools.values()],
+                }
+                manifest_changed = True
+
+        if manifest_changed:
+            self._save_tool_manifest(manifest)
 
         # 恢复原有工具
         self.tools.extend(original_tools)
+        self._reindex_tools()
+
+        logger.info(
+            f"[MCP] 通用工具注册完成: {len(self.tools)} 个工具，"
+            f"{deferred_count}/{len(self._providers)} 个模块延迟加载，"
+            f"耗时 {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+    @staticmethod
+    def _tool_manifest_path() -> Path:
+        return get_user_cache_dir() / "mcp_tools.json"
+
+    def _load_tool_manifest(self) -> Dict[str, Any]:
+        """
+        读取工具描述缓存.
+        """
+        path = self._tool_manifest_path()
+        try:
+            data = json_codec.loads(path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"工具描述缓存读取失败，将重新生成: {e}")
+            return {}
+        if data.get("version") != self.MANIFEST_VERSION:
+            return {}
+        return data.get("providers", {})
+
+    def _save_tool_manifest(self, providers: Dict[str, Any]):
+        """
+        写入工具描述缓存.
+        """
+        path = self._tool_manifest_path()
+        try:
+            path.write_bytes(
+                json_codec.dumps_bytes(
+                    {"version": self.MANIFEST_VERSION, "providers": providers}
+                )
+            )
+        except Exception as e:
+            logger.warning(f"工具描述缓存写入失败: {e}")
+
+    def get_provider_stats(self) -> Dict[str, Any]:
+        """
+        各工具模块的加载状态与加载耗时.
+        """
+        return {
+            name: {"loaded": provider.loaded, "load_ms": provider.load_ms}
+            for name, provider in self._providers.items()
+        }
 
     async def parse_message(self, message: Union[str, Dict[str, Any]]):
         """
@@ -331,13 +569,11 @@ class McpServer:
         """
         try:
             if isinstance(message, str):
-                data = json.loads(message)
+                data = json_codec.loads(message)
             else:
                 data = message
 
-            logger.info(
-                f"[MCP] 解析消息: {json.dumps(data, ensure_ascii=False, indent=2)}"
-            )
+            logger.info(f"[MCP] 解析消息: {json_codec.dumps(data, pretty=True)}")
 
             # 检查JSONRPC版本
             if data.get("jsonrpc") != "2.0":
@@ -404,37 +640,62 @@ class McpServer:
         处理工具列表请求.
         """
         cursor = params.get("cursor", "")
-        max_payload_size = 8000
+        # 分页应答已序列化并缓存，原样嵌入
+        await self._reply_raw_result(id, self._tools_list_page(cursor))
 
-        tools_json = []
-        total_size = 0
-        found_cursor = not cursor
-        next_cursor = ""
+    def _tools_list_page(self, cursor: str) -> str:
+        """tools/list 的一页（JSON文本）
 
-        for tool in self.tools:
-            # 如果还没找到起始位置，继续搜索
-            if not found_cursor:
-                if tool.name == cursor:
-                    found_cursor = True
-                else:
-                    continue
-
-            # 检查大小
-            tool_json = tool.to_json()
-            tool_size = len(json.dumps(tool_json))
-
-            if total_size + tool_size + 100 > max_payload_size:
-                next_cursor = tool.name
-                break
+        游标为该页第一个工具的名称，工具列表变化后仍然有效；未知游标返回空列表。
+        """
+        page = self._tools_list_pages.get(cursor)
+        if page is not None:
+            return page
 
-            tools_json.append(tool_json)
-            total_size += tool_size
+        if self._tool_entries is None:
+            self._tool_entries = []
+            for index, tool in enumerate(self.tools):
+                text = json_codec.dumps(self._tool_descriptor(tool))
+                self._tool_entries.append((text, len(text.encode("utf-8"))))
+                self._tool_index.setdefault(tool.name, index)
 
-        result = {"tools": tools_json}
+        start = self._tool_index.get(cursor) if cursor else 0
+        items: List[str] = []
+        next_cursor = ""
+        if start is not None:
+            total_size = 0
+            for index in range(start, len(self._tool_entries)):
+                text, size = self._tool_entries[index]
+                # 每页至少一个工具，单个工具超限时不会反复返回同一游标
+                if items and total_size + size + 100 > self.TOOLS_LIST_PAGE_BYTES:
+                    next_cursor = self.tools[index].name
+                    break
+                items.append(text)
+                total_size += size
+
+        page = '{"tools":[' + ",".join(items) + "]"
         if next_cursor:
-            result["nextCursor"] = next_cursor
+            page += f',"nextCursor":{json_codec.dumps(next_cursor)}'
+        page += "}"
+        self._tools_list_pages[cursor] = page
+        return page
 
-        await self._reply_result(id, result)
+    def _tool_descriptor(self, tool: McpTool) -> Dict[str, Any]:
+        """
+        tools/list 中的工具描述（紧凑模式下只保留描述首行并省略空的 required）
+        """
+        descriptor = tool.to_json()
+        if not self.compact_tool_schema:
+            return descriptor
+
+        description = descriptor.get("description", "").strip().split("\n", 1)[0]
+        limit = self.COMPACT_DESCRIPTION_CHARS
+        if len(description) > limit:
+            description = description[: limit - 1].rstrip() + "…"
+        schema = dict(descriptor.get("inputSchema", {}))
+        if not schema.get("required"):
+            schema.pop("required", None)
+        return {**descriptor, "description": description, "inputSchema": schema}
 
     async def _handle_tool_call(self, id: int, params: Dict[str, Any]):
         """
@@ -449,13 +710,7 @@ class McpServer:
 
         logger.info(f"[MCP] 尝试调用工具: {tool_name}")
 
-        # 查找工具
-        tool = None
-        for t in self.tools:
-            if t.name == tool_name:
-                tool = t
-                break
-
+        tool = self.get_tool(tool_name)
         if not tool:
             await self._reply_error(id, f"Unknown tool: {tool_name}")
             return
@@ -466,13 +721,26 @@ class McpServer:
         logger.info(f"[MCP] 开始执行工具 {tool_name}, 参数: {arguments}")
 
         # 异步调用工具
+        metrics = get_metrics()
+        start = time.perf_counter()
+        status = "cancelled"
         try:
             result = await tool.call(arguments)
+            status = "ok"
             logger.info(f"[MCP] 工具 {tool_name} 执行成功，结果: {result}")
-            await self._reply_result(id, json.loads(result))
+            # 工具返回的已是JSON文本，原样嵌入应答
+            await self._reply_raw_result(id, result)
         except Exception as e:
+            status = "error"
             logger.error(f"[MCP] 工具 {tool_name} 执行失败: {e}", exc_info=True)
             await self._reply_error(id, str(e))
+        finally:
+            metrics.inc("xiaozhi_mcp_tool_calls_total", tool=tool_name, status=status)
+            metrics.observe(
+                "xiaozhi_mcp_tool_duration_ms",
+                (time.perf_counter() - start) * 1000,
+                tool=tool_name,
+            )
 
     async def _parse_capabilities(self, capabilities):
         """
@@ -483,26 +751,46 @@ class McpServer:
             url = vision.get("url")
             token = vision.get("token")
             if url:
-                from src.mcp.tools.camera import get_camera_instance
+                self._vision_config = (url, token)
+                provider = self._providers.get("camera")
+                # 摄像头模块尚未加载时，首次调用拍照工具再应用
+                if provider is None or provider.loaded:
+                    self._apply_vision_config(url, token)
+                else:
+                    logger.info(f"Vision service URL saved, applied on first use: {url}")
 
-                camera = get_camera_instance()
-                if hasattr(camera, "set_explain_url"):
-                    camera.set_explain_url(url)
-                if token and hasattr(camera, "set_explain_token"):
-                    camera.set_explain_token(token)
-                logger.info(f"Vision service configured with URL: {url}")
+    def _apply_vision_config(self, url: str, token: Optional[str]):
+        """
+        把视觉服务配置应用到摄像头实例.
+        """
+        from src.mcp.tools.camera import get_camera_instance
+
+        camera = get_camera_instance()
+        if hasattr(camera, "set_explain_url"):
+            camera.set_explain_url(url)
+        if token and hasattr(camera, "set_explain_token"):
+            camera.set_explain_token(token)
+        logger.info(f"Vision service configured with URL: {url}")
 
     async def _reply_result(self, id: int, result: Any):
         """
         发送成功响应.
         """
         payload = {"jsonrpc": "2.0", "id": id, "result": result}
+        await self._send_reply(id, json_codec.dumps(payload))
+
+    async def _reply_raw_result(self, id: int, result_json: str):
+        """
+        发送成功响应（result 为已序列化的JSON文本）.
+        """
+        payload = {"jsonrpc": "2.0", "id": id}
+        await self._send_reply(id, json_codec.dumps_with_raw(payload, result=result_json))
 
-        result_len = len(json.dumps(result))
-        logger.info(f"[MCP] 发送成功响应: ID={id}, 结果长度={result_len}")
+    async def _send_reply(self, id: int, message: str):
+        logger.info(f"[MCP] 发送成功响应: ID={id}, 响应长度={len(message)}")
 
         if self._send_callback:
-            await self._send_callback(json.dumps(payload))
+            await self._send_callback(message)
         else:
             logger.error("[MCP] 发送回调未设置!")
 
@@ -515,4 +803,4 @@ class McpServer:
         logger.error(f"[MCP] 发送错误响应: ID={id}, 错误={message}")
 
         if self._send_callback:
-            await self._send_callback(json.dumps(payload))
+            await self._send_callback(json_codec.dumps(payload))
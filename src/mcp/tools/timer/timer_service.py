@@ -261,13 +261,7 @@ class TimerTask:
 
             mcp_server = McpServer.get_instance()
 
-            # 查找工具
-            tool = None
-            for t in mcp_server.tools:
-                if t.name == tool_name:
-                    tool = t
-                    break
-
+            tool = mcp_server.get_tool(tool_name)
             if not tool:
                 raise ValueError(f"MCP工具不存在: {tool_name}")
 
@@ -0,0 +1,239 @@
+"""
+WebSocket 二进制音频帧协议.
+
+v1: 二进制帧即原始 Opus 数据
+v2: 16 字节网络字节序头 + 负载（需在 hello 的 features.binary_protocol 中协商）
+
+    version(uint16) | type(uint16) | sequence(uint32) | timestamp(uint32) | payload_size(uint32)
+
+布局与官方 BinaryProtocol2 一致，只是将 reserved 字段用作序号；timestamp 为毫秒，
+上行为采集时间，下行为服务端媒体时间。
+"""
+
+import asyncio
+import struct
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+BINARY_PROTOCOL_V1 = 1
+BINARY_PROTOCOL_V2 = 2
+
+PAYLOAD_TYPE_OPUS = 0
+PAYLOAD_TYPE_JSON = 1
+
+_HEADER_V2 = struct.Struct("!HHIII")
+HEADER_V2_SIZE = _HEADER_V2.size
+
+
+def timestamp_ms(monotonic_time: Optional[float] = None) -> int:
+    """
+    将单调时钟时间转换为32位毫秒时间戳（回绕）
+    """
+    if monotonic_time is None:
+        monotonic_time = time.monotonic()
+    return int(monotonic_time * 1000) & 0xFFFFFFFF
+
+
+def pack_v2(
+    payload: bytes, sequence: int, timestamp: int, payload_type: int = PAYLOAD_TYPE_OPUS
+) -> bytes:
+    """
+    打包 v2 二进制帧.
+    """
+    header = _HEADER_V2.pack(
+        BINARY_PROTOCOL_V2,
+        payload_type,
+        sequence & 0xFFFFFFFF,
+        timestamp & 0xFFFFFFFF,
+        len(payload),
+    )
+    return header + payload
+
+
+def unpack_v2(frame: bytes) -> Tuple[int, int, int, bytes]:
+    """解包 v2 二进制帧.
+
+    Returns:
+        (payload_type, sequence, timestamp, payload)
+
+    Raises:
+        ValueError: 帧格式不正确
+    """
+    if len(frame) < HEADER_V2_SIZE:
+        raise ValueError(f"二进制帧过短: {len(frame)}")
+    version, payload_type, sequence, timestamp, size = _HEADER_V2.unpack_from(frame)
+    if version != BINARY_PROTOCOL_V2:
+        raise ValueError(f"不支持的二进制协议版本: {version}")
+    payload = frame[HEADER_V2_SIZE : HEADER_V2_SIZE + size]
+    if len(payload) != size:
+        raise ValueError(f"负载长度不符: 声明 {size}, 实际 {len(payload)}")
+    return payload_type, sequence, timestamp, payload
+
+
+class JitterBuffer:
+    """下行音频抖动缓冲.
+
+    - 按序号重排，乱序帧在等待窗口内到达仍可按序交付
+    - 缺失帧超过等待窗口仍未到达时交付空负载，由解码器做丢包补偿（PLC）
+    - 等待窗口随到达抖动自适应：clamp(2 * jitter, 一帧, 上限)
+    - 统计 RFC 3550 到达抖动、丢包、乱序、过期帧
+    """
+
+    # 连续丢失超过该帧数时不再逐帧补偿，直接跳到新位置
+    MAX_CONCEALED_RUN = 3
+    # 空闲超过该时间后新到达的帧视为新的一段音频，重新同步序号
+    RESYNC_IDLE_SEC = 1.0
+
+    def __init__(
+        self,
+        deliver: Callable[[bytes], None],
+        frame_duration_ms: int,
+        max_delay_ms: int = 200,
+    ):
+        self._deliver = deliver
+        self._frame_ms = frame_duration_ms
+        self._max_delay = max_delay_ms / 1000
+        self._pending: Dict[int, bytes] = {}
+        self._next_seq: Optional[int] = None
+        self._gap_timer: Optional[asyncio.TimerHandle] = None
+        self._last_arrival: Optional[float] = None
+        self._last_timestamp: Optional[int] = None
+
+        # 统计
+        self.jitter_ms = 0.0
+        self.received = 0
+        self.lost = 0
+        self.concealed = 0
+        self.reordered = 0
+        self.late = 0
+        self.duplicates = 0
+
+    @property
+    def wait_window(self) -> float:
+        """
+        缺帧等待窗口（秒）
+        """
+        adaptive = max(self._frame_ms / 1000, 2 * self.jitter_ms / 1000)
+        return min(self._max_delay, adaptive)
+
+    def push(self, sequence: int, timestamp: int, payload: bytes):
+        """
+        接收一个下行帧（在事件循环线程中调用）
+        """
+        now = time.monotonic()
+        self.received += 1
+
+        idle = (
+            self._last_arrival is not None
+            and now - self._last_arrival > self.RESYNC_IDLE_SEC
+        )
+        if idle:
+            # 空闲间隔不计入抖动
+            self._last_timestamp = None
+        self._update_jitter(now, timestamp)
+        self._last_arrival = now
+        if self._next_seq is None or idle:
+            self._flush_pending()
+            self._next_seq = sequence
+
+        offset = (sequence - self._next_seq) & 0xFFFFFFFF
+        if offset >= 0x80000000:
+            # 早于当前交付位置：已经补偿过或重复
+            if sequence in self._pending:
+                self.duplicates += 1
+            else:
+                self.late += 1
+            return
+        if sequence in self._pending:
+            self.duplicates += 1
+            return
+        # 比已缓存的后续帧更晚到达，说明发生了乱序
+        if self._pending and any(
+            ((seq - self._next_seq) & 0xFFFFFFFF) > offset for seq in self._pending
+        ):
+            self.reordered += 1
+
+        self._pending[sequence] = payload
+        self._release()
+
+    def _update_jitter(self, now: float, timestamp: int):
+        # RFC 3550: D = (到达间隔) - (时间戳间隔)，J += (|D| - J) / 16
+        if self._last_timestamp is not None and self._last_arrival is not None:
+            transit_delta = (timestamp - self._last_timestamp) & 0xFFFFFFFF
+            if transit_delta >= 0x80000000:
+                transit_delta -= 0x100000000
+            d = (now - self._last_arrival) * 1000 - transit_delta
+            self.jitter_ms += (abs(d) - self.jitter_ms) / 16
+        self._last_timestamp = timestamp
+
+    def _release(self):
+        # 按序交付所有连续帧
+        while self._next_seq in self._pending:
+            self._deliver(self._pending.pop(self._next_seq))
+            self._next_seq = (self._next_seq + 1) & 0xFFFFFFFF
+
+        self._cancel_timer()
+        if self._pending:
+            loop = asyncio.get_running_loop()
+            self._gap_timer = loop.call_later(self.wait_window, self._on_gap_timeout)
+
+    def _on_gap_timeout(self):
+        """
+        等待窗口到期，缺失帧视为丢失.
+        """
+        self._gap_timer = None
+        if not self._pending or self._next_seq is None:
+            return
+
+        earliest = min(
+            self._pending, key=lambda seq: (seq - self._next_seq) & 0xFFFFFFFF
+        )
+        missing = (earliest - self._next_seq) & 0xFFFFFFFF
+        self.lost += missing
+
+        # 少量丢失逐帧补偿，大段丢失直接跳过
+        for _ in range(min(missing, self.MAX_CONCEALED_RUN)):
+            self._deliver(b"")
+            self.concealed += 1
+        self._next_seq = earliest
+        self._release()
+
+    def _flush_pending(self):
+        """
+        按序交付残留帧（重新同步前）
+        """
+        self._cancel_timer()
+        if self._pending and self._next_seq is not None:
+            base = self._next_seq
+            for seq in sorted(self._pending, key=lambda s: (s - base) & 0xFFFFFFFF):
+                self._deliver(self._pending[seq])
+        self._pending.clear()
+
+    def _cancel_timer(self):
+        if self._gap_timer is not None:
+            self._gap_timer.cancel()
+            self._gap_timer = None
+
+    def reset(self):
+        """
+        清空缓冲（会话结束或打断时）
+        """
+        self._cancel_timer()
+        self._pending.clear()
+        self._next_seq = None
+        self._last_arrival = None
+        self._last_timestamp = None
+
+    def get_stats(self) -> dict:
+        expected = self.received + self.lost
+        return {
+            "received": self.received,
+            "lost": self.lost,
+            "loss_rate": round(self.lost / expected, 4) if expected else 0.0,
+            "concealed": self.concealed,
+            "reordered": self.reordered,
+            "late": self.late,
+            "duplicates": self.duplicates,
+            "jitter_ms": round(self.jitter_ms, 2),
+            "wait_window_ms": round(self.wait_window * 1000, 1),
+        }
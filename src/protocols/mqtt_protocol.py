@@ -1,5 +1,4 @@
 import asyncio
-import json
 import socket
 import threading
 import time
@@ -10,18 +9,23 @@ from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
 from src.constants.constants import AudioConfig
 from src.protocols.protocol import Protocol
+from src.utils import json_codec
 from src.utils.config_manager import ConfigManager
-from src.utils.logging_config import get_logger
+from src.utils.logging_config import get_logger, get_rate_limited_logger
 
 # 配置日志
 logger = get_logger(__name__)
+# UDP 收发线程上的日志：延迟格式化并限频
+throttled_logger = get_rate_limited_logger(__name__)
 
 
 class MqttProtocol(Protocol):
-    def __init__(self, loop):
+    def __init__(self, loop, mqtt_info: dict = None):
         super().__init__()
         self.loop = loop
         self.config = ConfigManager.get_instance()
+        # 可选的MQTT配置覆盖（压测时每个模拟设备使用独立的client_id）
+        self._mqtt_info_override = mqtt_info
         self.mqtt_client = None
         self.udp_socket = None
         self.udp_thread = None
@@ -57,6 +61,8 @@ class MqttProtocol(Protocol):
         # 事件
         self.server_hello_event = asyncio.Event()
 
+        self._init_session_resume(self.config)
+
     def _parse_endpoint(self, endpoint: str) -> tuple[str, int]:
         """解析endpoint字符串，提取主机和端口.
 
@@ -101,7 +107,9 @@ class MqttProtocol(Protocol):
         # 首先尝试获取MQTT配置
         try:
             # 尝试从OTA服务器获取MQTT配置
-            mqtt_config = self.config.get_config("SYSTEM_OPTIONS.NETWORK.MQTT_INFO")
+            mqtt_config = self._mqtt_info_override or self.config.get_config(
+                "SYSTEM_OPTIONS.NETWORK.MQTT_INFO"
+            )
 
             print(mqtt_config)
 
@@ -125,7 +133,7 @@ class MqttProtocol(Protocol):
             or not self.publish_topic
         ):
             logger.error("MQTT配置不完整")
-            if self._on_network_error:
+            if self._on_network_error and not self._resuming:
                 await self._on_network_error("MQTT配置不完整")
             return False
 
@@ -152,7 +160,7 @@ class MqttProtocol(Protocol):
             )
         except ValueError as e:
             logger.error(f"解析endpoint失败: {e}")
-            if self._on_network_error:
+            if self._on_network_error and not self._resuming:
                 await self._on_network_error(f"解析endpoint失败: {e}")
             return False
 
@@ -173,7 +181,7 @@ class MqttProtocol(Protocol):
                 logger.info("已配置TLS加密连接")
             except Exception as e:
                 logger.error(f"TLS配置失败，无法安全连接到MQTT服务器: {e}")
-                if self._on_network_error:
+                if self._on_network_error and not self._resuming:
                     await self._on_network_error(f"TLS配置失败: {str(e)}")
                 return False
         else:
@@ -230,8 +238,18 @@ class MqttProtocol(Protocol):
                 # 停止UDP接收线程
                 self._stop_udp_receiver()
 
-                # 只有在异常断开且启用自动重连时才尝试重连
+                # 会话进行中异常断开：在事件循环中后台恢复会话
                 if (
+                    rc != 0
+                    and was_connected
+                    and self._resume_enabled
+                    and not self._is_closing
+                ):
+                    self.loop.call_soon_threadsafe(
+                        self._begin_session_resume, f"MQTT断开(rc={rc})"
+                    )
+                # 只有在异常断开且启用自动重连时才尝试重连
+                elif (
                     rc != 0
                     and not self._is_closing
                     and self._auto_reconnect_enabled
@@ -243,8 +261,8 @@ class MqttProtocol(Protocol):
                             self._attempt_reconnect(f"MQTT断开(rc={rc})")
                         )
                     )
-                else:
-                    # 通知音频通道关闭
+                elif not self._resuming:
+                    # 通知音频通道关闭（恢复期间的重连失败由恢复流程统一处理）
                     if self._on_audio_channel_closed:
                         asyncio.run_coroutine_threadsafe(
                             self._on_audio_channel_closed(), self.loop
@@ -318,17 +336,25 @@ class MqttProtocol(Protocol):
                     "frame_duration": AudioConfig.FRAME_DURATION,
                 },
             }
+            if self._resuming and self._resume_session_id:
+                # 请求服务端沿用断线前的会话
+                hello_message["session_id"] = self._resume_session_id
 
             # 发送消息并等待响应
-            if not await self.send_text(json.dumps(hello_message)):
+            hello_sent_at = time.monotonic()
+            if not await self.send_text(json_codec.dumps(hello_message)):
                 logger.error("发送hello消息失败")
                 return False
 
             try:
                 await asyncio.wait_for(self.server_hello_event.wait(), timeout=10.0)
+                # MQTT 没有应用层 ping，以 hello 握手往返作为 RTT 样本
+                self.network_monitor.record_rtt(
+                    (time.monotonic() - hello_sent_at) * 1000
+                )
             except asyncio.TimeoutError:
                 logger.error("等待服务器hello消息超时")
-                if self._on_network_error:
+                if self._on_network_error and not self._resuming:
                     await self._on_network_error("等待响应超时")
                 return False
 
@@ -360,13 +386,13 @@ class MqttProtocol(Protocol):
                 return True
             except Exception as e:
                 logger.error(f"创建UDP套接字失败: {e}")
-                if self._on_network_error:
+                if self._on_network_error and not self._resuming:
                     await self._on_network_error(f"创建UDP连接失败: {e}")
                 return False
 
         except Exception as e:
             logger.error(f"连接MQTT服务器失败: {e}")
-            if self._on_network_error:
+            if self._on_network_error and not self._resuming:
                 await self._on_network_error(f"连接MQTT服务器失败: {e}")
             return False
 
@@ -375,7 +401,7 @@ class MqttProtocol(Protocol):
         处理MQTT消息.
         """
         try:
-            data = json.loads(payload)
+            data = json_codec.loads(payload)
             msg_type = data.get("type")
 
             if msg_type == "goodbye":
@@ -411,6 +437,7 @@ class MqttProtocol(Protocol):
                 # 重置序列号
                 self.local_sequence = 0
                 self.remote_sequence = 0
+                self.network_monitor.reset_sequence()
 
                 logger.info(
                     f"收到服务器hello响应，UDP服务器: {self.udp_server}:{self.udp_port}"
@@ -438,7 +465,7 @@ class MqttProtocol(Protocol):
                             self._on_incoming_json(json_data)
 
                     self.loop.call_soon_threadsafe(process_json)
-        except json.JSONDecodeError:
+        except json_codec.JSONDecodeError:
             logger.error(f"无效的JSON数据: {payload}")
         except Exception as e:
             logger.error(f"处理MQTT消息时出错: {e}")
@@ -463,12 +490,14 @@ class MqttProtocol(Protocol):
                 try:
                     # 验证数据包
                     if len(data) < 16:  # 至少需要16字节的nonce
-                        logger.error(f"无效的音频数据包大小: {len(data)}")
+                        throttled_logger.error("无效的音频数据包大小: %d", len(data))
                         continue
 
-                    # 分离nonce和加密数据
+                    # 分离nonce和加密数据，nonce 末4字节为服务端序号
                     received_nonce = data[:16]
                     encrypted_audio = data[16:]
+                    self.remote_sequence = int.from_bytes(received_nonce[12:16], "big")
+                    self.network_monitor.record_arrival(self.remote_sequence)
 
                     # 使用AES-CTR解密
                     decrypted = self.aes_ctr_decrypt(
@@ -478,7 +507,9 @@ class MqttProtocol(Protocol):
                     # 调试信息
                     if debug_counter % 100 == 0:
                         logger.debug(
-                            f"已解密音频数据包 #{debug_counter}, 大小: {len(decrypted)} 字节"
+                            "已解密音频数据包 #%d, 大小: %d 字节",
+                            debug_counter,
+                            len(decrypted),
                         )
 
                     # 处理解密后的音频数据
@@ -495,16 +526,17 @@ class MqttProtocol(Protocol):
                         self.loop.call_soon_threadsafe(process_audio)
 
                 except Exception as e:
-                    logger.error(f"处理音频数据包错误: {e}")
+                    throttled_logger.error("处理音频数据包错误: %s", e)
                     continue
 
             except socket.timeout:
                 # 超时是正常的，继续循环
                 pass
             except Exception as e:
-                logger.error(f"UDP接收线程错误: {e}")
+                # 停止时套接字被关闭，recvfrom 随即报错，属于正常退出
                 if not self.udp_running:
                     break
+                throttled_logger.error("UDP接收线程错误: %s", e)
                 time.sleep(0.1)  # 避免在错误情况下过度消耗CPU
 
         logger.info("UDP接收线程已停止")
@@ -527,11 +559,16 @@ class MqttProtocol(Protocol):
                 await self._on_network_error(f"发送MQTT消息失败: {e}")
             return False
 
-    async def send_audio(self, audio_data):
-        """发送音频数据.
+    async def send_audio(self, audio_data, capture_time=None):
+        """发送音频数据（断线恢复期间先缓存）
 
         参考 audio_sender.py 的实现方式
         """
+        if self._buffer_resume_audio(audio_data, capture_time):
+            return True
+        return await self._send_audio_frame(audio_data, capture_time)
+
+    async def _send_audio_frame(self, audio_data, capture_time=None):
         if not self.udp_socket or not self.udp_server or not self.udp_port:
             logger.error("UDP通道未初始化")
             return False
@@ -557,17 +594,18 @@ class MqttProtocol(Protocol):
             # 发送数据包
             self.udp_socket.sendto(packet, (self.udp_server, self.udp_port))
 
-            # 每发送10个包打印一次日志
+            # 每发送10个包打印一次日志（调试级别，默认不格式化）
             if self.local_sequence % 10 == 0:
-                logger.info(
-                    f"已发送音频数据包，序列号: {self.local_sequence}，目标: "
-                    f"{self.udp_server}:{self.udp_port}"
+                logger.debug(
+                    "已发送音频数据包，序列号: %d，目标: %s:%s",
+                    self.local_sequence,
+                    self.udp_server,
+                    self.udp_port,
                 )
 
-            self.local_sequence += 1
             return True
         except Exception as e:
-            logger.error(f"发送音频数据失败: {e}")
+            throttled_logger.error("发送音频数据失败: %s", e)
             if self._on_network_error:
                 asyncio.create_task(self._on_network_error(f"发送音频数据失败: {e}"))
             return False
@@ -585,12 +623,13 @@ class MqttProtocol(Protocol):
         关闭音频通道.
         """
         self._is_closing = True
+        self._cancel_session_resume()
 
         try:
             # 如果有会话ID，发送goodbye消息
             if self.session_id:
                 goodbye_msg = {"type": "goodbye", "session_id": self.session_id}
-                await self.send_text(json.dumps(goodbye_msg))
+                await self.send_text(json_codec.dumps(goodbye_msg))
 
             # 处理goodbye
             await self._handle_goodbye()
@@ -654,14 +693,8 @@ class MqttProtocol(Protocol):
         处理goodbye消息.
         """
         try:
-            # 停止UDP接收线程
-            if self.udp_thread and self.udp_thread.is_alive():
-                self.udp_running = False
-                self.udp_thread.join(1.0)
-                self.udp_thread = None
-            logger.info("UDP接收线程已停止")
-
-            # 关闭UDP套接字
+            # 停止UDP接收线程：先关闭套接字让 recvfrom 立即返回，线程随即退出
+            self.udp_running = False
             if self.udp_socket:
                 try:
                     self.udp_socket.close()
@@ -669,15 +702,19 @@ class MqttProtocol(Protocol):
                     logger.error(f"关闭UDP套接字失败: {e}")
                 self.udp_socket = None
 
-            # 停止MQTT客户端
-            if self.mqtt_client:
+            udp_thread, self.udp_thread = self.udp_thread, None
+            if udp_thread and udp_thread.is_alive():
+                # 守护线程，不阻塞事件循环等待
+                await asyncio.to_thread(udp_thread.join, 0.6)
+            logger.info("UDP接收线程已停止")
+
+            # 停止MQTT客户端：disconnect 后由网络线程发出 DISCONNECT，loop_stop 等待其退出
+            mqtt_client, self.mqtt_client = self.mqtt_client, None
+            if mqtt_client:
                 try:
-                    self.mqtt_client.loop_stop()
-                    self.mqtt_client.disconnect()
-                    self.mqtt_client.loop_forever()  # 确保断开连接完全完成
+                    await asyncio.to_thread(self._stop_mqtt_client, mqtt_client)
                 except Exception as e:
                     logger.error(f"断开MQTT连接失败: {e}")
-                self.mqtt_client = None
 
             # 重置所有状态
             self.connected = False
@@ -696,6 +733,14 @@ class MqttProtocol(Protocol):
         except Exception as e:
             logger.error(f"处理goodbye消息时出错: {e}")
 
+    @staticmethod
+    def _stop_mqtt_client(mqtt_client):
+        """
+        断开MQTT连接并停止网络线程（阻塞，在线程池中调用）
+        """
+        mqtt_client.disconnect()
+        mqtt_client.loop_stop()
+
     def _stop_udp_receiver(self):
         """
         停止UDP接收线程和关闭UDP套接字.
@@ -729,9 +774,7 @@ class MqttProtocol(Protocol):
         # 关闭MQTT客户端
         if hasattr(self, "mqtt_client") and self.mqtt_client:
             try:
-                self.mqtt_client.loop_stop()
-                self.mqtt_client.disconnect()
-                self.mqtt_client.loop_forever()  # 确保断开连接完全完成
+                self._stop_mqtt_client(self.mqtt_client)
             except Exception as e:
                 logger.error(f"断开MQTT连接失败: {e}")
 
@@ -796,6 +839,10 @@ class MqttProtocol(Protocol):
         # 清理连接
         await self._cleanup_connection()
 
+        # 会话进行中断线：后台恢复会话，音频管线与设备状态保持不变
+        if was_connected and self._begin_session_resume(reason):
+            return
+
         # 通知音频通道关闭
         if self._on_audio_channel_closed:
             try:
@@ -826,6 +873,7 @@ class MqttProtocol(Protocol):
         尝试自动重连.
         """
         self._reconnect_attempts += 1
+        self._record_reconnect()
 
         # 通知开始重连
         if self._on_reconnecting:
@@ -904,6 +952,8 @@ class MqttProtocol(Protocol):
                 f"{self.udp_server}:{self.udp_port}" if self.udp_server else None
             ),
             "session_id": self.session_id,
+            "session_resume": self.get_resume_info(),
+            "network_quality": self.get_network_quality(),
         }
 
     async def _cleanup_connection(self):
@@ -0,0 +1,210 @@
+"""
+网络质量监测.
+
+连接期间持续采集以下指标，按滚动时间窗口统计：
+- RTT：WebSocket ping/pong 往返时延（MQTT 无 ping，取 hello 握手往返）
+- 下行丢包/乱序/重复：按音频帧序号统计（WebSocket v2 帧头序号、MQTT UDP nonce 序号）
+- 到达抖动：TTS 帧到达间隔相对窗口内中位间隔的平均偏差
+
+记录可能来自接收线程（MQTT UDP），内部加锁保护。
+"""
+
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional, Set, Tuple
+
+_SEQ_MOD = 0x100000000
+_SEQ_HALF = 0x80000000
+
+
+class NetworkQualityMonitor:
+    # 到达间隔超过该值视为新一段音频（句间停顿），不计入抖动并重新同步序号
+    BURST_GAP_SEC = 1.0
+    # 序号跳跃超过该帧数视为服务端重置了序号，不计为丢包
+    MAX_SEQ_JUMP = 1000
+    # 已判定丢失、仍可能乱序到达的序号最多保留个数
+    MAX_MISSING_TRACKED = 256
+
+    def __init__(self, window_sec: float = 30.0):
+        self._window = window_sec
+        self._lock = threading.Lock()
+
+        # 滚动窗口：(时间, 值)
+        self._rtt: Deque[Tuple[float, float]] = deque()
+        self._intervals: Deque[Tuple[float, float]] = deque()
+        # 序号事件：(时间, 接收, 丢失, 乱序, 重复)，乱序到达的帧以丢失 -1 冲抵
+        self._seq_events: Deque[Tuple[float, int, int, int, int]] = deque()
+
+        self._last_arrival: Optional[float] = None
+        self._highest_seq: Optional[int] = None
+        self._missing: Set[int] = set()
+        self._probe_timeouts = 0
+
+    def record_rtt(self, rtt_ms: float):
+        """
+        记录一次往返时延.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._rtt.append((now, rtt_ms))
+            self._prune(now)
+
+    def record_probe_timeout(self):
+        """
+        记录一次探测超时（未收到 pong）
+        """
+        with self._lock:
+            self._probe_timeouts += 1
+
+    def record_arrival(self, sequence: Optional[int] = None):
+        """记录一个下行音频帧到达.
+
+        Args:
+            sequence: 帧序号（无序号的传输只统计到达抖动）
+        """
+        now = time.monotonic()
+        with self._lock:
+            burst_start = (
+                self._last_arrival is None
+                or now - self._last_arrival > self.BURST_GAP_SEC
+            )
+            if not burst_start:
+                self._intervals.append((now, (now - self._last_arrival) * 1000))
+            self._last_arrival = now
+
+            if sequence is not None:
+                self._track_sequence(now, sequence, burst_start)
+            self._prune(now)
+
+    def _track_sequence(self, now: float, sequence: int, resync: bool):
+        if self._highest_seq is None or resync:
+            self._highest_seq = sequence
+            self._missing.clear()
+            self._seq_events.append((now, 1, 0, 0, 0))
+            return
+
+        offset = (sequence - self._highest_seq) % _SEQ_MOD
+        if offset == 0:
+            self._seq_events.append((now, 0, 0, 0, 1))
+        elif offset < _SEQ_HALF:
+            missing = offset - 1
+            if missing > self.MAX_SEQ_JUMP:
+                # 序号被重置，重新同步
+                self._missing.clear()
+                missing = 0
+            else:
+                for step in range(1, missing + 1):
+                    self._missing.add((self._highest_seq + step) % _SEQ_MOD)
+                self._trim_missing(sequence)
+            self._highest_seq = sequence
+            self._seq_events.append((now, 1, missing, 0, 0))
+        elif sequence in self._missing:
+            # 先前判定丢失的帧乱序到达
+            self._missing.discard(sequence)
+            self._seq_events.append((now, 1, -1, 1, 0))
+        else:
+            self._seq_events.append((now, 0, 0, 0, 1))
+
+    def _trim_missing(self, highest: int):
+        if len(self._missing) <= self.MAX_MISSING_TRACKED:
+            return
+        # 只保留离当前位置最近的若干序号
+        recent = sorted(self._missing, key=lambda seq: (highest - seq) % _SEQ_MOD)
+        self._missing = set(recent[: self.MAX_MISSING_TRACKED])
+
+    def reset_sequence(self):
+        """
+        新会话开始时重置序号跟踪（服务端从头计数）
+        """
+        with self._lock:
+            self._highest_seq = None
+            self._missing.clear()
+            self._last_arrival = None
+
+    def _prune(self, now: float):
+        cutoff = now - self._window
+        for window in (self._rtt, self._intervals, self._seq_events):
+            while window and window[0][0] < cutoff:
+                window.popleft()
+
+    def snapshot(self) -> dict:
+        """
+        当前窗口内的统计结果.
+        """
+        with self._lock:
+            self._prune(time.monotonic())
+            rtts = [value for _, value in self._rtt]
+            intervals = [value for _, value in self._intervals]
+            received = sum(event[1] for event in self._seq_events)
+            lost = max(0, sum(event[2] for event in self._seq_events))
+            reordered = sum(event[3] for event in self._seq_events)
+            duplicates = sum(event[4] for event in self._seq_events)
+            probe_timeouts = self._probe_timeouts
+
+        result = {
+            "window_sec": self._window,
+            "rtt_ms": round(rtts[-1], 1) if rtts else None,
+            "rtt_avg_ms": round(statistics.fmean(rtts), 1) if rtts else None,
+            "rtt_max_ms": round(max(rtts), 1) if rtts else None,
+            "rtt_samples": len(rtts),
+            "probe_timeouts": probe_timeouts,
+            "jitter_ms": None,
+            "frames": len(intervals),
+            "received": received,
+            "lost": lost,
+            "loss_rate": None,
+            "reordered": reordered,
+            "duplicates": duplicates,
+        }
+        if len(intervals) >= 2:
+            median = statistics.median(intervals)
+            result["jitter_ms"] = round(
+                statistics.fmean(abs(value - median) for value in intervals), 1
+            )
+        if received + lost:
+            result["loss_rate"] = round(lost / (received + lost), 4)
+        result["quality"] = self._grade(result)
+        return result
+
+    @staticmethod
+    def _grade(stats: dict) -> str:
+        rtt = stats["rtt_avg_ms"]
+        jitter = stats["jitter_ms"]
+        loss = stats["loss_rate"]
+        if rtt is None and jitter is None and loss is None:
+            return "unknown"
+        if (
+            (loss or 0) >= 0.05
+            or (rtt or 0) >= 400
+            or (jitter or 0) >= 60
+        ):
+            return "poor"
+        if (
+            (loss or 0) >= 0.01
+            or (rtt or 0) >= 150
+            or (jitter or 0) >= 25
+        ):
+            return "fair"
+        return "good"
+
+    def summary(self, stats: Optional[dict] = None) -> str:
+        """一行文本摘要，供界面显示.
+
+        Args:
+            stats: 已取得的 snapshot() 结果，避免重复统计
+        """
+        stats = stats or self.snapshot()
+        parts = []
+        if stats["rtt_ms"] is not None:
+            parts.append(f"RTT {stats['rtt_avg_ms']:.0f}ms")
+        if stats["jitter_ms"] is not None:
+            parts.append(f"抖动 {stats['jitter_ms']:.0f}ms")
+        if stats["loss_rate"] is not None:
+            parts.append(f"丢包 {stats['loss_rate'] * 100:.1f}%")
+        if not parts:
+            return ""
+        labels = {"good": "良好", "fair": "一般", "poor": "较差"}
+        parts.append(labels.get(stats["quality"], ""))
+        return " · ".join(part for part in parts if part)
@@ -1,7 +1,14 @@
-import json
-
-from src.constants.constants import AbortReason, ListeningMode
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+from src.constants.constants import AbortReason, AudioConfig, ListeningMode
+from src.protocols.network_monitor import NetworkQualityMonitor
+from src.utils import json_codec
+from src.utils.latency_tracer import get_latency_tracer
 from src.utils.logging_config import get_logger
+from src.utils.metrics import get_metrics
 
 logger = get_logger(__name__)
 
@@ -18,6 +25,75 @@ class Protocol:
         # 新增连接状态变化回调
         self._on_connection_state_changed = None
         self._on_reconnecting = None
+        self._on_session_resuming = None
+        self._on_session_resumed = None
+        self._is_closing = False
+
+        # 网络质量监测（RTT、抖动、丢包），由子类在收发路径上采集
+        self.network_monitor = NetworkQualityMonitor()
+
+        # 会话恢复：默认关闭，由子类通过 _init_session_resume 读取配置
+        self._resume_enabled = False
+        self._resume_timeout = 10.0
+        self._resume_audio: deque = deque(maxlen=1)
+        self._resuming = False
+        self._resume_session_id = None
+        self._resume_started_at = 0.0
+        self._resume_task = None
+        self._resume_stats = {
+            "outages": 0,
+            "resumed": 0,
+            "same_session": 0,
+            "failed": 0,
+            "last_outage_ms": None,
+            "buffered_frames": 0,
+            "dropped_frames": 0,
+        }
+
+        # 性能指标：网络质量与会话恢复统计在抓取时读取
+        get_metrics().register_collector("protocol", self._collect_metrics)
+
+    @property
+    def metrics_label(self) -> str:
+        """
+        指标中的协议标签（websocket / mqtt）
+        """
+        return type(self).__name__.replace("Protocol", "").lower()
+
+    def _collect_metrics(self, registry):
+        """
+        指标采集：RTT、抖动、丢包与会话恢复计数.
+        """
+        stats = self.get_network_quality()
+        protocol = self.metrics_label
+        registry.describe("xiaozhi_protocol_rtt_ms", "gauge", "窗口内平均往返时延")
+        registry.set("xiaozhi_protocol_rtt_ms", stats["rtt_avg_ms"], protocol=protocol)
+        registry.set("xiaozhi_protocol_jitter_ms", stats["jitter_ms"], protocol=protocol)
+        registry.set("xiaozhi_protocol_loss_rate", stats["loss_rate"], protocol=protocol)
+        registry.set(
+            "xiaozhi_protocol_probe_timeouts_total",
+            stats["probe_timeouts"],
+            kind="counter",
+            protocol=protocol,
+        )
+        registry.set(
+            "xiaozhi_protocol_connected",
+            int(self.is_audio_channel_opened()),
+            protocol=protocol,
+        )
+        for key in ("outages", "resumed", "failed"):
+            registry.set(
+                f"xiaozhi_session_resume_{key}_total",
+                self._resume_stats[key],
+                kind="counter",
+                protocol=protocol,
+            )
+
+    def _record_reconnect(self):
+        """
+        重连计数（子类在每次重连尝试时调用）
+        """
+        get_metrics().inc("xiaozhi_protocol_reconnects_total", protocol=self.metrics_label)
 
     def on_incoming_json(self, callback):
         """
@@ -65,18 +141,43 @@ class Protocol:
         """
         self._on_reconnecting = callback
 
+    def on_session_resuming(self, callback):
+        """设置会话恢复开始回调函数.
+
+        Args:
+            callback: 回调函数，接收参数 (reason: str)
+        """
+        self._on_session_resuming = callback
+
+    def on_session_resumed(self, callback):
+        """设置会话恢复成功回调函数（异步，完成后才补发断线期间缓存的音频）
+
+        Args:
+            callback: 协程函数，接收参数 (same_session: bool, outage_ms: float)
+        """
+        self._on_session_resumed = callback
+
     async def send_text(self, message):
         """
         发送文本消息的抽象方法，需要在子类中实现.
         """
         raise NotImplementedError("send_text方法必须由子类实现")
 
-    async def send_audio(self, data: bytes):
-        """
-        发送音频数据的抽象方法，需要在子类中实现.
+    async def send_audio(self, data: bytes, capture_time: Optional[float] = None):
+        """发送音频数据的抽象方法，需要在子类中实现.
+
+        Args:
+            data: Opus编码数据
+            capture_time: 采集时刻（time.monotonic），支持时间戳的传输会携带
         """
         raise NotImplementedError("send_audio方法必须由子类实现")
 
+    async def _send_audio_frame(self, data: bytes, capture_time: Optional[float]):
+        """
+        实际发送一帧音频（不经过断线缓存），需要在子类中实现.
+        """
+        raise NotImplementedError("_send_audio_frame方法必须由子类实现")
+
     def is_audio_channel_opened(self) -> bool:
         """
         检查音频通道是否打开的抽象方法，需要在子类中实现.
@@ -102,7 +203,7 @@ class Protocol:
         message = {"session_id": self.session_id, "type": "abort"}
         if reason == AbortReason.WAKE_WORD_DETECTED:
             message["reason"] = "wake_word_detected"
-        await self.send_text(json.dumps(message))
+        await self.send_text(json_codec.dumps(message))
 
     async def send_wake_word_detected(self, wake_word):
         """
@@ -114,7 +215,7 @@ class Protocol:
             "state": "detect",
             "text": wake_word,
         }
-        await self.send_text(json.dumps(message))
+        await self.send_text(json_codec.dumps(message))
 
     async def send_start_listening(self, mode):
         """
@@ -131,14 +232,14 @@ class Protocol:
             "state": "start",
             "mode": mode_map[mode],
         }
-        await self.send_text(json.dumps(message))
+        await self.send_text(json_codec.dumps(message))
 
     async def send_stop_listening(self):
         """
         发送停止监听的消息.
         """
         message = {"session_id": self.session_id, "type": "listen", "state": "stop"}
-        await self.send_text(json.dumps(message))
+        await self.send_text(json_codec.dumps(message))
 
     async def send_iot_descriptors(self, descriptors):
         """
@@ -147,7 +248,7 @@ class Protocol:
         try:
             # 解析描述符数据
             if isinstance(descriptors, str):
-                descriptors_data = json.loads(descriptors)
+                descriptors_data = json_codec.loads(descriptors)
             else:
                 descriptors_data = descriptors
 
@@ -170,7 +271,7 @@ class Protocol:
                 }
 
                 try:
-                    await self.send_text(json.dumps(message))
+                    await self.send_text(json_codec.dumps(message))
                 except Exception as e:
                     logger.error(
                         f"Failed to send JSON message for IoT descriptor "
@@ -178,7 +279,7 @@ class Protocol:
                     )
                     continue
 
-        except json.JSONDecodeError as e:
+        except json_codec.JSONDecodeError as e:
             logger.error(f"Failed to parse IoT descriptors: {e}")
             return
 
@@ -186,32 +287,195 @@ class Protocol:
         """
         发送物联网设备状态信息.
         """
+        message = {"session_id": self.session_id, "type": "iot", "update": True}
         if isinstance(states, str):
-            states_data = json.loads(states)
+            # 已序列化的状态直接拼接，避免解析后再编码
+            await self.send_text(json_codec.dumps_with_raw(message, states=states))
         else:
-            states_data = states
-
-        message = {
-            "session_id": self.session_id,
-            "type": "iot",
-            "update": True,
-            "states": states_data,
-        }
-        await self.send_text(json.dumps(message))
+            message["states"] = states
+            await self.send_text(json_codec.dumps(message))
 
     async def send_mcp_message(self, payload):
         """
         发送MCP消息.
         """
+        message = {"session_id": self.session_id, "type": "mcp"}
         if isinstance(payload, str):
-            payload_data = json.loads(payload)
+            # McpServer 交来的已是序列化好的JSON-RPC应答，直接拼接
+            await self.send_text(json_codec.dumps_with_raw(message, payload=payload))
         else:
-            payload_data = payload
+            message["payload"] = payload
+            await self.send_text(json_codec.dumps(message))
 
-        message = {
-            "session_id": self.session_id,
-            "type": "mcp",
-            "payload": payload_data,
+    # ----- 会话恢复 -----
+
+    def _init_session_resume(self, config):
+        """
+        读取会话恢复配置（子类在初始化时调用）
+        """
+        options = config.get_config("SYSTEM_OPTIONS.NETWORK.SESSION_RESUME", {}) or {}
+        self._resume_enabled = bool(options.get("ENABLED", True))
+        self._resume_timeout = float(options.get("TIMEOUT_SEC", 10))
+        buffer_ms = int(options.get("AUDIO_BUFFER_MS", 2000))
+        self._resume_audio = deque(
+            maxlen=max(1, buffer_ms // AudioConfig.FRAME_DURATION)
+        )
+
+    def is_resuming(self) -> bool:
+        """
+        是否正在断线恢复中（此时音频帧会被缓存而不是丢弃）
+        """
+        return self._resuming
+
+    def _buffer_resume_audio(self, data: bytes, capture_time: Optional[float]) -> bool:
+        """
+        恢复期间缓存音频帧，缓存满时丢弃最旧的帧.
+
+        Returns:
+            bool: 已缓存（调用方不应再发送）
+        """
+        if not self._resuming:
+            return False
+        if len(self._resume_audio) == self._resume_audio.maxlen:
+            self._resume_stats["dropped_frames"] += 1
+        self._resume_audio.append((data, capture_time))
+        return True
+
+    def _begin_session_resume(self, reason: str) -> bool:
+        """开始在后台恢复会话（须在事件循环线程中调用）
+
+        Returns:
+            bool: 已进入恢复流程，调用方不应再通知通道关闭或网络错误
+        """
+        if self._resuming:
+            return True
+        if not self._resume_enabled or self._is_closing:
+            return False
+
+        self._resuming = True
+        self._resume_session_id = self.session_id
+        self._resume_started_at = time.monotonic()
+        self._resume_audio.clear()
+        self._resume_stats["outages"] += 1
+        get_latency_tracer().mark("connection_lost")
+        logger.warning(
+            f"连接中断（{reason}），{self._resume_timeout:.0f}秒内尝试恢复会话"
+        )
+
+        if self._on_session_resuming:
+            try:
+                self._on_session_resuming(reason)
+            except Exception as e:
+                logger.error(f"调用会话恢复回调失败: {e}")
+
+        self._resume_task = asyncio.create_task(
+            self._resume_loop(reason), name="会话恢复"
+        )
+        return True
+
+    async def _resume_loop(self, reason: str):
+        """
+        快速重连直到成功或超时；成功后恢复状态并补发缓存的音频.
+        """
+        deadline = self._resume_started_at + self._resume_timeout
+        # 首次立即重试，之后短间隔退避，尽量压缩恢复时间
+        delays = (0, 0.1, 0.25, 0.5)
+        attempt = 0
+        try:
+            while not self._is_closing and time.monotonic() < deadline:
+                delay = delays[min(attempt, len(delays) - 1)]
+                await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+                attempt += 1
+                try:
+                    success = await asyncio.wait_for(
+                        self.connect(), max(0.1, deadline - time.monotonic())
+                    )
+                except Exception as e:
+                    logger.debug(f"会话恢复第 {attempt} 次重连失败: {e}")
+                    success = False
+                if success:
+                    await self._complete_session_resume(attempt)
+                    return
+                await self._cleanup_connection()
+
+            await self._fail_session_resume(reason)
+        except asyncio.CancelledError:
+            self._resuming = False
+            self._resume_audio.clear()
+            raise
+
+    async def _complete_session_resume(self, attempts: int):
+        outage_ms = (time.monotonic() - self._resume_started_at) * 1000
+        same_session = bool(self._resume_session_id) and (
+            self.session_id == self._resume_session_id
+        )
+        self._resume_stats["resumed"] += 1
+        self._resume_stats["same_session"] += int(same_session)
+        self._resume_stats["last_outage_ms"] = round(outage_ms, 1)
+        get_latency_tracer().mark("session_resumed")
+        logger.info(
+            f"会话已恢复: 中断 {outage_ms:.0f}ms，重连 {attempts} 次，"
+            f"{'沿用原会话' if same_session else '服务端分配了新会话'}，"
+            f"缓存音频 {len(self._resume_audio)} 帧"
+        )
+
+        try:
+            if self._on_session_resumed:
+                await self._on_session_resumed(same_session, outage_ms)
+        except Exception as e:
+            logger.error(f"调用会话恢复完成回调失败: {e}", exc_info=True)
+
+        # 按顺序补发缓存帧；补发期间新产生的帧继续进入缓存，保证顺序
+        while self._resume_audio:
+            data, capture_time = self._resume_audio.popleft()
+            self._resume_stats["buffered_frames"] += 1
+            await self._send_audio_frame(data, capture_time)
+        self._resuming = False
+        self._resume_task = None
+
+        if not self.is_audio_channel_opened() and not self._is_closing:
+            # 恢复过程中连接再次中断
+            self._begin_session_resume("恢复后连接再次中断")
+
+    async def _fail_session_resume(self, reason: str):
+        self._resuming = False
+        self._resume_audio.clear()
+        self._resume_stats["failed"] += 1
+        get_latency_tracer().mark("session_resume_failed")
+        logger.error(f"会话恢复失败（{self._resume_timeout:.0f}秒内未能重连）: {reason}")
+
+        if self._on_audio_channel_closed:
+            await self._on_audio_channel_closed()
+        if self._on_network_error:
+            result = self._on_network_error(f"连接丢失且会话恢复失败: {reason}")
+            if asyncio.iscoroutine(result):
+                await result
+
+    def _cancel_session_resume(self):
+        """
+        主动关闭通道时停止正在进行的恢复.
+        """
+        task = self._resume_task
+        if task and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+        self._resume_task = None
+        self._resuming = False
+        self._resume_audio.clear()
+
+    def get_resume_info(self) -> dict:
+        """
+        会话恢复状态与统计.
+        """
+        return {
+            "enabled": self._resume_enabled,
+            "resuming": self._resuming,
+            "timeout_sec": self._resume_timeout,
+            "buffer_frames": self._resume_audio.maxlen,
+            **self._resume_stats,
         }
 
-        await self.send_text(json.dumps(message))
+    def get_network_quality(self) -> dict:
+        """
+        滚动窗口内的网络质量统计.
+        """
+        return self.network_monitor.snapshot()
@@ -1,12 +1,22 @@
 import asyncio
-import json
 import ssl
 import time
 
 import websockets
 
 from src.constants.constants import AudioConfig
+from src.protocols.binary_protocol import (
+    BINARY_PROTOCOL_V1,
+    BINARY_PROTOCOL_V2,
+    PAYLOAD_TYPE_JSON,
+    PAYLOAD_TYPE_OPUS,
+    JitterBuffer,
+    pack_v2,
+    timestamp_ms,
+    unpack_v2,
+)
 from src.protocols.protocol import Protocol
+from src.utils import json_codec
 from src.utils.config_manager import ConfigManager
 from src.utils.logging_config import get_logger
 
@@ -40,6 +50,28 @@ class WebsocketProtocol(Protocol):
         self._max_reconnect_attempts = 0  # 默认不重连
         self._auto_reconnect_enabled = False  # 默认关闭自动重连
 
+        # 二进制音频协议：请求的版本与服务端确认后实际使用的版本
+        self._binary_protocol_requested = int(
+            self.config.get_config(
+                "SYSTEM_OPTIONS.NETWORK.WEBSOCKET_BINARY_PROTOCOL", BINARY_PROTOCOL_V1
+            )
+        )
+        self._jitter_buffer_max_ms = int(
+            self.config.get_config(
+                "SYSTEM_OPTIONS.NETWORK.JITTER_BUFFER_MAX_MS", 200
+            )
+        )
+        self.binary_protocol = BINARY_PROTOCOL_V1
+        self._send_sequence = 0
+        self._jitter_buffer = None
+        self._invalid_binary_frames = 0
+        # 往返时延探测（基于WebSocket ping/pong，结果同时进入网络质量监测）
+        self._rtt_ms = None
+        self._rtt_interval = 5.0
+        self._rtt_task = None
+
+        self._init_session_resume(self.config)
+
         self.WEBSOCKET_URL = self.config.get_config(
             "SYSTEM_OPTIONS.NETWORK.WEBSOCKET_URL"
         )
@@ -67,6 +99,8 @@ class WebsocketProtocol(Protocol):
         try:
             # 在连接时创建 Event，确保在正确的事件循环中
             self.hello_received = asyncio.Event()
+            # 每次连接都从v1开始，由服务端hello确认是否升级
+            self.binary_protocol = BINARY_PROTOCOL_V1
 
             # 判断是否应该使用 SSL
             current_ssl_context = None
@@ -109,12 +143,13 @@ class WebsocketProtocol(Protocol):
             self._start_connection_monitor()
 
             # 发送客户端hello消息
+            features = {"mcp": True}
+            if self._binary_protocol_requested >= BINARY_PROTOCOL_V2:
+                features["binary_protocol"] = BINARY_PROTOCOL_V2
             hello_message = {
                 "type": "hello",
                 "version": 1,
-                "features": {
-                    "mcp": True,
-                },
+                "features": features,
                 "transport": "websocket",
                 "audio_params": {
                     "format": "opus",
@@ -123,13 +158,17 @@ class WebsocketProtocol(Protocol):
                     "frame_duration": AudioConfig.FRAME_DURATION,
                 },
             }
-            await self.send_text(json.dumps(hello_message))
+            if self._resuming and self._resume_session_id:
+                # 请求服务端沿用断线前的会话
+                hello_message["session_id"] = self._resume_session_id
+            await self.send_text(json_codec.dumps(hello_message))
 
             # 等待服务器hello响应
             try:
                 await asyncio.wait_for(self.hello_received.wait(), timeout=10.0)
                 self.connected = True
                 self._reconnect_attempts = 0  # 重置重连计数
+                self._start_rtt_probe()
                 logger.info("已连接到WebSocket服务器")
 
                 # 通知连接状态变化
@@ -140,14 +179,14 @@ class WebsocketProtocol(Protocol):
             except asyncio.TimeoutError:
                 logger.error("等待服务器hello响应超时")
                 await self._cleanup_connection()
-                if self._on_network_error:
+                if self._on_network_error and not self._resuming:
                     self._on_network_error("等待响应超时")
                 return False
 
         except Exception as e:
             logger.error(f"WebSocket连接失败: {e}")
             await self._cleanup_connection()
-            if self._on_network_error:
+            if self._on_network_error and not self._resuming:
                 self._on_network_error(f"无法连接服务: {str(e)}")
             return False
 
@@ -246,6 +285,10 @@ class WebsocketProtocol(Protocol):
         # 清理连接
         await self._cleanup_connection()
 
+        # 会话进行中断线：后台恢复会话，音频管线与设备状态保持不变
+        if was_connected and self._begin_session_resume(reason):
+            return
+
         # 通知音频通道关闭
         if self._on_audio_channel_closed:
             try:
@@ -276,6 +319,7 @@ class WebsocketProtocol(Protocol):
         尝试自动重连.
         """
         self._reconnect_attempts += 1
+        self._record_reconnect()
 
         # 通知开始重连
         if self._on_reconnecting:
@@ -344,9 +388,18 @@ class WebsocketProtocol(Protocol):
             "auto_reconnect_enabled": self._auto_reconnect_enabled,
             "reconnect_attempts": self._reconnect_attempts,
             "max_reconnect_attempts": self._max_reconnect_attempts,
+            "session_id": self.session_id,
+            "session_resume": self.get_resume_info(),
             "last_ping_time": self._last_ping_time,
             "last_pong_time": self._last_pong_time,
             "websocket_url": self.WEBSOCKET_URL,
+            "binary_protocol": self.binary_protocol,
+            "rtt_ms": round(self._rtt_ms, 1) if self._rtt_ms is not None else None,
+            "audio_stats": (
+                self._jitter_buffer.get_stats() if self._jitter_buffer else None
+            ),
+            "invalid_binary_frames": self._invalid_binary_frames,
+            "network_quality": self.get_network_quality(),
         }
 
     async def _message_handler(self):
@@ -361,7 +414,7 @@ class WebsocketProtocol(Protocol):
                 try:
                     if isinstance(message, str):
                         try:
-                            data = json.loads(message)
+                            data = json_codec.loads(message)
                             msg_type = data.get("type")
                             if msg_type == "hello":
                                 # 处理服务器 hello 消息
@@ -369,12 +422,16 @@ class WebsocketProtocol(Protocol):
                             else:
                                 if self._on_incoming_json:
                                     self._on_incoming_json(data)
-                        except json.JSONDecodeError as e:
+                        except json_codec.JSONDecodeError as e:
                             logger.error(f"无效的JSON消息: {message}, 错误: {e}")
                     elif isinstance(message, bytes):
                         # 二进制消息，可能是音频
-                        if self._on_incoming_audio:
-                            self._on_incoming_audio(message)
+                        if self.binary_protocol == BINARY_PROTOCOL_V2:
+                            await self._handle_binary_v2(message)
+                        else:
+                            self.network_monitor.record_arrival()
+                            if self._on_incoming_audio:
+                                self._on_incoming_audio(message)
                 except Exception as e:
                     # 处理单个消息的错误，但继续处理其他消息
                     logger.error(f"处理消息时出错: {e}", exc_info=True)
@@ -404,14 +461,102 @@ class WebsocketProtocol(Protocol):
             logger.error(f"消息处理循环异常: {e}", exc_info=True)
             await self._handle_connection_loss(f"消息处理异常: {str(e)}")
 
-    async def send_audio(self, data: bytes):
+    async def _handle_binary_v2(self, message: bytes):
+        """
+        处理 v2 二进制帧：音频进入抖动缓冲，JSON 负载按文本消息处理.
+        """
+        try:
+            payload_type, sequence, timestamp, payload = unpack_v2(message)
+        except ValueError as e:
+            self._invalid_binary_frames += 1
+            logger.debug(f"丢弃无效的v2二进制帧: {e}")
+            return
+
+        if payload_type == PAYLOAD_TYPE_OPUS:
+            self.network_monitor.record_arrival(sequence)
+            if self._jitter_buffer:
+                self._jitter_buffer.push(sequence, timestamp, payload)
+        elif payload_type == PAYLOAD_TYPE_JSON:
+            data = json_codec.loads(payload)
+            if self._on_incoming_json:
+                self._on_incoming_json(data)
+        else:
+            self._invalid_binary_frames += 1
+            logger.debug(f"未知的v2负载类型: {payload_type}")
+
+    def _deliver_audio(self, payload: bytes):
         """
-        发送音频数据.
+        抖动缓冲按序交付的音频（空负载表示丢帧，由解码器补偿）
         """
+        if self._on_incoming_audio:
+            self._on_incoming_audio(payload)
+
+    def _enable_binary_v2(self, server_audio_params: dict):
+        """
+        服务端确认 v2 后启用帧头和抖动缓冲.
+        """
+        frame_duration = int(
+            (server_audio_params or {}).get(
+                "frame_duration", AudioConfig.FRAME_DURATION
+            )
+        )
+        self.binary_protocol = BINARY_PROTOCOL_V2
+        self._send_sequence = 0
+        self._jitter_buffer = JitterBuffer(
+            self._deliver_audio, frame_duration, self._jitter_buffer_max_ms
+        )
+        logger.info(f"已启用二进制协议v2，下行帧时长: {frame_duration}ms")
+
+    def _start_rtt_probe(self):
+        """
+        启动往返时延探测任务.
+        """
+        if self._rtt_task is None or self._rtt_task.done():
+            self._rtt_task = asyncio.create_task(self._rtt_loop())
+
+    async def _rtt_loop(self):
+        """
+        周期性发送ping测量往返时延（指数平滑），超时只计数不断开（断线由内置心跳判定）
+        """
+        try:
+            while self.websocket and not self._is_closing:
+                started = time.monotonic()
+                self._last_ping_time = time.time()
+                pong_waiter = await self.websocket.ping()
+                try:
+                    await asyncio.wait_for(pong_waiter, timeout=self._ping_timeout)
+                except asyncio.TimeoutError:
+                    self.network_monitor.record_probe_timeout()
+                    logger.warning(f"RTT探测超时（{self._ping_timeout:.0f}秒）")
+                else:
+                    self._last_pong_time = time.time()
+                    rtt = (time.monotonic() - started) * 1000
+                    self._rtt_ms = (
+                        rtt if self._rtt_ms is None else self._rtt_ms * 0.8 + rtt * 0.2
+                    )
+                    self.network_monitor.record_rtt(rtt)
+                await asyncio.sleep(self._rtt_interval)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.debug(f"RTT测量结束: {e}")
+
+    async def send_audio(self, data: bytes, capture_time: float = None):
+        """
+        发送音频数据（断线恢复期间先缓存）
+        """
+        if self._buffer_resume_audio(data, capture_time):
+            return
+        await self._send_audio_frame(data, capture_time)
+
+    async def _send_audio_frame(self, data: bytes, capture_time: float = None):
         if not self.is_audio_channel_opened():
             return
 
         try:
+            if self.binary_protocol == BINARY_PROTOCOL_V2:
+                data = pack_v2(data, self._send_sequence, timestamp_ms(capture_time))
+                self._send_sequence = (self._send_sequence + 1) & 0xFFFFFFFF
             await self.websocket.send(data)
         except websockets.ConnectionClosed as e:
             logger.warning(f"发送音频时连接已关闭: {e}")
@@ -480,6 +625,19 @@ class WebsocketProtocol(Protocol):
                 logger.error(f"不支持的传输方式: {transport}")
                 return
 
+            self.session_id = data.get("session_id", "")
+            self.network_monitor.reset_sequence()
+
+            # 协商二进制协议版本：服务端未确认则保持v1
+            features = data.get("features") or {}
+            if (
+                self._binary_protocol_requested >= BINARY_PROTOCOL_V2
+                and features.get("binary_protocol") == BINARY_PROTOCOL_V2
+            ):
+                self._enable_binary_v2(data.get("audio_params"))
+            elif self._binary_protocol_requested >= BINARY_PROTOCOL_V2:
+                logger.info("服务端未确认二进制协议v2，使用v1")
+
             # 设置 hello 接收事件
             self.hello_received.set()
 
@@ -519,6 +677,18 @@ class WebsocketProtocol(Protocol):
             except asyncio.CancelledError:
                 pass
 
+        # 取消RTT测量任务并重置二进制协议状态
+        if self._rtt_task and not self._rtt_task.done():
+            self._rtt_task.cancel()
+            try:
+                await self._rtt_task
+            except asyncio.CancelledError:
+                pass
+        self._rtt_task = None
+        if self._jitter_buffer:
+            self._jitter_buffer.reset()
+        self.binary_protocol = BINARY_PROTOCOL_V1
+
         # 取消连接监控任务
         if self._connection_monitor_task and not self._connection_monitor_task.done():
             self._connection_monitor_task.cancel()
@@ -543,6 +713,7 @@ class WebsocketProtocol(Protocol):
         关闭音频通道.
         """
         self._is_closing = True
+        self._cancel_session_resume()
 
         try:
             await self._cleanup_connection()
@@ -24,6 +24,15 @@ class ConfigManager:
                 "WEBSOCKET_ACCESS_TOKEN": None,
                 "MQTT_INFO": None,
                 "ACTIVATION_VERSION": "v2",  # 可选值: v1, v2
+                # WebSocket二进制音频协议: 1 原始Opus; 2 带序号/时间戳头（服务端确认后生效）
+                "WEBSOCKET_BINARY_PROTOCOL": 1,
+                "JITTER_BUFFER_MAX_MS": 200,
+                # 会话中短暂断网时后台重连并恢复会话，期间缓存麦克风帧
+                "SESSION_RESUME": {
+                    "ENABLED": True,
+                    "TIMEOUT_SEC": 10,
+                    "AUDIO_BUFFER_MS": 2000,
+                },
                 "AUTHORIZATION_URL": "https://xiaozhi.me/",
             },
         },
@@ -64,6 +73,83 @@ class ConfigManager:
             "FRAME_DELAY": 3,
             "FILTER_LENGTH_RATIO": 0.4,
             "ENABLE_PREPROCESS": True,
+            # Linux：使用自身播放流作为WebRTC AEC参考信号（无需回环设备）
+            "PLAYOUT_REFERENCE": True,
+        },
+        "BARGE_IN_OPTIONS": {
+            "ENABLED": False,
+            "VAD_MODE": 3,
+            "SUB_FRAME_MS": 20,
+            "ENERGY_THRESHOLD": 300,
+            "ECHO_MARGIN": 2.0,
+            "MAX_ECHO_COUPLING": 0.5,
+            "MIN_SPEECH_MS": 200,
+            "MAX_GAP_MS": 60,
+        },
+        # 音频参数：默认按经验值选择，运行硬件校准（main.py --calibrate）后写入实测结果
+        "AUDIO_OPTIONS": {
+            "FRAME_DURATION": None,
+            "RESAMPLE_QUALITY": "QQ",
+            "STREAM_LATENCY": "low",
+            # 按输出设备保存的调优结果 {设备名: {"LATENCY": ..., "BLOCK_MS": ...}}
+            "OUTPUT_TUNING": {},
+        },
+        # 低功耗待机：空闲超时后停止播放流，采集只供唤醒词检测
+        "LOW_POWER_OPTIONS": {
+            "ENABLED": True,
+            "IDLE_TIMEOUT_SEC": 30,
+        },
+        # 输出流调优：按欠载频率调整延迟档位与回调块大小
+        "OUTPUT_TUNING_OPTIONS": {
+            "ENABLED": True,
+            "INTERVAL_SEC": 10.0,
+            "WINDOW_SEC": 60.0,
+            "MAX_UNDERRUNS_PER_MIN": 3,
+            "HOLD_SEC": 300.0,
+            "FAIL_BACKOFF_SEC": 3600.0,
+        },
+        # 上行Opus编码自适应：以协商的码率和帧长为起点，网络变差时降码率/开FEC，稳定后逐级恢复
+        "ADAPTIVE_OPUS_OPTIONS": {
+            "ENABLED": True,
+            "INTERVAL_SEC": 2.0,
+            "HOLD_SEC": 10.0,
+            "MAX_BACKLOG": 3,
+            "MAX_RTT_MS": 300,
+            "FEC_LOSS_RATE": 0.02,
+        },
+        # 启动预算（毫秒），main.py --profile-startup 时超出会记录警告
+        "STARTUP_BUDGET_MS": {
+            "TOTAL": 8000,
+            "IMPORTS": 3000,
+            "PHASE": 2000,
+            "PACKAGE": 800,
+        },
+        # MCP工具：按缓存的描述注册，实现模块首次调用时才导入
+        "MCP_OPTIONS": {
+            "DEFERRED_TOOLS": True,
+            # tools/list 中工具描述只保留首行，减少分页往返
+            "COMPACT_TOOL_SCHEMA": False,
+        },
+        # 关闭：各组件并发关闭，超过截止时间的步骤被取消
+        "SHUTDOWN_OPTIONS": {
+            "DEADLINE_SEC": 3.0,
+            "SLOW_STAGE_MS": 500,
+        },
+        # 事件循环监测：周期测量循环延迟，记录超过阈值的回调/任务及其调用栈
+        "LOOP_MONITOR_OPTIONS": {
+            "ENABLED": True,
+            "INTERVAL_MS": 100,
+            "SLOW_CALLBACK_MS": 50,
+            "WINDOW_SEC": 60,
+        },
+        # 本地指标端点：http://127.0.0.1:PORT/metrics（Prometheus）与 /metrics.json
+        "METRICS_OPTIONS": {
+            "ENABLED": False,
+            "PORT": 9464,
+        },
+        # 守护进程模式（--mode daemon）：启动后多久记录待机内存
+        "DAEMON_OPTIONS": {
+            "IDLE_REPORT_DELAY_SEC": 10,
         },
     }
 
@@ -6,7 +6,6 @@ from pathlib import Path
 from typing import Dict, Optional, Tuple
 
 import machineid
-import psutil
 
 from src.utils.logging_config import get_logger
 from src.utils.resource_finder import find_config_dir
@@ -98,6 +97,9 @@ class DeviceFingerprint:
         获取主要网卡的MAC地址.
         """
         try:
+            # 仅在生成指纹时需要（结果缓存在 efuse 文件中），按需导入
+            import psutil
+
             # 获取所有网络接口的地址信息
             net_if_addrs = psutil.net_if_addrs()
 
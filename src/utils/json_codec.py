@@ -0,0 +1,106 @@
+"""
+JSON 编解码.
+
+协议与 MCP 的所有控制消息统一经过此模块：
+- 安装了 orjson 时使用 orjson（快数倍，直接输出 UTF-8）
+- 否则回退到标准库 json，输出格式保持一致（紧凑分隔符、不转义非 ASCII）
+
+已经序列化好的 JSON 片段（如 MCP 工具结果、MCP 应答）可通过 dumps_with_raw
+直接拼接进外层消息，避免“解析再序列化”的往返。
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError
+
+_use_orjson = orjson is not None
+
+
+def backend() -> str:
+    """
+    当前使用的后端名称.
+    """
+    return "orjson" if _use_orjson else "json"
+
+
+def use_backend(name: str):
+    """切换后端（主要用于基准对比）.
+
+    Args:
+        name: "orjson" 或 "json"
+    """
+    global _use_orjson
+    if name == "orjson":
+        if orjson is None:
+            raise RuntimeError("orjson 未安装")
+        _use_orjson = True
+    elif name == "json":
+        _use_orjson = False
+    else:
+        raise ValueError(f"未知的JSON后端: {name}")
+
+
+def dumps_bytes(obj: Any, pretty: bool = False) -> bytes:
+    """
+    序列化为 UTF-8 字节.
+    """
+    if _use_orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            # orjson 不支持的类型（如超过64位的整数）交给标准库处理
+            pass
+    return _stdlib_dumps(obj, pretty).encode("utf-8")
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """
+    序列化为字符串.
+    """
+    if _use_orjson:
+        return dumps_bytes(obj, pretty).decode("utf-8")
+    return _stdlib_dumps(obj, pretty)
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """反序列化.
+
+    Raises:
+        JSONDecodeError: 数据不是合法 JSON（orjson 的异常也是其子类）
+    """
+    if _use_orjson:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+
+def dumps_with_raw(obj: dict, **raw_fields: str) -> str:
+    """序列化 dict，并把已序列化的 JSON 片段作为字段原样拼接进去.
+
+    例如 dumps_with_raw({"type": "mcp"}, payload='{"id":1}')
+    得到 '{"type":"mcp","payload":{"id":1}}'，payload 不会被解析和重新编码。
+
+    调用方需保证片段本身是合法 JSON，且字段名不与 obj 中的键重复。
+    """
+    head = dumps(obj)
+    parts = [f"{dumps(key)}:{raw}" for key, raw in raw_fields.items()]
+    if not parts:
+        return head
+    separator = "," if len(head) > 2 else ""
+    return head[:-1] + separator + ",".join(parts) + "}"
+
+
+def _stdlib_dumps(obj: Any, pretty: bool) -> str:
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,99 @@
+"""
+对话延迟打点工具.
+
+在关键路径（状态切换、TTS开始、编解码器首帧等）记录单调时钟时间戳，
+默认关闭，关闭时 mark() 只做一次布尔判断，可安全地留在音频回调等热路径中。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class LatencyTracer:
+    """
+    轻量的延迟打点器（线程安全，音频线程与事件循环均可调用）
+    """
+
+    def __init__(self, maxlen: int = 10000):
+        self.enabled = False
+        self._events: deque = deque(maxlen=maxlen)
+        self._seen_once = set()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def mark(self, event: str):
+        """
+        记录一个事件.
+        """
+        if not self.enabled:
+            return
+        self._events.append((time.monotonic(), event))
+
+    def mark_once(self, event: str):
+        """
+        在当前轮次内只记录事件的首次发生（如首个上行包、首个播放帧）
+        """
+        if not self.enabled or event in self._seen_once:
+            return
+        with self._lock:
+            if event in self._seen_once:
+                return
+            self._seen_once.add(event)
+        self._events.append((time.monotonic(), event))
+
+    def new_round(self):
+        """
+        开始新的一轮（清空 mark_once 的去重记录）
+        """
+        with self._lock:
+            self._seen_once.clear()
+
+    def reset(self):
+        """
+        清空所有记录.
+        """
+        with self._lock:
+            self._seen_once.clear()
+            self._events.clear()
+
+    def events(self) -> List[Tuple[float, str]]:
+        """
+        获取记录快照.
+        """
+        return list(self._events)
+
+    def first_after(self, event: str, since: float) -> Optional[float]:
+        """
+        获取 since 之后某事件首次发生的时间.
+        """
+        for ts, name in list(self._events):
+            if ts >= since and name == event:
+                return ts
+        return None
+
+    def timeline(self, since: float) -> Dict[str, float]:
+        """
+        获取 since 之后各事件首次发生时间相对 since 的毫秒数.
+        """
+        result: Dict[str, float] = {}
+        for ts, name in list(self._events):
+            if ts >= since and name not in result:
+                result[name] = (ts - since) * 1000
+        return result
+
+
+_tracer = LatencyTracer()
+
+
+def get_latency_tracer() -> LatencyTracer:
+    """
+    获取全局延迟打点器.
+    """
+    return _tracer
@@ -1,13 +1,107 @@
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import Dict, Optional
 
 from colorlog import ColoredFormatter
 
+# 日志队列容量：写盘/控制台卡顿时丢弃新日志，而不是阻塞音频等实时线程
+LOG_QUEUE_SIZE = 10000
 
-def setup_logging():
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["_DroppingQueueHandler"] = None
+_atexit_registered = False
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    非阻塞的队列处理器：队列满时丢弃记录并计数，恢复后补记一条丢弃提示.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        # Handler.handle 已持有 self.lock，计数无需额外加锁
+        if self._unreported:
+            notice = logging.makeLogRecord(
+                {
+                    "name": __name__,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"日志队列已满，丢弃了 {self._unreported} 条日志",
+                }
+            )
+            try:
+                self.queue.put_nowait(notice)
+                self._unreported = 0
+            except queue.Full:
+                pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+
+def _collect_metrics(registry):
+    handler = _queue_handler
+    if handler is None:
+        return
+    registry.set("xiaozhi_log_dropped_total", handler.dropped, kind="counter")
+    registry.set("xiaozhi_log_queue_size", handler.queue.qsize())
+
+
+def get_log_queue_stats() -> dict:
+    """
+    日志队列当前长度与累计丢弃条数.
     """
-    配置日志系统.
+    handler = _queue_handler
+    if handler is None:
+        return {"queue_size": 0, "dropped": 0}
+    return {"queue_size": handler.queue.qsize(), "dropped": handler.dropped}
+
+
+def stop_logging():
+    """
+    停止后台日志线程并写出队列中剩余的日志（进程退出时自动调用）
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def detach_console_handlers():
     """
+    移除直接写 stdout/stderr 的处理器（CLI 仪表盘自行渲染日志时使用）
+    """
+
+    def is_console(handler):
+        return isinstance(handler, logging.StreamHandler) and getattr(
+            handler, "stream", None
+        ) in (sys.stdout, sys.stderr)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if is_console(handler):
+            root.removeHandler(handler)
+    if _listener is not None:
+        _listener.handlers = tuple(h for h in _listener.handlers if not is_console(h))
+
+
+def setup_logging():
+    """配置日志系统.
+
+    调用方线程只把日志记录放入有界队列，由后台线程写控制台和文件，
+    音频回调、UDP 接收等实时线程不会阻塞在磁盘 I/O 上。
+    """
+    global _listener, _queue_handler, _atexit_registered
     from .resource_finder import get_project_root
 
     # 使用resource_finder获取项目根目录并创建logs目录
@@ -23,6 +117,7 @@ def setup_logging():
     root_logger.setLevel(logging.WARNING)  # 设置根日志级别
 
     # 清除已有的处理器（避免重复添加）
+    stop_logging()
     if root_logger.handlers:
         root_logger.handlers.clear()
 
@@ -63,9 +158,23 @@ def setup_logging():
     console_handler.setFormatter(color_formatter)
     file_handler.setFormatter(formatter)
 
-    # 添加处理器到根日志记录器
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    # 根日志记录器只挂队列处理器，实际输出在后台线程中完成
+    _queue_handler = _DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _listener = QueueListener(
+        _queue_handler.queue,
+        console_handler,
+        file_handler,
+        respect_handler_level=True,
+    )
+    _listener.start()
+    root_logger.addHandler(_queue_handler)
+    if not _atexit_registered:
+        atexit.register(stop_logging)
+        _atexit_registered = True
+
+    from .metrics import get_metrics
+
+    get_metrics().register_collector("logging", _collect_metrics)
 
     # 输出日志配置信息
     logging.info("日志系统已初始化，日志文件: %s", log_file)
@@ -101,3 +210,58 @@ def get_logger(name):
     logger.error_exc = log_error_with_exc
 
     return logger
+
+
+class RateLimitedLogger:
+    """按消息模板限频的日志包装，用于音频回调、UDP 接收等高频路径.
+
+    同一模板在 interval 秒内只输出一次，期间被抑制的条数附在下一次输出中；
+    参数按 % 风格延迟格式化，级别未启用时不做任何格式化。
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = 5.0):
+        self._logger = logger
+        self._interval = interval
+        # 模板 -> 上次输出时间 / 被抑制条数（多线程下偶有多输出一条可以接受）
+        self._last: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def log(self, level: int, msg: str, *args, **kwargs):
+        if not self._logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        last = self._last.get(msg)
+        if last is not None and now - last < self._interval:
+            self._suppressed[msg] = self._suppressed.get(msg, 0) + 1
+            return
+        self._last[msg] = now
+        suppressed = self._suppressed.pop(msg, 0)
+        if suppressed:
+            msg = f"{msg}（另有 {suppressed} 条相同日志被抑制）"
+        self._logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg: str, *args, **kwargs):
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg: str, *args, **kwargs):
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg: str, *args, **kwargs):
+        self.log(logging.ERROR, msg, *args, **kwargs)
+
+
+def get_rate_limited_logger(name: str, interval: float = 5.0) -> RateLimitedLogger:
+    """获取限频日志记录器.
+
+    Args:
+        name: 日志记录器名称，通常是模块名
+        interval: 同一消息模板的最短输出间隔（秒）
+
+    示例:
+        throttled_logger = get_rate_limited_logger(__name__)
+        throttled_logger.warning("输入流状态: %s", status)
+    """
+    return RateLimitedLogger(logging.getLogger(name), interval)
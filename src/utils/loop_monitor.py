@@ -0,0 +1,326 @@
+"""
+事件循环延迟监测.
+
+- 延迟：周期性 sleep，实际唤醒时间相对预期的偏差即循环延迟，按滚动窗口统计分位数
+- 慢回调：包装 asyncio Handle._run 为每个回调计时，超过阈值的回调记录名称
+  （任务取 _create_task 传入的名称）；看门狗线程在回调仍在执行时抓取
+  事件循环线程的调用栈，指出真正阻塞的位置
+
+只统计被监测的事件循环上的回调，其他线程的事件循环不受影响。
+低功耗待机时可挂起（suspend）：撤下回调包装，看门狗与延迟采样不再周期唤醒。
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.utils.logging_config import get_logger
+from src.utils.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+class LoopLagMonitor:
+    # 慢回调告警日志同名最短间隔（秒）
+    LOG_INTERVAL_SEC = 10.0
+    # 抓取调用栈保留的最内层帧数
+    STACK_DEPTH = 8
+
+    def __init__(
+        self,
+        interval_ms: float = 100,
+        slow_callback_ms: float = 50,
+        window_sec: float = 60.0,
+        max_slow: int = 50,
+    ):
+        self._interval = interval_ms / 1000
+        self._threshold = slow_callback_ms / 1000
+        self._window = window_sec
+        self._lock = threading.Lock()
+
+        # 滚动窗口：(时间, 延迟毫秒)
+        self._lags: Deque[Tuple[float, float]] = deque()
+        self.slow_callbacks: Deque[Dict] = deque(maxlen=max_slow)
+        self._slow_total = 0
+        self._last_logged: Dict[str, float] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        # 正在执行的回调：[handle, 开始时间, 调用栈]
+        self._current: Optional[list] = None
+        self._original_run = None
+        self._wrapped_run = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # 未挂起时置位；看门狗线程与延迟采样任务在挂起期间等待
+        self._running = threading.Event()
+        self._running.set()
+        self._resumed: Optional[asyncio.Event] = None
+
+    # ------------------------------------------------------------------
+    # 安装 / 卸载
+    # ------------------------------------------------------------------
+
+    def install(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        开始为事件循环上的回调计时（须在事件循环线程中调用）
+        """
+        if self._original_run is not None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._original_run = original = asyncio.events.Handle._run
+        monitor = self
+
+        def _run(handle):
+            if handle._loop is not monitor._loop:
+                return original(handle)
+            entry = [handle, time.perf_counter(), None]
+            monitor._current = entry
+            try:
+                return original(handle)
+            finally:
+                monitor._current = None
+                duration = time.perf_counter() - entry[1]
+                if duration >= monitor._threshold:
+                    monitor._record_slow(handle, duration, entry[2])
+
+        self._wrapped_run = _run
+        asyncio.events.Handle._run = _run
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._running.set()
+        get_metrics().register_collector("loop", self._collect_metrics)
+        self._stop.clear()
+        self._watchdog = threading.Thread(
+            target=self._watchdog_loop, name="LoopLagWatchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def uninstall(self):
+        """
+        恢复原始回调执行并停止看门狗线程.
+        """
+        if self._original_run is None:
+            return
+        asyncio.events.Handle._run = self._original_run
+        self._original_run = None
+        self._wrapped_run = None
+        get_metrics().unregister_collector("loop")
+        self._stop.set()
+        # 唤醒挂起中的看门狗使其退出
+        self._running.set()
+        self._watchdog = None
+
+    @property
+    def suspended(self) -> bool:
+        return not self._running.is_set()
+
+    def suspend(self):
+        """
+        挂起监测（低功耗待机时在事件循环线程中调用）：恢复原始回调执行，停止周期唤醒.
+        """
+        if self._original_run is None or self.suspended:
+            return
+        asyncio.events.Handle._run = self._original_run
+        self._running.clear()
+        self._resumed.clear()
+        self._current = None
+
+    def resume(self):
+        """
+        恢复挂起的监测.
+        """
+        if self._original_run is None or not self.suspended:
+            return
+        asyncio.events.Handle._run = self._wrapped_run
+        self._running.set()
+        self._resumed.set()
+
+    def _watchdog_loop(self):
+        # 回调执行超过阈值仍未返回时抓取调用栈；挂起期间阻塞等待，不再轮询
+        while not self._stop.is_set():
+            self._running.wait()
+            if self._stop.wait(self._threshold / 2):
+                break
+            entry = self._current
+            if (
+                entry is None
+                or entry[2] is not None
+                or time.perf_counter() - entry[1] < self._threshold
+            ):
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None and self._current is entry:
+                entry[2] = self._format_stack(frame) or []
+
+    def _format_stack(self, frame) -> List[str]:
+        """
+        回调内部的 "文件:行号 函数" 列表（最内层在后），略去事件循环与 asyncio 的帧.
+        """
+        items = traceback.extract_stack(frame)
+        # 只保留本模块 _run 包装之内（即回调自身）的帧
+        starts = [i for i, item in enumerate(items) if item.filename == __file__]
+        if starts:
+            items = items[starts[-1] + 1 :]
+        stack = [
+            f"{item.filename}:{item.lineno} {item.name}"
+            for item in items
+            if not item.filename.startswith(_ASYNCIO_DIR)
+        ]
+        return stack[-self.STACK_DEPTH :]
+
+    # ------------------------------------------------------------------
+    # 采集
+    # ------------------------------------------------------------------
+
+    async def run(self):
+        """
+        周期性测量事件循环延迟（作为长期任务运行）
+        """
+        while True:
+            await self._resumed.wait()
+            expected = time.perf_counter() + self._interval
+            await asyncio.sleep(self._interval)
+            lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+            now = time.monotonic()
+            with self._lock:
+                self._lags.append((now, lag_ms))
+                self._prune(now)
+
+    @staticmethod
+    def describe(handle) -> str:
+        """
+        回调名称：任务取任务名，其余取函数限定名.
+        """
+        callback = handle._callback
+        owner = getattr(callback, "__self__", None)
+        if isinstance(owner, asyncio.Task):
+            return f"任务:{owner.get_name()}"
+        name = getattr(callback, "__qualname__", None)
+        if name is None:
+            func = getattr(callback, "func", None)  # functools.partial
+            name = getattr(func, "__qualname__", None) or repr(callback)
+        return f"回调:{name}"
+
+    def _record_slow(self, handle, duration: float, stack: Optional[List[str]]):
+        name = self.describe(handle)
+        duration_ms = round(duration * 1000, 1)
+        record = {
+            "at": time.time(),
+            "name": name,
+            "duration_ms": duration_ms,
+            "stack": stack,
+        }
+        with self._lock:
+            self.slow_callbacks.append(record)
+            self._slow_total += 1
+
+        now = time.monotonic()
+        if now - self._last_logged.get(name, 0.0) >= self.LOG_INTERVAL_SEC:
+            self._last_logged[name] = now
+            # C 函数回调（如 call_later(time.sleep)）没有 Python 帧
+            where = f"，阻塞位置: {stack[-1]}" if stack else ""
+            logger.warning(f"事件循环慢回调 {name} 耗时 {duration_ms}ms{where}")
+
+    def _prune(self, now: float):
+        cutoff = now - self._window
+        while self._lags and self._lags[0][0] < cutoff:
+            self._lags.popleft()
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _percentile(values: List[float], p: float) -> Optional[float]:
+        if not values:
+            return None
+        index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+        return round(values[index], 1)
+
+    def get_stats(self, recent: int = 5) -> dict:
+        """窗口内的延迟分位数与最近的慢回调.
+
+        Args:
+            recent: 返回最近慢回调的条数
+        """
+        with self._lock:
+            self._prune(time.monotonic())
+            lags = sorted(value for _, value in self._lags)
+            slow = list(self.slow_callbacks)[-recent:] if recent else []
+            slow_total = self._slow_total
+
+        return {
+            "window_sec": self._window,
+            "samples": len(lags),
+            "lag_p50_ms": self._percentile(lags, 50),
+            "lag_p95_ms": self._percentile(lags, 95),
+            "lag_p99_ms": self._percentile(lags, 99),
+            "lag_max_ms": round(lags[-1], 1) if lags else None,
+            "slow_callback_ms": round(self._threshold * 1000, 1),
+            "slow_callbacks": slow_total,
+            "recent_slow": slow,
+        }
+
+    def _collect_metrics(self, registry):
+        """
+        指标采集：循环延迟分位数与慢回调累计次数.
+        """
+        stats = self.get_stats(recent=0)
+        registry.describe("xiaozhi_loop_lag_ms", "gauge", "事件循环延迟（滚动窗口分位数）")
+        for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+            registry.set(
+                "xiaozhi_loop_lag_ms", stats[f"lag_{key}_ms"], quantile=quantile
+            )
+        registry.set("xiaozhi_loop_lag_max_ms", stats["lag_max_ms"])
+        registry.set(
+            "xiaozhi_loop_slow_callbacks_total", stats["slow_callbacks"], kind="counter"
+        )
+
+    def summary(self, stats: Optional[dict] = None) -> str:
+        """一行文本摘要，供界面显示.
+
+        Args:
+            stats: 已取得的 get_stats() 结果，避免重复统计
+        """
+        stats = stats or self.get_stats(recent=0)
+        if not stats["samples"]:
+            return ""
+        parts = [
+            f"延迟 p50 {stats['lag_p50_ms']:.0f}ms",
+            f"p99 {stats['lag_p99_ms']:.0f}ms",
+            f"最大 {stats['lag_max_ms']:.0f}ms",
+        ]
+        if stats["slow_callbacks"]:
+            parts.append(f"慢回调 {stats['slow_callbacks']}")
+        return " · ".join(parts)
+
+
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """
+    获取全局事件循环监测器（首次调用时按配置创建）
+    """
+    global _monitor
+    if _monitor is None:
+        from src.utils.config_manager import ConfigManager
+
+        options = (
+            ConfigManager.get_instance().get_config("LOOP_MONITOR_OPTIONS", {}) or {}
+        )
+        _monitor = LoopLagMonitor(
+            interval_ms=float(options.get("INTERVAL_MS", 100)),
+            slow_callback_ms=float(options.get("SLOW_CALLBACK_MS", 50)),
+            window_sec=float(options.get("WINDOW_SEC", 60)),
+        )
+    return _monitor
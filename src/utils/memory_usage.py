@@ -0,0 +1,30 @@
+"""
+进程内存占用查询（不依赖 psutil，守护进程模式下保持导入最少）
+"""
+
+import os
+import sys
+from typing import Optional
+
+
+def get_rss_mb() -> Optional[float]:
+    """当前进程常驻内存（MB）
+
+    Linux 读取 /proc/self/statm；其他类 Unix 平台退化为峰值常驻内存；
+    Windows 返回 None。
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1048576, 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节，其余平台为 KB
+    divisor = 1048576 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
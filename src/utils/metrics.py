@@ -0,0 +1,228 @@
+"""
+客户端性能指标注册表.
+
+全进程共用一个注册表（get_metrics()）：
+- 事件类指标（重连、MCP 工具调用）在发生时 inc()/observe()
+- 状态类指标（音频流、网络质量、循环延迟、KWS 实时率、进程内存/CPU）由各组件
+  注册采集函数，仅在被抓取时读取，热路径上没有额外开销
+
+输出 Prometheus 文本格式（render_prometheus）与 JSON（snapshot）。
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(round(value, 6))
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    # 延迟类直方图默认桶（毫秒）
+    DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 指标名 -> (类型, 说明)
+        self._meta: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._collectors: Dict[str, Callable[["MetricsRegistry"], None]] = {}
+        self._last_cpu: Optional[Tuple[float, float]] = None
+        self.register_collector("process", self._collect_process)
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def describe(self, name: str, kind: str, help_text: str = ""):
+        """声明指标类型与说明（重复声明以首次为准）
+
+        Args:
+            kind: counter / gauge / histogram
+        """
+        with self._lock:
+            self._meta.setdefault(name, (kind, help_text))
+
+    @staticmethod
+    def _key(labels: Dict[str, object]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """
+        计数器累加.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._meta.setdefault(name, ("counter", ""))
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: Optional[float], kind: str = "gauge", **labels):
+        """设置当前值（值为 None 时移除该序列）
+
+        Args:
+            kind: gauge，或组件自身维护累计值时用 counter
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._meta.setdefault(name, (kind, ""))
+            series = self._values.setdefault(name, {})
+            if value is None:
+                series.pop(key, None)
+            else:
+                series[key] = float(value)
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        直方图记录一次观测值（默认按毫秒分桶）
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._meta.setdefault(name, ("histogram", ""))
+            buckets = self._buckets.setdefault(name, self.DEFAULT_BUCKETS_MS)
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(buckets))
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram.counts[index] += 1
+                    break
+            histogram.total += value
+            histogram.count += 1
+
+    def register_collector(self, key: str, collector: Callable[["MetricsRegistry"], None]):
+        """注册抓取时调用的采集函数（同 key 覆盖，组件重建时不会重复）
+
+        Args:
+            collector: 接收注册表，用 set() 写入当前值
+        """
+        with self._lock:
+            self._collectors[key] = collector
+
+    def unregister_collector(self, key: str):
+        with self._lock:
+            self._collectors.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def collect(self):
+        """
+        运行全部采集函数（单个失败不影响其他）
+        """
+        with self._lock:
+            collectors = list(self._collectors.items())
+        for key, collector in collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logger.debug(f"指标采集 {key} 失败: {e}")
+
+    def _collect_process(self, registry: "MetricsRegistry"):
+        from src.utils.memory_usage import get_rss_mb
+
+        rss = get_rss_mb()
+        registry.set("xiaozhi_process_rss_bytes", int(rss * 1048576) if rss else None)
+        cpu = time.process_time()
+        registry.set("xiaozhi_process_cpu_seconds_total", cpu, kind="counter")
+        now = time.monotonic()
+        if self._last_cpu is not None and now > self._last_cpu[0]:
+            percent = (cpu - self._last_cpu[1]) / (now - self._last_cpu[0]) * 100
+            registry.set("xiaozhi_process_cpu_percent", round(percent, 2))
+        self._last_cpu = (now, cpu)
+
+    @staticmethod
+    def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = key + extra
+        if not pairs:
+            return ""
+        escaped = (
+            (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for k, v in pairs
+        )
+        return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+    def render_prometheus(self) -> str:
+        """
+        Prometheus 文本格式（0.0.4）
+        """
+        self.collect()
+        lines = []
+        with self._lock:
+            for name in sorted(self._meta):
+                kind, help_text = self._meta[name]
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in self._values.get(name, {}).items():
+                    lines.append(f"{name}{self._format_labels(key)} {_format_value(value)}")
+                buckets = self._buckets.get(name, ())
+                for key, histogram in self._histograms.get(name, {}).items():
+                    cumulative = 0
+                    for bound, count in zip(buckets, histogram.counts):
+                        cumulative += count
+                        labels = self._format_labels(key, (("le", f"{bound:g}"),))
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    labels = self._format_labels(key, (("le", "+Inf"),))
+                    lines.append(f"{name}_bucket{labels} {histogram.count}")
+                    lines.append(
+                        f"{name}_sum{self._format_labels(key)} {_format_value(histogram.total)}"
+                    )
+                    lines.append(f"{name}_count{self._format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """
+        JSON 友好的全部指标：{指标名: [{labels, value | count/sum/avg}]}
+        """
+        self.collect()
+        result: Dict[str, list] = {}
+        with self._lock:
+            for name in sorted(self._meta):
+                entries = [
+                    {"labels": dict(key), "value": value}
+                    for key, value in self._values.get(name, {}).items()
+                ]
+                entries.extend(
+                    {
+                        "labels": dict(key),
+                        "count": histogram.count,
+                        "sum": round(histogram.total, 3),
+                        "avg": round(histogram.total / histogram.count, 3)
+                        if histogram.count
+                        else None,
+                    }
+                    for key, histogram in self._histograms.get(name, {}).items()
+                )
+                result[name] = entries
+        return result
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    获取全局指标注册表.
+    """
+    return _registry
@@ -0,0 +1,78 @@
+"""
+本地指标 HTTP 端点（只监听 127.0.0.1）
+
+- GET /metrics       Prometheus 文本格式
+- GET /metrics.json  JSON
+
+基于 asyncio.start_server 的最小 HTTP/1.0 实现，不引入额外的 Web 框架。
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+from src.utils.logging_config import get_logger
+from src.utils.metrics import MetricsRegistry, get_metrics
+
+logger = get_logger(__name__)
+
+
+class MetricsServer:
+    HOST = "127.0.0.1"
+    # 读取请求头的超时（秒），避免空连接占用
+    READ_TIMEOUT = 2.0
+
+    def __init__(self, port: int = 9464, registry: Optional[MetricsRegistry] = None):
+        self.port = port
+        self.registry = registry or get_metrics()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.HOST, self.port)
+        logger.info(f"指标端点已启动: http://{self.HOST}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        logger.info("指标端点已关闭")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(
+                reader.readuntil(b"\r\n\r\n"), self.READ_TIMEOUT
+            )
+            method, _, rest = request.decode("latin-1").partition(" ")
+            path = rest.split(" ", 1)[0].split("?", 1)[0]
+
+            if method != "GET":
+                status, content_type, body = "405 Method Not Allowed", "text/plain", b""
+            elif path == "/metrics":
+                status = "200 OK"
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+                body = self.registry.render_prometheus().encode("utf-8")
+            elif path == "/metrics.json":
+                status = "200 OK"
+                content_type = "application/json; charset=utf-8"
+                body = json.dumps(self.registry.snapshot(), ensure_ascii=False).encode(
+                    "utf-8"
+                )
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b""
+
+            writer.write(
+                f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode(
+                    "latin-1"
+                )
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.warning(f"处理指标请求失败: {e}")
+        finally:
+            writer.close()
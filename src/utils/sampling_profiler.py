@@ -0,0 +1,164 @@
+"""
+现场采样剖析.
+
+在后台线程中按固定间隔对所有线程（事件循环、PortAudio 回调、UDP 接收、
+pynput 监听、KWS 等）抓取 Python 调用栈，统计为折叠栈文本（.folded，
+可直接用 flamegraph.pl 或 speedscope 打开）；同时用 tracemalloc 记录采样期间
+新增内存分配的 Top N。结果写入 logs 目录，无需在设备上安装 py-spy。
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SamplingProfiler:
+    # 采样间隔（秒）
+    INTERVAL = 0.005
+    # tracemalloc 保留的栈深度
+    TRACEMALLOC_FRAMES = 10
+
+    def __init__(self, output_dir: Optional[Path] = None):
+        if output_dir is None:
+            from src.utils.resource_finder import get_project_root
+
+            output_dir = Path(get_project_root()) / "logs"
+        self.output_dir = Path(output_dir)
+        self._root = str(Path(__file__).resolve().parents[2])
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _frame_label(self, code) -> str:
+        filename = code.co_filename
+        if filename.startswith(self._root):
+            filename = os.path.relpath(filename, self._root)
+        else:
+            filename = os.path.basename(filename)
+        return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+    def _sample(self, seconds: float) -> Counter:
+        samples: Counter = Counter()
+        me = threading.get_ident()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_label(frame.f_code))
+                    frame = frame.f_back
+                # 非 threading 创建的线程（如 PortAudio 回调线程）只有标识
+                thread = names.get(ident) or f"native-{ident}"
+                samples[(thread,) + tuple(reversed(stack))] += 1
+            time.sleep(self.INTERVAL)
+        return samples
+
+    def capture(self, seconds: float = 10.0, top_n: int = 30) -> Dict:
+        """采样剖析（阻塞，需在线程中调用）
+
+        Args:
+            seconds: 采样时长
+            top_n: 内存分配 Top N 条数
+
+        Returns:
+            dict: 采样数、各线程样本数、输出文件路径与自身耗时最多的函数
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("已有剖析正在进行")
+        try:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(self.TRACEMALLOC_FRAMES)
+            baseline = tracemalloc.take_snapshot()
+            try:
+                samples = self._sample(seconds)
+                snapshot = tracemalloc.take_snapshot()
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+            # 排除剖析器自身的分配
+            ignore = [
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ]
+            allocations = snapshot.filter_traces(ignore).compare_to(
+                baseline.filter_traces(ignore), "lineno"
+            )
+            return self._write(samples, allocations, top_n)
+        finally:
+            self._lock.release()
+
+    def _write(self, samples: Counter, allocations, top_n: int) -> Dict:
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        folded = self.output_dir / f"profile_{stamp}.folded"
+        memory = self.output_dir / f"profile_{stamp}_tracemalloc.txt"
+
+        folded.write_text(
+            "".join(f"{';'.join(stack)} {count}\n" for stack, count in samples.items()),
+            encoding="utf-8",
+        )
+        lines = [f"采样期间内存分配 Top {top_n}（按新增字节排序）"]
+        for stat in allocations[:top_n]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} 块  "
+                f"{frame.filename}:{frame.lineno}"
+            )
+        memory.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        threads: Counter = Counter()
+        own: Counter = Counter()
+        for stack, count in samples.items():
+            threads[stack[0]] += count
+            if len(stack) > 1:
+                own[stack[-1]] += count
+        return {
+            "samples": sum(samples.values()),
+            "threads": dict(threads.most_common()),
+            "top_functions": own.most_common(10),
+            "folded": str(folded),
+            "tracemalloc": str(memory),
+        }
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_sampling_profiler() -> SamplingProfiler:
+    """
+    获取全局采样剖析器.
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
+
+
+async def capture_profile(seconds: float = 10.0, top_n: int = 30) -> Dict:
+    """
+    在线程池中采样剖析，不阻塞事件循环.
+    """
+    profiler = get_sampling_profiler()
+    logger.info(f"开始采样剖析 {seconds:.0f} 秒")
+    result = await asyncio.to_thread(profiler.capture, seconds, top_n)
+    logger.info(
+        f"采样剖析完成: {result['samples']} 个样本，"
+        f"火焰图数据: {result['folded']}，内存分配: {result['tracemalloc']}"
+    )
+    return result
@@ -0,0 +1,296 @@
+"""
+启动剖析工具.
+
+记录从 main.py 到 Application 就绪的各阶段耗时，以及每个模块导入的自身/累计耗时
+（与 python -X importtime 相同的口径，按包汇总）。结束时输出：
+- JSON：阶段、按包汇总的导入耗时、最慢模块、预算检查结果
+- 折叠栈文本（.folded）：可直接用 flamegraph.pl 或 speedscope 打开
+
+默认关闭，关闭时 phase() 只做一次布尔判断。
+"""
+
+import contextvars
+import importlib.abc
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 当前任务所在的阶段路径（并发初始化时各任务互不干扰）
+_phase_path: contextvars.ContextVar = contextvars.ContextVar(
+    "startup_phase_path", default=()
+)
+
+
+class _TimedLoader:
+    """
+    包装模块加载器，计时 exec_module.
+    """
+
+    def __init__(self, loader, profiler: "StartupProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # 模块上保留原加载器，避免影响 importlib.resources 等
+        module.__loader__ = self._loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+        self._profiler._import_started(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._import_finished()
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    插在 sys.meta_path 最前面，为找到的模块包装计时加载器.
+    """
+
+    def __init__(self, profiler: "StartupProfiler"):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, self._profiler)
+            return spec
+        return None
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self._t0 = 0.0
+        self._finished = False
+        self._lock = threading.Lock()
+        self._finder: Optional[_ImportTimer] = None
+        self._phases: List[Dict] = []
+        self._marks: List[Dict] = []
+        self._imports: List[Dict] = []
+        # 导入栈：[模块名, 开始时间, 子模块累计耗时]，只在导入线程上使用
+        self._import_stack = threading.local()
+        self.output: Optional[Path] = None
+
+    def enable(self, output: Optional[str] = None):
+        """
+        开启剖析（应在导入重量级模块之前调用）
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self._t0 = time.perf_counter()
+        self.output = Path(output) if output else None
+        self._finder = _ImportTimer(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    # ------------------------------------------------------------------
+    # 阶段
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        记录一个阶段（可嵌套，可在并发任务中使用）
+        """
+        if not self.enabled or self._finished:
+            yield
+            return
+        parent = _phase_path.get()
+        token = _phase_path.set(parent + (name,))
+        start = self._now_ms()
+        try:
+            yield
+        finally:
+            _phase_path.reset(token)
+            with self._lock:
+                self._phases.append(
+                    {
+                        "name": name,
+                        "path": list(parent + (name,)),
+                        "start_ms": round(start, 2),
+                        "duration_ms": round(self._now_ms() - start, 2),
+                    }
+                )
+
+    def mark(self, name: str):
+        """
+        记录一个时间点.
+        """
+        if self.enabled and not self._finished:
+            self._marks.append({"name": name, "at_ms": round(self._now_ms(), 2)})
+
+    # ------------------------------------------------------------------
+    # 导入
+    # ------------------------------------------------------------------
+
+    def _import_started(self, name: str):
+        stack = getattr(self._import_stack, "stack", None)
+        if stack is None:
+            stack = self._import_stack.stack = []
+        stack.append([name, time.perf_counter(), 0.0])
+
+    def _import_finished(self):
+        stack = self._import_stack.stack
+        name, start, children = stack.pop()
+        cumulative = time.perf_counter() - start
+        if stack:
+            stack[-1][2] += cumulative
+        record = {
+            "module": name,
+            "self_ms": round((cumulative - children) * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+            "parents": [frame[0] for frame in stack],
+            "phase": list(_phase_path.get()),
+        }
+        with self._lock:
+            self._imports.append(record)
+
+    @staticmethod
+    def package_of(module: str) -> str:
+        """
+        汇总用的包名：项目内取前两级（src.audio_codecs），第三方取顶级包.
+        """
+        parts = module.split(".")
+        if parts[0] == "src" and len(parts) > 1:
+            return ".".join(parts[:2])
+        return parts[0]
+
+    # ------------------------------------------------------------------
+    # 汇总
+    # ------------------------------------------------------------------
+
+    def finish(self) -> Optional[Dict]:
+        """
+        结束剖析，写出报告并检查预算（未开启时返回 None）
+        """
+        if not self.enabled or self._finished:
+            return None
+        self._finished = True
+        total_ms = self._now_ms()
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+        packages: Dict[str, Dict] = {}
+        for record in self._imports:
+            package = packages.setdefault(
+                self.package_of(record["module"]), {"self_ms": 0.0, "modules": 0}
+            )
+            package["self_ms"] += record["self_ms"]
+            package["modules"] += 1
+        for package in packages.values():
+            package["self_ms"] = round(package["self_ms"], 1)
+
+        import_ms = round(sum(r["self_ms"] for r in self._imports), 1)
+        report = {
+            "total_ms": round(total_ms, 1),
+            "import_ms": import_ms,
+            "phases": sorted(self._phases, key=lambda p: p["start_ms"]),
+            "marks": self._marks,
+            "packages": dict(
+                sorted(packages.items(), key=lambda item: -item[1]["self_ms"])
+            ),
+            "slowest_modules": sorted(
+                self._imports, key=lambda r: -r["self_ms"]
+            )[:30],
+        }
+        report["budget"] = self._check_budget(report)
+        self._write(report)
+        return report
+
+    def _check_budget(self, report: Dict) -> Dict:
+        """
+        对照配置的预算检查，超出时记录警告.
+        """
+        from src.utils.config_manager import ConfigManager
+
+        budget = ConfigManager.get_instance().get_config("STARTUP_BUDGET_MS", {}) or {}
+        violations = []
+
+        def check(label: str, value: float, limit):
+            if limit and value > limit:
+                violations.append(f"{label} {value:.0f}ms > {limit}ms")
+
+        check("启动总耗时", report["total_ms"], budget.get("TOTAL"))
+        check("模块导入", report["import_ms"], budget.get("IMPORTS"))
+        for phase in report["phases"]:
+            if len(phase["path"]) == 1:
+                check(f"阶段[{phase['name']}]", phase["duration_ms"], budget.get("PHASE"))
+        for name, package in report["packages"].items():
+            check(f"导入包[{name}]", package["self_ms"], budget.get("PACKAGE"))
+
+        for violation in violations:
+            logger.warning(f"启动预算超出: {violation}")
+        return {"limits": budget, "violations": violations}
+
+    def _write(self, report: Dict):
+        if self.output is None:
+            from src.utils.resource_finder import get_project_root
+
+            self.output = Path(get_project_root()) / "logs" / "startup_profile.json"
+        try:
+            self.output.parent.mkdir(parents=True, exist_ok=True)
+            self.output.write_text(
+                json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            folded = self.output.with_suffix(".folded")
+            folded.write_text("\n".join(self._folded_lines()) + "\n", encoding="utf-8")
+            logger.info(
+                f"启动剖析完成: 总耗时 {report['total_ms']:.0f}ms，导入 {report['import_ms']:.0f}ms，"
+                f"报告: {self.output}，火焰图数据: {folded}"
+            )
+        except Exception as e:
+            logger.error(f"写入启动剖析报告失败: {e}")
+
+    def _folded_lines(self) -> List[str]:
+        """
+        折叠栈格式（路径;路径 自身耗时微秒）
+        """
+        lines = []
+        # 阶段：自身耗时 = 总耗时 - 直接子阶段耗时
+        children: Dict[tuple, float] = {}
+        for phase in self._phases:
+            parent = tuple(phase["path"][:-1])
+            if parent:
+                children[parent] = children.get(parent, 0.0) + phase["duration_ms"]
+        for phase in self._phases:
+            own = phase["duration_ms"] - children.get(tuple(phase["path"]), 0.0)
+            if own > 0:
+                lines.append(f"startup;{';'.join(phase['path'])} {int(own * 1000)}")
+        for record in self._imports:
+            stack = record["parents"] + [record["module"]]
+            if record["self_ms"] > 0:
+                lines.append(f"imports;{';'.join(stack)} {int(record['self_ms'] * 1000)}")
+        return lines
+
+
+_profiler = StartupProfiler()
+
+
+def get_startup_profiler() -> StartupProfiler:
+    """
+    获取全局启动剖析器.
+    """
+    return _profiler
@@ -1,5 +1,7 @@
+import asyncio
 from pathlib import Path
 
+from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import (
     QCheckBox,
     QComboBox,
@@ -8,6 +10,7 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QMessageBox,
     QPushButton,
+    QShortcut,
     QSpinBox,
     QTabWidget,
     QTextEdit,
@@ -35,6 +38,9 @@ class SettingsWindow(QDialog):
         # 快捷键设置组件
         self.shortcuts_tab = None
 
+        # 采样剖析任务（隐藏操作 Ctrl+Shift+P）
+        self._profile_task = None
+
         # 初始化UI
         self._setup_ui()
         self._connect_events()
@@ -180,6 +186,11 @@ class SettingsWindow(QDialog):
                 self._on_model_path_browse
             )
 
+        # 隐藏操作：现场采样剖析，供排查卡顿时使用
+        QShortcut(
+            QKeySequence("Ctrl+Shift+P"), self, activated=self._on_profile_capture
+        )
+
     def _load_config_values(self):
         """
         Charge les valeurs de configuration dans les contrôles UI.
@@ -585,6 +596,46 @@ class SettingsWindow(QDialog):
             self.logger.error(f"Échec lors de la sélection du chemin du modèle : {e}", exc_info=True)
             QMessageBox.warning(self, "Erreur", f"Une erreur est survenue lors de la sélection du chemin du modèle : {str(e)}")
 
+    def _on_profile_capture(self):
+        """
+        Lance une capture de profilage (action cachée Ctrl+Shift+P).
+        """
+        if self._profile_task and not self._profile_task.done():
+            QMessageBox.information(
+                self, "Profilage", "Une capture de profilage est déjà en cours."
+            )
+            return
+        try:
+            from src.utils.sampling_profiler import capture_profile
+
+            self._profile_task = asyncio.ensure_future(capture_profile())
+            self._profile_task.add_done_callback(self._on_profile_done)
+            self.logger.info("Capture de profilage lancée depuis les paramètres")
+        except Exception as e:
+            self.logger.error(f"Impossible de lancer le profilage : {e}", exc_info=True)
+            QMessageBox.warning(self, "Erreur", f"Impossible de lancer le profilage : {str(e)}")
+
+    def _on_profile_done(self, task):
+        """
+        Affiche les fichiers produits par la capture de profilage.
+        """
+        parent = self if self.isVisible() else None
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error:
+            self.logger.error(f"Échec du profilage : {error}")
+            QMessageBox.warning(parent, "Erreur", f"Échec du profilage : {str(error)}")
+            return
+        result = task.result()
+        QMessageBox.information(
+            parent,
+            "Profilage terminé",
+            f"{result['samples']} échantillons collectés.\n\n"
+            f"Flamegraph (piles repliées) :\n{result['folded']}\n\n"
+            f"Allocations mémoire (tracemalloc) :\n{result['tracemalloc']}",
+        )
+
     def _restart_application(self):
         """
         Redémarre l'application.